@@ -0,0 +1,291 @@
+"""
+Asynchronous audit pipeline.
+
+Two pieces keep audit I/O off the request path:
+
+* QueueFileHandler - a logging handler for LOGGING that only enqueues records;
+  a QueueListener thread writes them to the log file.
+* AuditLogBuffer - an in-process buffer of unsaved payroll.AuditLog rows that a
+  background thread bulk_creates every FLUSH_INTERVAL_MS or BATCH_SIZE rows.
+
+Both are flushed on interpreter shutdown. When the buffer is full, OVERFLOW
+chooses between dropping the row ('drop') and blocking the caller for up to
+BLOCK_TIMEOUT_MS ('block').
+
+query_audit_logs() serves the keyset-paginated audit log browser.
+
+Settings (all optional)::
+
+    AUDIT_LOG_BUFFER = {
+        'ENABLED': True,
+        'FLUSH_INTERVAL_MS': 500,
+        'BATCH_SIZE': 100,
+        'MAX_QUEUE_SIZE': 10000,
+        'OVERFLOW': 'drop',
+        'BLOCK_TIMEOUT_MS': 50,
+    }
+"""
+import atexit
+import base64
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SETTINGS = {
+    'ENABLED': True,
+    'FLUSH_INTERVAL_MS': 500,
+    'BATCH_SIZE': 100,
+    'MAX_QUEUE_SIZE': 10000,
+    'OVERFLOW': 'drop',
+    'BLOCK_TIMEOUT_MS': 50,
+}
+
+
+class QueueFileHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking file handler for LOGGING configs.
+
+    Accepts the same arguments as logging.FileHandler. Records are formatted on
+    the calling thread with this handler's formatter and written to the file by
+    a QueueListener thread.
+    """
+
+    def __init__(self, filename, mode='a', encoding=None, delay=False):
+        super().__init__(queue.SimpleQueue())
+        self.file_handler = logging.FileHandler(filename, mode=mode, encoding=encoding, delay=delay)
+        self.listener = logging.handlers.QueueListener(self.queue, self.file_handler)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def close(self):
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            # Drains the queue before returning
+            listener.stop()
+            self.file_handler.close()
+        super().close()
+
+
+# Queued by stop() to wake a writer blocked on an empty queue
+_WAKE = object()
+
+
+class AuditLogBuffer:
+    """Collect unsaved AuditLog rows and bulk insert them from a background thread"""
+
+    def __init__(self, flush_interval_ms=500, batch_size=100, max_queue_size=10000,
+                 overflow='drop', block_timeout_ms=50):
+        if overflow not in ('drop', 'block'):
+            raise ValueError("overflow must be 'drop' or 'block'")
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.block_timeout = block_timeout_ms / 1000.0
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.written = 0
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+                self._thread.start()
+
+    def put(self, entry):
+        """Queue an unsaved AuditLog; returns False if it was dropped"""
+        if self._thread is None:
+            self.start()
+        try:
+            if self.overflow == 'block':
+                self.queue.put(entry, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Audit log buffer full, %d entries dropped so far", self.dropped)
+            return False
+
+    def stop(self, timeout=5.0):
+        """Flush everything still queued and stop the writer thread"""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self.queue.put_nowait(_WAKE)
+            except queue.Full:
+                # A full queue means the writer is not waiting on get()
+                pass
+            thread.join(timeout)
+        # Rows queued after the thread exited (or if it never started)
+        self._write(self._drain())
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _WAKE:
+                batch.append(entry)
+        return batch
+
+    def _run(self):
+        from django.db import close_old_connections, connection
+        try:
+            while not self._stopping.is_set():
+                deadline = time.monotonic() + self.flush_interval
+                batch = []
+                # Collect until the batch is full or the flush interval has passed
+                while len(batch) < self.batch_size and not self._stopping.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        entry = self.queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if entry is _WAKE:
+                        break
+                    batch.append(entry)
+                if batch:
+                    close_old_connections()
+                    self._write(batch)
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                self._write(batch)
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        if not batch:
+            return
+        from payroll.models import AuditLog
+        try:
+            AuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            self.written += len(batch)
+        except Exception:
+            logger.exception("Failed to write %d audit log entries", len(batch))
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_audit_buffer():
+    """Return the process-wide AuditLogBuffer configured from settings.AUDIT_LOG_BUFFER"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = dict(DEFAULT_BUFFER_SETTINGS, **getattr(settings, 'AUDIT_LOG_BUFFER', {}))
+                _buffer = AuditLogBuffer(
+                    flush_interval_ms=config['FLUSH_INTERVAL_MS'],
+                    batch_size=config['BATCH_SIZE'],
+                    max_queue_size=config['MAX_QUEUE_SIZE'],
+                    overflow=config['OVERFLOW'],
+                    block_timeout_ms=config['BLOCK_TIMEOUT_MS'],
+                )
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def record_audit(company_id, action_type, user=None, target_model='', target_id=None, changes=None, request=None):
+    """
+    Queue an AuditLog row for batched insertion.
+
+    With AUDIT_LOG_BUFFER['ENABLED'] False the row is written synchronously.
+    Rows without a company are skipped (AuditLog.company is required).
+    """
+    if not company_id:
+        return None
+    from payroll.models import AuditLog
+    from django.utils import timezone
+
+    entry = AuditLog(
+        company_id=company_id,
+        user_id=user.pk if user is not None and getattr(user, 'is_authenticated', False) else None,
+        action_type=action_type,
+        target_model=target_model,
+        target_id=target_id,
+        changes=changes or {},
+        ip_address=request.META.get('REMOTE_ADDR') if request is not None else None,
+        user_agent=request.META.get('HTTP_USER_AGENT', '') if request is not None else '',
+        # Stamped when the action happened, not when the batch is flushed
+        timestamp=timezone.now(),
+    )
+    config = getattr(settings, 'AUDIT_LOG_BUFFER', {})
+    if not config.get('ENABLED', DEFAULT_BUFFER_SETTINGS['ENABLED']):
+        entry.save()
+        return entry
+    get_audit_buffer().put(entry)
+    return entry
+
+
+AUDIT_PAGE_SIZE = 50
+AUDIT_MAX_PAGE_SIZE = 200
+
+
+def encode_audit_cursor(entry):
+    """Opaque cursor pointing just after `entry` in (-timestamp, -id) order"""
+    raw = f'{entry.timestamp.isoformat()}|{entry.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_audit_cursor(cursor):
+    """Return (timestamp, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def query_audit_logs(company_id, user_id=None, action_type=None, target_model=None, target_id=None,
+                     date_from=None, date_to=None, cursor=None, limit=AUDIT_PAGE_SIZE):
+    """
+    One page of a company's audit log, newest first.
+
+    Keyset pagination on (timestamp, id) keeps every page an index range scan
+    however deep the auditor browses. Returns (entries, next_cursor).
+    """
+    from payroll.models import AuditLog
+
+    limit = max(1, min(int(limit), AUDIT_MAX_PAGE_SIZE))
+    qs = AuditLog.objects.filter(company_id=company_id)
+    if user_id:
+        qs = qs.filter(user_id=user_id)
+    if action_type:
+        qs = qs.filter(action_type=action_type)
+    if target_model:
+        qs = qs.filter(target_model=target_model)
+        if target_id:
+            qs = qs.filter(target_id=target_id)
+    if date_from:
+        qs = qs.filter(timestamp__gte=date_from)
+    if date_to:
+        qs = qs.filter(timestamp__lt=date_to)
+    if cursor:
+        timestamp, pk = decode_audit_cursor(cursor)
+        qs = qs.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+
+    entries = list(qs.select_related('user').order_by('-timestamp', '-id')[:limit + 1])
+    next_cursor = encode_audit_cursor(entries[limit - 1]) if len(entries) > limit else None
+    return entries[:limit], next_cursor
@@ -9,6 +9,8 @@ from django.utils.decorators import method_decorator
 from django.views.generic import View
 import logging
 
+from .audit import record_audit
+
 logger = logging.getLogger(__name__)
 
 
@@ -121,8 +123,13 @@ def audit_action(action_type):
         def _wrapped_view(request, *args, **kwargs):
             if request.user.is_authenticated:
                 logger.info(
-                    f"Audit: {action_type} - User: {request.user.username} "
-                    f"(role: {request.user.role}) - IP: {request.META.get('REMOTE_ADDR')}"
+                    "Audit: %s - User: %s (role: %s) - IP: %s",
+                    action_type, request.user.username, request.user.role, request.META.get('REMOTE_ADDR'),
+                )
+                # Queued and bulk inserted off the request path
+                record_audit(
+                    request.user.company_id, action_type, user=request.user,
+                    changes={'path': request.path, 'method': request.method}, request=request,
                 )
             response = view_func(request, *args, **kwargs)
             return response
@@ -0,0 +1,87 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from accounts.middleware import RoleBasedAccessMiddleware, SecurityAuditMiddleware
+from accounts.routing import build_route_table, DEFAULT_ROLE_URL_PATTERNS, DEFAULT_PUBLIC_URL_PREFIXES, DEFAULT_AUDITED_URL_PREFIXES
+
+SAMPLE_PATHS = [
+    '/hr-dashboard/attendance/',
+    '/hr-dashboard/api/leaves/bulk/',
+    '/employee-portal/',
+    '/admin-panel/settings/',
+    '/static/css/app.css',
+    '/accounts/login/',
+    '/api/profile/employees/17/',
+    '/',
+]
+
+
+class _User:
+    is_authenticated = True
+    username = 'benchmark'
+    role = 'hr_manager'
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark the access-control route lookup and middleware overhead per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000, help='Lookups per path (default: 100000)')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        role_patterns = getattr(settings, 'ROLE_URL_PATTERNS', DEFAULT_ROLE_URL_PATTERNS)
+        public = getattr(settings, 'PUBLIC_URL_PREFIXES', DEFAULT_PUBLIC_URL_PREFIXES)
+        audited = getattr(settings, 'AUDITED_URL_PREFIXES', DEFAULT_AUDITED_URL_PREFIXES)
+        table = build_route_table()
+
+        def linear_scan(path):
+            # The per-request prefix scans the middlewares used to do
+            if any(path.startswith(url) for url in public):
+                return
+            for role, patterns in role_patterns.items():
+                for pattern in patterns:
+                    if path.startswith(pattern):
+                        break
+            any(path.startswith(url) for url in audited)
+
+        self.stdout.write(f'{"path":<34} {"linear scan":>14} {"route table":>14}')
+        for path in SAMPLE_PATHS:
+            scan = self._time(linear_scan, path, iterations)
+            trie = self._time(table.lookup, path, iterations)
+            self.stdout.write(f'{path:<34} {scan:>11.0f} ns {trie:>11.0f} ns')
+
+        # End-to-end cost of both middlewares' process_request on an allowed request
+        access = RoleBasedAccessMiddleware(lambda request: None)
+        audit = SecurityAuditMiddleware(lambda request: None)
+        factory = RequestFactory()
+        requests = []
+        for _ in range(iterations // 10 or 1):
+            request = factory.get('/hr-dashboard/attendance/')
+            request.user = _User()
+            requests.append(request)
+
+        def run():
+            start = time.perf_counter()
+            for request in requests:
+                access.process_request(request)
+                audit.process_request(request)
+            return (time.perf_counter() - start) * 1e9 / len(requests)
+
+        self.stdout.write(f'Middleware overhead, audit INFO logging enabled:  {run():.0f} ns/request')
+        # With INFO disabled the audit log line is never formatted
+        logging.disable(logging.INFO)
+        try:
+            self.stdout.write(f'Middleware overhead, audit INFO logging disabled: {run():.0f} ns/request')
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def _time(self, func, path, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(path)
+        return (time.perf_counter() - start) * 1e9 / iterations
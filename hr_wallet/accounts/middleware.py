@@ -7,93 +7,67 @@ from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.deprecation import MiddlewareMixin
 
+from .routing import get_route_decision
+
 logger = logging.getLogger(__name__)
 
 
 class RoleBasedAccessMiddleware(MiddlewareMixin):
     """
-    Middleware to enforce role-based access control at URL level
+    Middleware to enforce role-based access control at URL level.
+    Prefixes come from settings.ROLE_URL_PATTERNS and settings.PUBLIC_URL_PREFIXES
+    (see accounts.routing).
     """
-    
-    # URL patterns that require specific roles
-    ROLE_URL_PATTERNS = {
-        'super_admin': [
-            '/admin-panel/',
-        ],
-        'hr_manager': [
-            '/hr-dashboard/',
-        ],
-        'employee': [
-            '/employee-portal/',
-        ]
-    }
-    
-    # URLs that don't require authentication
-    PUBLIC_URLS = [
-        '/accounts/company-selection/',
-        '/accounts/login/',
-        '/accounts/logout/',
-        '/login/',
-        '/logout/',
-        '/admin/',
-        '/static/',
-        '/media/',
-    ]
-    
+
     def process_request(self, request):
-        # Skip middleware for public URLs
-        if any(request.path.startswith(url) for url in self.PUBLIC_URLS):
+        decision = get_route_decision(request)
+
+        # Skip middleware for public URLs and URLs without a role restriction
+        if decision.public or decision.role is None:
             return None
-        
+
         # Skip middleware for unauthenticated users (let login_required handle it)
         if not request.user.is_authenticated:
             return None
-        
-        # Check role-based access
+
         user_role = request.user.role
-        
-        # Check if user is trying to access a role-restricted URL
-        for role, url_patterns in self.ROLE_URL_PATTERNS.items():
-            for pattern in url_patterns:
-                if request.path.startswith(pattern):
-                    if user_role != role:
-                        logger.warning(
-                            f"Access denied by middleware: User {request.user.username} "
-                            f"(role: {user_role}) attempted to access {request.path} "
-                            f"which requires role: {role}"
-                        )
-                        return HttpResponseForbidden(
-                            "You don't have permission to access this page."
-                        )
-        
+        if user_role != decision.role:
+            logger.warning(
+                "Access denied by middleware: User %s (role: %s) attempted to access %s which requires role: %s",
+                request.user.username, user_role, request.path, decision.role,
+            )
+            return HttpResponseForbidden(
+                "You don't have permission to access this page."
+            )
+
         return None
 
 
 class SecurityAuditMiddleware(MiddlewareMixin):
     """
-    Middleware to log security-related events
+    Middleware to log security-related events.
+    Audited prefixes come from settings.AUDITED_URL_PREFIXES (see accounts.routing).
     """
-    
+
     def process_request(self, request):
-        # Log authentication attempts and access patterns
-        if request.user.is_authenticated:
-            # Log access to sensitive areas
-            sensitive_paths = ['/admin-panel/', '/hr-dashboard/', '/employee-portal/']
-            if any(request.path.startswith(path) for path in sensitive_paths):
-                logger.info(
-                    f"Access: {request.path} - User: {request.user.username} "
-                    f"(role: {request.user.role}) - IP: {request.META.get('REMOTE_ADDR')} "
-                    f"- User-Agent: {request.META.get('HTTP_USER_AGENT', 'Unknown')}"
-                )
-        
+        # Log access to sensitive areas
+        if (get_route_decision(request).audit
+                and logger.isEnabledFor(logging.INFO)
+                and request.user.is_authenticated):
+            logger.info(
+                "Access: %s - User: %s (role: %s) - IP: %s - User-Agent: %s",
+                request.path, request.user.username, request.user.role,
+                request.META.get('REMOTE_ADDR'), request.META.get('HTTP_USER_AGENT', 'Unknown'),
+            )
+
         return None
-    
+
     def process_response(self, request, response):
         # Log failed access attempts (403 responses)
         if response.status_code == 403 and request.user.is_authenticated:
             logger.warning(
-                f"403 Forbidden: {request.path} - User: {request.user.username} "
-                f"(role: {request.user.role}) - IP: {request.META.get('REMOTE_ADDR')}"
+                "403 Forbidden: %s - User: %s (role: %s) - IP: %s",
+                request.path, request.user.username, request.user.role, request.META.get('REMOTE_ADDR'),
             )
-        
+
         return response
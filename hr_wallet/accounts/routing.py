@@ -0,0 +1,110 @@
+"""
+Prefix route table shared by the access-control and audit middlewares.
+
+URL prefixes from settings are compiled once into a single regex alternation
+(longest prefix first) plus a dict of precomputed decisions. Every configured
+prefix that matches a path is itself a prefix of the longest match, so the
+decision for the longest match already combines them all: whether the path is
+public, which role it requires (the longest matching role prefix wins) and
+whether access should be audited. A lookup is one anchored regex match and one
+dict lookup.
+"""
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULT_ROLE_URL_PATTERNS = {
+    'super_admin': ['/admin-panel/'],
+    'hr_manager': ['/hr-dashboard/'],
+    'employee': ['/employee-portal/'],
+}
+
+DEFAULT_PUBLIC_URL_PREFIXES = [
+    '/accounts/company-selection/',
+    '/accounts/login/',
+    '/accounts/logout/',
+    '/login/',
+    '/logout/',
+    '/admin/',
+    '/static/',
+    '/media/',
+]
+
+DEFAULT_AUDITED_URL_PREFIXES = ['/admin-panel/', '/hr-dashboard/', '/employee-portal/']
+
+RouteDecision = namedtuple('RouteDecision', ['public', 'role', 'audit'])
+
+NO_MATCH = RouteDecision(public=False, role=None, audit=False)
+
+
+class RouteTable:
+    """Compiled mapping of URL prefixes to access decisions"""
+
+    __slots__ = ('_pattern', '_decisions')
+
+    def __init__(self, role_patterns=None, public_prefixes=(), audited_prefixes=()):
+        public_prefixes = set(public_prefixes)
+        audited_prefixes = set(audited_prefixes)
+        roles = {}
+        for role, prefixes in (role_patterns or {}).items():
+            for prefix in prefixes:
+                # First role listed for a prefix wins, matching the old dict iteration order
+                roles.setdefault(prefix, role)
+
+        prefixes = sorted(public_prefixes | audited_prefixes | set(roles), key=len, reverse=True)
+        self._decisions = {}
+        for prefix in prefixes:
+            matched = [p for p in prefixes if prefix.startswith(p)]
+            role_prefix = max((p for p in matched if p in roles), key=len, default=None)
+            self._decisions[prefix] = RouteDecision(
+                public=any(p in public_prefixes for p in matched),
+                role=roles[role_prefix] if role_prefix else None,
+                audit=any(p in audited_prefixes for p in matched),
+            )
+        # Alternatives are tried in order, so listing longer prefixes first yields the longest match
+        self._pattern = re.compile('|'.join(map(re.escape, prefixes))) if prefixes else None
+
+    def lookup(self, path):
+        """Return the RouteDecision for a request path"""
+        match = self._pattern.match(path) if self._pattern is not None else None
+        if match is None:
+            return NO_MATCH
+        return self._decisions[match.group()]
+
+
+_route_table = None
+
+
+def build_route_table():
+    """Compile the route table from settings"""
+    return RouteTable(
+        role_patterns=getattr(settings, 'ROLE_URL_PATTERNS', DEFAULT_ROLE_URL_PATTERNS),
+        public_prefixes=getattr(settings, 'PUBLIC_URL_PREFIXES', DEFAULT_PUBLIC_URL_PREFIXES),
+        audited_prefixes=getattr(settings, 'AUDITED_URL_PREFIXES', DEFAULT_AUDITED_URL_PREFIXES),
+    )
+
+
+def get_route_table():
+    """Return the process-wide route table, compiling it on first use"""
+    global _route_table
+    if _route_table is None:
+        _route_table = build_route_table()
+    return _route_table
+
+
+@receiver(setting_changed)
+def _reset_route_table(setting, **kwargs):
+    global _route_table
+    if setting in ('ROLE_URL_PATTERNS', 'PUBLIC_URL_PREFIXES', 'AUDITED_URL_PREFIXES'):
+        _route_table = None
+
+
+def get_route_decision(request):
+    """Route decision for a request, computed once and memoized on the request"""
+    decision = getattr(request, '_route_decision', None)
+    if decision is None:
+        decision = request._route_decision = get_route_table().lookup(request.path)
+    return decision
@@ -12,6 +12,8 @@ from django.utils import timezone
 from .decorators import audit_action
 from .models import User
 from core_hr.models import Company, Department, Employee, LeaveBalance
+from core_hr.listings import bump_listing_version, company_listing
+from core_hr.stats import bump_company_stats_version
 import logging
 import json
 
@@ -55,14 +57,8 @@ def company_selection_view(request):
     # Handle GET request - show company selection form
     try:
         # Get all active companies
-        companies = Company.objects.filter(is_active=True).order_by('name')
-
-        # Add employee count to each company
-        for company in companies:
-            try:
-                company.employee_count = company.employees.filter(is_active=True).count()
-            except Exception:
-                company.employee_count = 0
+        # With their active employee counts, from one cached grouped query
+        companies = company_listing(active_only=True)
 
         context = {
             'page_title': 'Select Your Company',
@@ -97,19 +93,14 @@ def login_view(request):
     if not selected_company_id:
         return redirect('accounts:company_selection')
 
-    # Get the selected company
-    selected_company = None
-    try:
-        selected_company = Company.objects.get(id=selected_company_id, is_active=True)
-    except Company.DoesNotExist:
+    # The selected company was resolved by TenantMiddleware from the session
+    selected_company = getattr(request, 'tenant', None)
+    if selected_company is None or not selected_company.is_active:
         # Company no longer exists or is inactive, clear session and redirect
         request.session.pop('selected_company_id', None)
         request.session.pop('selected_company_name', None)
         messages.error(request, 'Selected company is no longer available. Please select again.')
         return redirect('accounts:company_selection')
-    except Exception as e:
-        logger.error(f"Error accessing selected company: {str(e)}")
-        return redirect('accounts:company_selection')
 
     if request.method == 'POST':
         username_input = (request.POST.get('username') or '').strip()
@@ -533,6 +524,11 @@ def change_user_status_api(request, pk):
     return JsonResponse({'success': True})
 
 
+def _invalidate_company_listings(company_id):
+    bump_company_stats_version(company_id)
+    bump_listing_version(company_id)
+
+
 @login_required
 @require_http_methods(["POST"])
 def bulk_update_users_api(request):
@@ -559,6 +555,8 @@ def bulk_update_users_api(request):
             updated = users.update(is_active=is_active)
             # Mirror to employees
             Employee.objects.filter(user__in=users).update(is_active=is_active)
+            # Queryset updates skip post_save, so invalidate the cached counts and listings here
+            transaction.on_commit(lambda: _invalidate_company_listings(request.user.company_id))
         elif action == 'set_role':
             role = data.get('role')
             if role not in dict(User.ROLE_CHOICES):
@@ -575,6 +573,7 @@ def bulk_update_users_api(request):
                 return JsonResponse({'error': 'Invalid department'}, status=400)
             emps = Employee.objects.filter(user__in=users)
             updated = emps.update(department=dept)
+            transaction.on_commit(lambda: _invalidate_company_listings(request.user.company_id))
         else:
             return JsonResponse({'error': 'Unsupported action'}, status=400)
 
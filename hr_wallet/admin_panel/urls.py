@@ -12,5 +12,7 @@ urlpatterns = [
     path('hr-managers/create/', views.create_hr_manager, name='create_hr_manager'),
     path('settings/', views.system_settings, name='system_settings'),
     path('audit-logs/', views.audit_logs, name='audit_logs'),
+    path('api/audit-logs/', views.audit_logs_api, name='audit_logs_api'),
+    path('api/channel-layer/', views.channel_layer_status_api, name='channel_layer_status_api'),
     path('biometric-devices/', views.biometric_devices, name='biometric_devices'),
 ]
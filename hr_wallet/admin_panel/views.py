@@ -2,12 +2,18 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
-from django.db.models import Count
+from django.db.models import Count, Q
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from accounts.decorators import require_role, audit_action
 from accounts.models import User
 from core_hr.models import Employee, Department, Company
+from core_hr.listings import company_listing, department_listing
+from accounts.audit import query_audit_logs, AUDIT_PAGE_SIZE
+from notifications.realtime import channel_layer_metrics
+from datetime import datetime, time, timedelta
+from django.utils import timezone
 
 
 @login_required
@@ -16,14 +22,15 @@ from core_hr.models import Employee, Department, Company
 def dashboard(request):
     """Super Admin Dashboard with optimized queries"""
     try:
-        # Use select_related for recent users to avoid N+1 queries
+        # The super admin sees every company, so these counts are not tenant scoped
         recent_users = User.objects.select_related('company').order_by('-date_joined')[:5]
 
+        users = User.objects.aggregate(total_users=Count('id'), hr_managers=Count('id', filter=Q(role='hr_manager')))
         context = {
-            'total_users': User.objects.count(),
+            'total_users': users['total_users'],
             'total_employees': Employee.objects.count(),
             'total_departments': Department.objects.count(),
-            'hr_managers': User.objects.filter(role='hr_manager').count(),
+            'hr_managers': users['hr_managers'],
             'recent_users': recent_users,
         }
     except Exception as e:
@@ -72,9 +79,8 @@ def manage_hr_managers(request):
 def system_settings(request):
     """System Settings with error handling"""
     try:
-        company = Company.objects.first()
         return render(request, 'admin_panel/settings.html', {
-            'company': company
+            'company': request.tenant
         })
     except Exception as e:
         return render(request, 'admin_panel/settings.html', {
@@ -93,11 +99,72 @@ def create_hr_manager(request):
 @login_required
 @require_role('super_admin')
 def audit_logs(request):
-    """View Audit Logs"""
-    # This would typically fetch from a logging system
-    return render(request, 'admin_panel/audit_logs.html')
+    """View Audit Logs; rows are loaded page by page from audit_logs_api"""
+    from payroll.models import AuditLog
+    users = User.objects.filter(company=request.tenant).order_by('username').values('id', 'username') if request.tenant else []
+    return render(request, 'admin_panel/audit_logs.html', {
+        'users': users,
+        'action_types': AuditLog.ACTION_TYPES,
+    })
 
 
+def _parse_audit_date(value, end_of_day=False):
+    if not value:
+        return None
+    day = datetime.strptime(value, '%Y-%m-%d').date()
+    if end_of_day:
+        day += timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+@login_required
+@require_role('super_admin')
+@require_http_methods(["GET"])
+def audit_logs_api(request):
+    """Cursor-paginated audit log for the current company, newest first"""
+    if request.tenant is None:
+        return JsonResponse({'results': [], 'next_cursor': None})
+    try:
+        entries, next_cursor = query_audit_logs(
+            request.tenant.pk,
+            user_id=request.GET.get('user_id') or None,
+            action_type=request.GET.get('action_type') or None,
+            target_model=request.GET.get('target_model') or None,
+            target_id=request.GET.get('target_id') or None,
+            date_from=_parse_audit_date(request.GET.get('date_from')),
+            date_to=_parse_audit_date(request.GET.get('date_to'), end_of_day=True),
+            cursor=request.GET.get('cursor') or None,
+            limit=request.GET.get('limit') or AUDIT_PAGE_SIZE,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'results': [{
+            'id': entry.pk,
+            'timestamp': entry.timestamp.isoformat(),
+            'user': entry.user.username if entry.user else None,
+            'action_type': entry.action_type,
+            'action': entry.get_action_type_display(),
+            'target_model': entry.target_model,
+            'target_id': entry.target_id,
+            'changes': entry.changes,
+            'ip_address': entry.ip_address,
+        } for entry in entries],
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+@require_role('super_admin')
+@require_http_methods(["GET"])
+def channel_layer_status_api(request):
+    """Channel-layer circuit breaker state and send latency for this process"""
+    return JsonResponse({
+        'backend': settings.CHANNEL_LAYERS['default']['BACKEND'],
+        'metrics': channel_layer_metrics(),
+    })
+
 
 @login_required
 @require_role('super_admin')
@@ -135,18 +202,19 @@ def company_admin_dashboard(request):
     
     try:
         # Get comprehensive stats for the admin dashboard
+        # Companies and departments come with their counts from the cached listings
         if request.user.role == 'super_admin':
             # Super admin sees all data
-            companies = Company.objects.all()
+            companies = company_listing()
             users = User.objects.all()
             employees = Employee.objects.all()
-            departments = Department.objects.all()
+            departments = department_listing()
         else:
             # HR managers see only their company data
-            companies = Company.objects.filter(id=request.user.company.id) if request.user.company else Company.objects.none()
-            users = User.objects.filter(company=request.user.company) if request.user.company else User.objects.none()
-            employees = Employee.objects.filter(company=request.user.company) if request.user.company else Employee.objects.none()
-            departments = Department.objects.filter(company=request.user.company) if request.user.company else Department.objects.none()
+            companies = company_listing(request.tenant.id) if request.tenant else []
+            users = User.objects.filter(company=request.tenant) if request.tenant else User.objects.none()
+            employees = Employee.objects.filter(company=request.tenant) if request.tenant else Employee.objects.none()
+            departments = department_listing(request.tenant.id) if request.tenant else []
         
         context = {
             'user': request.user,
@@ -156,10 +224,10 @@ def company_admin_dashboard(request):
             'employees': employees,
             'departments': departments,
             'stats': {
-                'total_companies': companies.count(),
+                'total_companies': len(companies),
                 'total_users': users.count(),
                 'total_employees': employees.count(),
-                'total_departments': departments.count(),
+                'total_departments': len(departments),
                 'active_employees': employees.filter(is_active=True).count(),
                 'hr_managers': users.filter(role='hr_manager').count(),
             }
@@ -169,10 +237,10 @@ def company_admin_dashboard(request):
         context = {
             'user': request.user,
             'is_super_admin': request.user.role == 'super_admin',
-            'companies': Company.objects.none(),
+            'companies': [],
             'users': User.objects.none(),
             'employees': Employee.objects.none(),
-            'departments': Department.objects.none(),
+            'departments': [],
             'stats': {
                 'total_companies': 0,
                 'total_users': 0,
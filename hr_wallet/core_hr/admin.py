@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Company, Department, Employee, Attendance, LeaveRequest
+from .models import Company, Department, Employee, Attendance, LeaveRequest, LeaveLedgerEntry, ShiftRule, WorkWeek, Holiday
 
 
 @admin.register(Company)
@@ -10,7 +10,7 @@ class CompanyAdmin(admin.ModelAdmin):
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ('name', 'manager')  # Removed created_at as it might not exist
+    list_display = ('name', 'parent', 'manager')  # Removed created_at as it might not exist
     search_fields = ('name', 'description')
 
 
@@ -36,3 +36,39 @@ class LeaveRequestAdmin(admin.ModelAdmin):
     list_filter = ('leave_type', 'status', 'created_at')
     search_fields = ('employee__user__username', 'employee__employee_id', 'reason')
     date_hierarchy = 'created_at'
+
+
+@admin.register(LeaveLedgerEntry)
+class LeaveLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'leave_type', 'kind', 'date', 'days', 'leave_request', 'created_at')
+    list_filter = ('kind', 'leave_type', 'company')
+    search_fields = ('employee__user__username', 'employee__employee_id', 'note')
+    date_hierarchy = 'date'
+
+    # The ledger is append-only; corrections are new 'adjustment' entries
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WorkWeek)
+class WorkWeekAdmin(admin.ModelAdmin):
+    list_display = ('company', 'weekmask')
+    search_fields = ('company__name',)
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ('name', 'date', 'company')
+    list_filter = ('company',)
+    date_hierarchy = 'date'
+    search_fields = ('name', 'company__name')
+
+
+@admin.register(ShiftRule)
+class ShiftRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'company', 'department', 'start_time', 'end_time', 'unpaid_break_minutes', 'is_active')
+    list_filter = ('is_active', 'company')
+    search_fields = ('name', 'company__name', 'department__name')
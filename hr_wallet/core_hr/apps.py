@@ -5,3 +5,7 @@ class CoreHrConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core_hr'
     verbose_name = 'Core HR Management'
+
+    def ready(self):
+        # Register cache invalidation handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,71 @@
+"""
+Helpers for rolling old rows out of hot tables into monthly JSONL.gz files.
+
+Rows are read in primary-key order with keyset pagination, so archiving a
+month never holds more than one batch in memory. Files are written to a
+temporary name and renamed once complete, so a crash never leaves a truncated
+archive behind.
+"""
+import gzip
+import json
+import os
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(month):
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def parse_month(value):
+    """Parse 'YYYY-MM' into the first day of that month"""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
+
+
+def months_before(day, count):
+    """First day of the month `count` months before `day`'s month"""
+    index = day.year * 12 + (day.month - 1) - count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def iter_batches(queryset, batch_size=5000):
+    """Yield lists of rows from a queryset in ascending pk order using keyset pagination"""
+    last_pk = None
+    queryset = queryset.order_by('pk')
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]['pk'] if isinstance(batch[-1], dict) else batch[-1].pk
+
+
+def write_jsonl_gz(path, rows):
+    """Write dict rows to a gzip-compressed JSON-lines file atomically; returns the row count"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    count = 0
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as fh:
+        for row in rows:
+            fh.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')))
+            fh.write('\n')
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_jsonl_gz(path):
+    """Yield dict rows from a file written by write_jsonl_gz"""
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
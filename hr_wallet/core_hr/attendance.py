@@ -0,0 +1,211 @@
+"""
+Attendance writes that stay correct under concurrent punches and edits.
+
+Every Attendance writer goes through here instead of get_or_create() followed
+by save() of an instance that may already be stale:
+
+- rows are created with INSERT ... ON CONFLICT DO NOTHING (ensure_attendance);
+- punch times merge with conditional UPDATEs the database applies atomically,
+  keeping the earliest clock-in and the latest clock-out (record_punch);
+- HR edits overwrite only the fields they set, in one UPDATE (update_attendance),
+  or for many employee-days at once under row locks (apply_corrections), and
+  mark the row manually_corrected so punch reprocessing keeps them;
+- total_hours is recomputed with a compare-and-set on the times it was
+  computed from, so a recompute from old times never lands last.
+
+Each call is one short write_atomic() transaction. It takes SQLite's database
+write lock when it begins, so concurrent punches queue for it instead of
+failing with "database is locked"; on other databases it is plain atomic() and
+the rows are locked with SELECT ... FOR UPDATE.
+
+Batch writers (core_hr.shifts) lock their rows with lock_rows() before they
+read the punches the rows are computed from.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import OperationalError, transaction
+from django.db.models import Q
+
+from .models import Attendance
+from .rollups import refresh_rollups_for
+from .stats import bump_company_stats_version, bump_employee_stats_version
+
+HOURS_FIELDS = ('clock_in', 'clock_out', 'break_duration')
+CORRECTION_FIELDS = ('clock_in', 'clock_out', 'status', 'notes')
+
+BEGIN_BUSY_TIMEOUT_MS = 5
+
+
+def _begin_immediate(execute, sql, params, many, context):
+    """Execute wrapper that turns the BEGIN of an atomic() block into BEGIN IMMEDIATE.
+
+    With a deferred BEGIN, a transaction that reads and then writes fails at
+    once if another connection is writing. While waiting, SQLite's busy handler
+    backs off to one attempt every 100 ms, so a writer that has waited a while
+    keeps losing the lock to newer ones; the wait is polled here instead.
+    """
+    if sql != 'BEGIN':
+        return execute(sql, params, many, context)
+    cursor = context['cursor']
+    timeout = context['connection'].settings_dict['OPTIONS'].get('timeout', 5)
+    deadline = time.monotonic() + timeout
+    cursor.execute(f'PRAGMA busy_timeout = {BEGIN_BUSY_TIMEOUT_MS}')
+    try:
+        while True:
+            try:
+                return execute('BEGIN IMMEDIATE', params, many, context)
+            except OperationalError as e:
+                if 'locked' not in str(e) or time.monotonic() >= deadline:
+                    raise
+            time.sleep(random.uniform(0.001, 0.004))
+    finally:
+        cursor.execute(f'PRAGMA busy_timeout = {int(timeout * 1000)}')
+
+
+@contextmanager
+def write_atomic(using=None):
+    """transaction.atomic() for attendance writers; on SQLite the outermost block starts with BEGIN IMMEDIATE"""
+    connection = transaction.get_connection(using)
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    with connection.execute_wrapper(_begin_immediate), transaction.atomic(using=using):
+        yield
+
+
+def total_hours_for(day, clock_in, clock_out, break_duration=None):
+    """Hours between clock-in and clock-out (overnight if out is before in), less the break"""
+    if not (clock_in and clock_out):
+        return None
+    dt_in = datetime.combine(day, clock_in)
+    dt_out = datetime.combine(day, clock_out)
+    if dt_out < dt_in:
+        dt_out += timedelta(days=1)
+    delta = dt_out - dt_in
+    if break_duration:
+        delta -= break_duration
+    return Decimal(delta.total_seconds() / 3600.0).quantize(Decimal('0.01'))
+
+
+def lock_rows(model, company_id, keys):
+    """Create missing (employee, date) rows and lock them; call inside write_atomic().
+
+    Returns {(employee_id, date): row}.
+    """
+    keys = set(keys)
+    model.objects.bulk_create(
+        [model(employee_id=employee_id, company_id=company_id, date=day) for employee_id, day in keys],
+        ignore_conflicts=True,
+    )
+    rows = model.objects.select_for_update().filter(
+        employee_id__in={employee_id for employee_id, _ in keys}, date__in={day for _, day in keys},
+    )
+    return {(row.employee_id, row.date): row for row in rows if (row.employee_id, row.date) in keys}
+
+
+def ensure_attendance(employee, day):
+    """The employee's Attendance row for a day, created if missing"""
+    Attendance.objects.bulk_create(
+        [Attendance(employee_id=employee.pk, company_id=employee.company_id, date=day)], ignore_conflicts=True,
+    )
+    return Attendance.objects.get(employee_id=employee.pk, date=day)
+
+
+def recompute_total_hours(attendance_id):
+    """Set total_hours from the row's current times (None once a time is cleared); returns the row as written"""
+    for _ in range(5):
+        att = Attendance.objects.get(pk=attendance_id)
+        hours = total_hours_for(att.date, att.clock_in, att.clock_out, att.break_duration)
+        if hours == att.total_hours:
+            return att
+        # Only applies if the times are still the ones the hours came from; if another
+        # writer changed them, it recomputes after its own change
+        if Attendance.objects.filter(pk=attendance_id, **{f: getattr(att, f) for f in HOURS_FIELDS}).update(total_hours=hours):
+            att.total_hours = hours
+            return att
+    return Attendance.objects.get(pk=attendance_id)
+
+
+def _bump_stats(att):
+    # Queryset writes skip the model signals; bumped after commit so no reader caches the old rows anew
+    def bump():
+        bump_company_stats_version(att.company_id)
+        bump_employee_stats_version(att.employee_id)
+    transaction.on_commit(bump)
+
+
+def record_punch(employee, day, clock_in=None, clock_out=None):
+    """Merge a punch into the day's Attendance: the earliest clock-in and the latest clock-out win"""
+    with write_atomic():
+        att = ensure_attendance(employee, day)
+        if clock_in is not None:
+            Attendance.objects.filter(Q(clock_in__isnull=True) | Q(clock_in__gt=clock_in), pk=att.pk).update(clock_in=clock_in)
+        if clock_out is not None:
+            Attendance.objects.filter(Q(clock_out__isnull=True) | Q(clock_out__lt=clock_out), pk=att.pk).update(clock_out=clock_out)
+        att = recompute_total_hours(att.pk)
+        refresh_rollups_for([(att.employee_id, att.date)])
+    _bump_stats(att)
+    return att
+
+
+def update_attendance(employee, day, **fields):
+    """Overwrite the given Attendance fields for a day (HR corrections)"""
+    with write_atomic():
+        att = ensure_attendance(employee, day)
+        if fields:
+            Attendance.objects.filter(pk=att.pk).update(manually_corrected=True, **fields)
+        att = recompute_total_hours(att.pk)
+        refresh_rollups_for([(att.employee_id, att.date)])
+    _bump_stats(att)
+    return att
+
+
+def apply_corrections(company_id, corrections):
+    """Overwrite Attendance fields for many employee-days in one transaction.
+
+    corrections is a list of ((employee_id, date), {field: value}); the fields
+    set are a subset of CORRECTION_FIELDS. Missing rows are created and count
+    as changed. Returns one (attendance, created, changes) per correction, where
+    changes maps each field whose value differs to (old, new).
+    """
+    keys = {key for key, _ in corrections}
+    with write_atomic():
+        existing = set(Attendance.objects.filter(
+            company_id=company_id, employee_id__in={e for e, _ in keys}, date__in={d for _, d in keys},
+        ).values_list('employee_id', 'date'))
+        rows = lock_rows(Attendance, company_id, keys)
+        results, changed = [], {}
+        for key, fields in corrections:
+            att = rows[key]
+            changes = {}
+            for field, value in fields.items():
+                if getattr(att, field) != value:
+                    changes[field] = (getattr(att, field), value)
+                    setattr(att, field, value)
+            hours = total_hours_for(att.date, att.clock_in, att.clock_out, att.break_duration)
+            if hours != att.total_hours:
+                changes['total_hours'] = (att.total_hours, hours)
+                att.total_hours = hours
+            created = key not in existing
+            # A new row counts as changed even when the fields match the defaults
+            if changes or created:
+                att.manually_corrected = True
+                changed[key] = att
+            results.append((att, created, changes))
+        Attendance.objects.bulk_update(
+            list(changed.values()), CORRECTION_FIELDS + ('total_hours', 'manually_corrected'), batch_size=500,
+        )
+        refresh_rollups_for(changed)
+
+    def bump():
+        bump_company_stats_version(company_id)
+        for employee_id in {e for e, _ in changed}:
+            bump_employee_stats_version(employee_id)
+    if changed:
+        transaction.on_commit(bump)
+    return results
@@ -0,0 +1,58 @@
+"""
+Compact storage for biometric events.
+
+Events are deduplicated on a signed 64-bit key (the first 8 bytes of the
+SHA-256 of the punch identity) under a (company, dedupe_key) unique
+constraint instead of a 64-character hex string. Raw device payloads are
+stored as raw deflate with a preset dictionary of the keys and values devices
+send, which is what makes compression worthwhile for payloads of a few
+hundred bytes. They are kept inline: almost every payload carries its own
+timestamp, so sharing them out of line would only add an index and a lookup.
+
+The first byte of a stored payload is the format version; PAYLOAD_ZDICT must
+never change for an existing version.
+"""
+import hashlib
+import json
+import zlib
+
+PAYLOAD_VERSION = 1
+
+# Substrings of canonical (key-sorted) payloads, most common last
+PAYLOAD_ZDICT = (
+    b'"external_event_id":"","payload":{},"pin":"","user_id":"'
+    b'{"device_user_id":"","event_type":"checkout","timestamp":"20'
+    b'{"device_user_id":"","event_type":"checkin","timestamp":"20'
+    b'","source":"poll"}","source":"live"}'
+    b'{"raw":"<Attendance>: ","source":"sync"}'
+)
+
+
+def dedupe_key(device_id, company_id, device_user_id, ts, event_type):
+    """64-bit idempotency key for a punch"""
+    base = f"{device_id if device_id else 'N'}|{company_id}|{device_user_id}|{int(ts.timestamp())}|{event_type}"
+    return int.from_bytes(hashlib.sha256(base.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+def dedupe_key_from_hash(hex_hash):
+    """The 64-bit key for a legacy 64-character hex dedupe hash"""
+    return int.from_bytes(bytes.fromhex(hex_hash[:16]), 'big', signed=True)
+
+
+def canonical_payload(payload):
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def encode_payload(payload):
+    """Compressed bytes for a JSON-serializable payload"""
+    # A small window and memLevel: payloads are tiny and setup dominates the cost
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -12, 4, zlib.Z_DEFAULT_STRATEGY, PAYLOAD_ZDICT)
+    return bytes([PAYLOAD_VERSION]) + compressor.compress(canonical_payload(payload)) + compressor.flush()
+
+
+def decode_payload(blob):
+    blob = bytes(blob)
+    if blob[0] != PAYLOAD_VERSION:
+        raise ValueError(f'Unknown biometric payload version {blob[0]}')
+    decompressor = zlib.decompressobj(-15, PAYLOAD_ZDICT)
+    return json.loads(decompressor.decompress(blob[1:]) + decompressor.flush())
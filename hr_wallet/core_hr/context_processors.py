@@ -1,31 +1,10 @@
-from .models import Company
-
-
 def company_context(request):
     """
-    Add company information to all templates
+    Add company information to all templates.
+    The company is resolved once per request by core_hr.middleware.TenantMiddleware.
     """
-    company = None
     current_date = None
 
-    try:
-        # Get the first company as default (handle database errors gracefully)
-        company = Company.objects.first()
-
-        # If no company exists, create a default one
-        if not company:
-            company, created = Company.objects.get_or_create(
-                name='Demo Company',
-                defaults={
-                    'address': '123 Business Street',
-                    'phone': '+1-555-0123',
-                    'email': 'info@demo.com',
-                }
-            )
-    except Exception as e:
-        # If there's any database issue, continue without company
-        company = None
-
     try:
         # Safely get current date
         if hasattr(request, 'user') and request.user.is_authenticated:
@@ -34,6 +13,6 @@ def company_context(request):
         current_date = None
 
     return {
-        'company': company,
+        'company': getattr(request, 'tenant', None),
         'current_date': current_date,
     }
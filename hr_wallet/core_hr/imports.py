@@ -0,0 +1,251 @@
+"""
+Attendance import from CSV/XLSX timesheets and time-clock exports.
+
+Rows are streamed from the file (CSV through the csv module, XLSX through
+openpyxl in read-only mode when it is installed), matched to employees with
+one prefetched {employee_id: employee} dict, and upserted into Attendance and
+WorkHours in chunks with INSERT ... ON CONFLICT DO UPDATE. Rollups for the
+imported range are rebuilt once at the end with grouped queries.
+
+Recognised columns (case-insensitive, see COLUMNS): employee_id and date are
+required; clock_in, clock_out, break_minutes and status are optional.
+"""
+import csv
+import io
+from functools import lru_cache
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from .attendance import total_hours_for
+from .models import Attendance, Employee, WorkHours
+from .rollups import rebuild_rollups
+from .shifts import CompanyShiftRules
+from .stats import bump_company_stats_version, bump_employee_stats_version
+
+COLUMNS = {
+    'employee_id': ('employee_id', 'employee id', 'emp id', 'emp_id', 'badge', 'user id'),
+    'date': ('date', 'day', 'work date'),
+    'clock_in': ('clock_in', 'clock in', 'time in', 'in'),
+    'clock_out': ('clock_out', 'clock out', 'time out', 'out'),
+    'break_minutes': ('break_minutes', 'break minutes', 'break'),
+    'status': ('status',),
+}
+STATUSES = ('present', 'absent', 'late', 'half_day')
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%I:%M %p')
+CHUNK_SIZE = 5000
+ZERO = Decimal('0.00')
+
+ImportResult = namedtuple('ImportResult', 'rows imported errors date_from date_to')
+
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be read (unknown format, missing columns)"""
+
+
+def _header_map(header):
+    """{field: column index} for a header row"""
+    names = [str(name or '').strip().lower() for name in header]
+    found = {}
+    for field, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                found[field] = names.index(alias)
+                break
+    missing = [field for field in ('employee_id', 'date') if field not in found]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+    return found
+
+
+def read_rows(fileobj, filename):
+    """(header, rows) for a CSV or XLSX file; rows yields (line number, values) for each non-blank data row"""
+    if filename.lower().endswith('.xlsx'):
+        rows = _xlsx_rows(fileobj)
+    elif filename.lower().endswith('.csv'):
+        if isinstance(fileobj.read(0), bytes):
+            fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        rows = csv.reader(fileobj)
+    else:
+        raise ImportFileError('Only .csv and .xlsx files can be imported')
+    header = next(rows, None)
+    if header is None:
+        raise ImportFileError('The file is empty')
+    return list(header), _data_rows(rows)
+
+
+def _data_rows(rows):
+    for line, values in enumerate(rows, start=2):
+        if any(value not in (None, '') for value in values):
+            yield line, values
+
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError('openpyxl is not installed; export the sheet as CSV')
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _hours(duration):
+    return Decimal(duration.total_seconds() / 3600).quantize(Decimal('0.01'))
+
+
+# Timesheets repeat the same dates and times on most rows, so parsing is memoized
+@lru_cache(maxsize=65536)
+def _parse_date(value, date_format):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), date_format).date()
+    except ValueError:
+        raise ValueError(f'date {value!r} does not match {date_format}')
+
+
+@lru_cache(maxsize=65536)
+def _parse_time(value, name):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    value = str(value).strip()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            pass
+    raise ValueError(f'{name} {value!r} is not a time')
+
+
+@lru_cache(maxsize=65536)
+def _day_hours(clock_in, clock_out, break_minutes, scheduled_minutes):
+    """(break_duration, worked hours, regular hours, break hours) for one row's times"""
+    try:
+        break_duration = timedelta(minutes=float(break_minutes)) if break_minutes not in (None, '') else None
+    except ValueError:
+        raise ValueError(f'break_minutes {break_minutes!r} is not a number')
+    # The hours only depend on the times, not on the day
+    hours = total_hours_for(date.min, clock_in, clock_out, break_duration)
+    if hours is not None and hours < 0:
+        raise ValueError('break is longer than the time worked')
+    hours = hours or ZERO
+    regular = min(hours, _hours(timedelta(minutes=scheduled_minutes)))
+    return break_duration, hours, regular, _hours(break_duration) if break_duration else ZERO
+
+
+class AttendanceImporter:
+    """Import timesheet rows for one company.
+
+    run() takes the header and rows of read_rows() and returns an ImportResult; errors
+    are (line, message, values) for rows that were skipped. With dry_run
+    every row is parsed and checked but nothing is written.
+    """
+
+    def __init__(self, company_id, dry_run=False, chunk_size=CHUNK_SIZE, date_format='%Y-%m-%d'):
+        self.company_id = company_id
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.date_format = date_format
+        self.rules = CompanyShiftRules(company_id)
+        self.employees = {
+            employee_id.strip().lower(): (pk, department_id)
+            for employee_id, pk, department_id in Employee.objects.filter(company_id=company_id).values_list(
+                'employee_id', 'pk', 'department_id',
+            )
+        }
+
+    def _parse(self, columns, values):
+        def cell(field):
+            index = columns.get(field)
+            return values[index] if index is not None and index < len(values) else None
+
+        employee = self.employees.get(str(cell('employee_id') or '').strip().lower())
+        if employee is None:
+            raise ValueError(f"unknown employee_id {cell('employee_id')!r}")
+        employee_pk, department_id = employee
+        day = _parse_date(cell('date'), self.date_format)
+        clock_in = _parse_time(cell('clock_in'), 'clock_in')
+        clock_out = _parse_time(cell('clock_out'), 'clock_out')
+        status = str(cell('status') or '').strip().lower().replace(' ', '_')
+        if status and status not in STATUSES:
+            raise ValueError(f'status {status!r} is not one of {", ".join(STATUSES)}')
+        status = status or ('present' if clock_in or clock_out else 'absent')
+        scheduled = self.rules.for_department(department_id).scheduled_minutes
+        break_duration, hours, regular, break_hours = _day_hours(clock_in, clock_out, cell('break_minutes'), scheduled)
+        attendance = Attendance(
+            employee_id=employee_pk, company_id=self.company_id, date=day, clock_in=clock_in, clock_out=clock_out,
+            break_duration=break_duration, total_hours=hours if clock_in and clock_out else None, status=status,
+            # Timesheet hours win over punches stored for the same day (see core_hr.shifts.process_days)
+            manually_corrected=True,
+        )
+        work_hours = WorkHours(
+            employee_id=employee_pk, company_id=self.company_id, date=day, regular_hours=regular,
+            overtime_hours=hours - regular, total_hours=hours, break_hours=break_hours,
+        )
+        return attendance, work_hours
+
+    def run(self, header, rows):
+        columns = _header_map(header)
+        seen, errors = 0, []
+        chunk, imported = {}, 0
+        employee_ids, date_from, date_to = set(), None, None
+        for line, values in rows:
+            seen += 1
+            try:
+                attendance, work_hours = self._parse(columns, values)
+            except ValueError as e:
+                errors.append((line, str(e), values))
+                continue
+            # A later row for the same employee-day replaces an earlier one
+            chunk[(attendance.employee_id, attendance.date)] = (attendance, work_hours)
+            employee_ids.add(attendance.employee_id)
+            date_from = min(date_from or attendance.date, attendance.date)
+            date_to = max(date_to or attendance.date, attendance.date)
+            if len(chunk) >= self.chunk_size:
+                imported += self._write(chunk)
+                chunk = {}
+        imported += self._write(chunk)
+
+        if imported and not self.dry_run:
+            # Bulk upserts skip the model signals
+            rebuild_rollups(self.company_id, date_from, date_to)
+            bump_company_stats_version(self.company_id)
+            for employee_id in employee_ids:
+                bump_employee_stats_version(employee_id)
+        return ImportResult(seen, imported, errors, date_from, date_to)
+
+    def _write(self, chunk):
+        if self.dry_run or not chunk:
+            return len(chunk)
+        rows = list(chunk.values())
+        with transaction.atomic():
+            Attendance.objects.bulk_create(
+                [attendance for attendance, _ in rows], batch_size=1000, update_conflicts=True,
+                unique_fields=['employee', 'date'],
+                update_fields=['clock_in', 'clock_out', 'break_duration', 'total_hours', 'status', 'manually_corrected'],
+            )
+            WorkHours.objects.bulk_create(
+                [work_hours for _, work_hours in rows], batch_size=1000, update_conflicts=True,
+                unique_fields=['employee', 'date'],
+                update_fields=['regular_hours', 'overtime_hours', 'break_hours', 'total_hours'],
+            )
+        return len(rows)
+
+
+def write_errors(fileobj, header, errors):
+    """Write skipped rows as CSV: their line number, the reason and the original values"""
+    writer = csv.writer(fileobj)
+    writer.writerow(['line', 'error'] + list(header or []))
+    for line, message, values in errors:
+        writer.writerow([line, message] + ['' if value is None else value for value in values])
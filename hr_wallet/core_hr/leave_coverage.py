@@ -0,0 +1,59 @@
+"""
+Team leave coverage from the LeaveDay index.
+
+Each pending or approved leave request holds one LeaveDay row per calendar
+day (unique per employee and day), so the people off on a range of days is
+one index range scan on (company, date) grouped by day and department,
+rather than an interval test against every request.
+"""
+from collections import defaultdict
+
+from django.db.models import Count
+
+from .models import ACTIVE_LEAVE_STATUSES, Employee, LeaveDay
+
+
+def coverage(company_id, start, end, department_ids=None, statuses=ACTIVE_LEAVE_STATUSES):
+    """{(date, department_id): people off} for the days from start to end that have anyone off"""
+    days = LeaveDay.objects.filter(company_id=company_id, date__gte=start, date__lte=end, status__in=statuses)
+    if department_ids is not None:
+        days = days.filter(employee__department_id__in=department_ids)
+    return {
+        (row['date'], row['employee__department_id']): row['off']
+        for row in days.values('date', 'employee__department_id').annotate(off=Count('pk')).order_by()
+    }
+
+
+def headcounts(company_id):
+    """{department_id: active employees} for a company"""
+    return dict(
+        Employee.objects.filter(company_id=company_id, is_active=True)
+        .values('department_id').annotate(n=Count('pk')).order_by().values_list('department_id', 'n')
+    )
+
+
+def peak_team_off(leaves):
+    """{leave pk: most colleagues from the same department off on any one day of the leave}.
+
+    leaves are LeaveRequest objects of one company; pending and approved leave both count.
+    """
+    leaves = [leave for leave in leaves if leave.start_date <= leave.end_date]
+    if not leaves:
+        return {}
+    departments = {leave.employee.department_id for leave in leaves}
+    off = coverage(
+        leaves[0].company_id, min(leave.start_date for leave in leaves), max(leave.end_date for leave in leaves),
+        department_ids=departments - {None},
+    )
+    by_department = defaultdict(list)
+    for (day, department_id), count in off.items():
+        by_department[department_id].append((day, count))
+    # The employee's own request holds each of its days, so one of the people off is them
+    return {
+        leave.pk: max(
+            (count - 1 for day, count in by_department.get(leave.employee.department_id, ())
+             if leave.start_date <= day <= leave.end_date),
+            default=0,
+        )
+        for leave in leaves
+    }
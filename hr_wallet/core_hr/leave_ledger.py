@@ -0,0 +1,172 @@
+"""
+Append-only leave ledger.
+
+Every change to a leave balance is a LeaveLedgerEntry: monthly accruals,
+approved leave (usage), cancellations that give the days back, year-end
+carry-over caps and manual adjustments. Nothing is updated in place, so two
+approvals can never overwrite each other and the history is the ledger.
+
+LeaveBalanceSnapshot rows (written after each monthly accrual run) hold the
+balance up to a date, so a balance as of any day is the latest snapshot
+before it plus the few entries since: those dated after the snapshot, and
+those posted after it but back-dated to before it (numbered above
+last_entry_id).
+"""
+import calendar
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+
+from .models import Employee, LeaveBalance, LeaveBalanceSnapshot, LeaveLedgerEntry
+
+# Leave types with a yearly allowance, accrued monthly from the LeaveBalance totals
+ACCRUED_TYPES = {
+    'annual': 'annual_leave_total',
+    'sick': 'sick_leave_total',
+    'personal': 'personal_leave_total',
+}
+ZERO = Decimal('0.00')
+CENTS = Decimal('0.01')
+
+
+def month_end(month):
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+def post_usage(leaves, user=None):
+    """Draw approved leave requests down from their balances (each request is posted once)"""
+    LeaveLedgerEntry.objects.bulk_create([
+        LeaveLedgerEntry(
+            employee_id=leave.employee_id, company_id=leave.company_id, leave_type=leave.leave_type, kind='usage',
+            date=leave.start_date, days=-Decimal(leave.days_requested), leave_request_id=leave.pk, created_by=user,
+        ) for leave in leaves
+    ], ignore_conflicts=True, batch_size=1000)
+
+
+def post_cancellation(leave, user=None):
+    """Give back exactly what a cancelled leave request's usage entry drew down (nothing if it was never posted)"""
+    usage = LeaveLedgerEntry.objects.filter(leave_request_id=leave.pk, kind='usage').values_list('leave_type', 'date', 'days').first()
+    if usage is None:
+        return
+    leave_type, posted_on, days = usage
+    LeaveLedgerEntry.objects.bulk_create([LeaveLedgerEntry(
+        employee_id=leave.employee_id, company_id=leave.company_id, leave_type=leave_type, kind='cancellation',
+        date=posted_on, days=-days, leave_request_id=leave.pk, created_by=user,
+    )], ignore_conflicts=True)
+
+
+def balances_as_of(employee_ids, day, leave_types=None):
+    """{(employee_id, leave_type): balance} on a day, from the latest snapshots plus the entries since"""
+    employee_ids = list(employee_ids)
+    snapshots = LeaveBalanceSnapshot.objects.filter(employee_id__in=employee_ids, as_of__lte=day)
+    if leave_types:
+        snapshots = snapshots.filter(leave_type__in=leave_types)
+    latest = {
+        (row['employee_id'], row['leave_type']): row['as_of'] for row in
+        snapshots.values('employee_id', 'leave_type').annotate(as_of=Max('as_of')).order_by()
+    }
+    base = {}
+    for snap in snapshots.filter(as_of__in=set(latest.values())):
+        if latest.get((snap.employee_id, snap.leave_type)) == snap.as_of:
+            base[(snap.employee_id, snap.leave_type)] = snap
+
+    entries = LeaveLedgerEntry.objects.filter(employee_id__in=employee_ids, date__lte=day)
+    if leave_types:
+        entries = entries.filter(leave_type__in=leave_types)
+    if base:
+        # Employees without any snapshot are summed in full
+        covered = {employee_id for employee_id, _ in base}
+        since = min(snap.as_of for snap in base.values())
+        watermark = min(snap.last_entry_id for snap in base.values())
+        entries = entries.filter(~Q(employee_id__in=covered) | Q(date__gt=since) | Q(pk__gt=watermark))
+
+    balances = defaultdict(lambda: ZERO)
+    for key, snap in base.items():
+        balances[key] = snap.balance
+    for pk, employee_id, leave_type, entry_date, days in entries.values_list('pk', 'employee_id', 'leave_type', 'date', 'days'):
+        snap = base.get((employee_id, leave_type))
+        if snap is None or entry_date > snap.as_of or pk > snap.last_entry_id:
+            balances[(employee_id, leave_type)] += days
+    return dict(balances)
+
+
+def balance_as_of(employee_id, leave_type, day):
+    return balances_as_of([employee_id], day, [leave_type]).get((employee_id, leave_type), ZERO)
+
+
+def post_monthly_accruals(month, company_id=None):
+    """Accrue one twelfth of each active employee's yearly allowances on the last day of a month.
+
+    Employees without a LeaveBalance row accrue the default allowances. Rerunning
+    for the same month adds nothing. Returns the number of entries added.
+    """
+    posted_on = month_end(month)
+    employees = Employee.objects.filter(is_active=True, hire_date__lte=posted_on)
+    if company_id:
+        employees = employees.filter(company_id=company_id)
+    defaults = {leave_type: LeaveBalance._meta.get_field(field).default for leave_type, field in ACCRUED_TYPES.items()}
+    columns = [f'leavebalance__{field}' for field in ACCRUED_TYPES.values()]
+    entries = []
+    for pk, employee_company_id, *totals in employees.values_list('pk', 'company_id', *columns):
+        for leave_type, total in zip(ACCRUED_TYPES, totals):
+            total = defaults[leave_type] if total is None else total
+            if total:
+                entries.append(LeaveLedgerEntry(
+                    employee_id=pk, company_id=employee_company_id, leave_type=leave_type, kind='accrual',
+                    date=posted_on, days=(Decimal(total) / 12).quantize(CENTS),
+                ))
+    existing = LeaveLedgerEntry.objects.filter(kind='accrual', date=posted_on)
+    if company_id:
+        existing = existing.filter(company_id=company_id)
+    before = existing.count()
+    LeaveLedgerEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=1000)
+    return existing.count() - before
+
+
+def post_carry_over(year, max_days, company_id=None, leave_types=('annual',)):
+    """Cap balances left at the end of a year at max_days, forfeiting the rest on 1 January.
+
+    Returns the number of entries added; rerunning for the same year adds nothing.
+    """
+    employees = Employee.objects.filter(is_active=True)
+    if company_id:
+        employees = employees.filter(company_id=company_id)
+    companies = dict(employees.values_list('pk', 'company_id'))
+    balances = balances_as_of(companies, date(year, 12, 31), leave_types)
+    entries = [
+        LeaveLedgerEntry(
+            employee_id=employee_id, company_id=companies[employee_id], leave_type=leave_type, kind='carry_over',
+            date=date(year + 1, 1, 1), days=Decimal(max_days) - balance, note=f'Carry-over capped at {max_days} days',
+        )
+        for (employee_id, leave_type), balance in balances.items() if balance > max_days
+    ]
+    existing = LeaveLedgerEntry.objects.filter(kind='carry_over', date=date(year + 1, 1, 1))
+    before = existing.count()
+    LeaveLedgerEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=1000)
+    return existing.count() - before
+
+
+def take_snapshots(as_of, company_id=None):
+    """Write the balance of every employee and leave type up to as_of with one grouped query"""
+    entries = LeaveLedgerEntry.objects.all()
+    if company_id:
+        entries = entries.filter(company_id=company_id)
+    with transaction.atomic():
+        watermark = entries.aggregate(last=Max('pk'))['last'] or 0
+        rows = entries.filter(date__lte=as_of, pk__lte=watermark).values(
+            'employee_id', 'company_id', 'leave_type',
+        ).annotate(balance=Sum('days')).order_by()
+        snapshots = [
+            LeaveBalanceSnapshot(
+                employee_id=row['employee_id'], company_id=row['company_id'], leave_type=row['leave_type'],
+                as_of=as_of, balance=row['balance'], last_entry_id=watermark,
+            ) for row in rows
+        ]
+        LeaveBalanceSnapshot.objects.bulk_create(
+            snapshots, batch_size=1000, update_conflicts=True,
+            unique_fields=['employee', 'leave_type', 'as_of'], update_fields=['balance', 'last_entry_id'],
+        )
+    return len(snapshots)
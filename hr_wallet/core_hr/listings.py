@@ -0,0 +1,107 @@
+"""
+Department and company listings with their headcounts.
+
+Each listing is one grouped query: active headcount and salary totals are
+aggregated over the employee join, the manager's name comes from a join on
+the user, and (for companies) the department count from a correlated
+subquery, instead of a COUNT per row from the templates. The rows are plain
+dicts cached per company under a listing version that core_hr.signals bumps
+when an employee, department or company changes. A manager renaming
+themselves shows up when the entry expires.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Company, Department
+
+LISTING_CACHE_TIMEOUT = getattr(settings, 'LISTING_CACHE_TIMEOUT', 300)
+ALL = 'all'
+
+
+def _version_key(company_id):
+    return f'listings:version:{company_id or ALL}'
+
+
+def get_listing_version(company_id=None):
+    version = cache.get(_version_key(company_id))
+    if version is None:
+        cache.add(_version_key(company_id), 1, None)
+        version = cache.get(_version_key(company_id), 1)
+    return version
+
+
+def bump_listing_version(company_id=None):
+    """Invalidate the cached listings of a company, and the cross-company ones that include it"""
+    for key in {_version_key(company_id), _version_key(None)}:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 2, None)
+
+
+def _cached(name, company_id, compute):
+    key = f'listings:{name}:{company_id or ALL}:{get_listing_version(company_id)}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = compute()
+        cache.set(key, rows, LISTING_CACHE_TIMEOUT)
+    return rows
+
+
+def _manager_name(row):
+    first, last, username = row.pop('manager__first_name'), row.pop('manager__last_name'), row.pop('manager__username')
+    if not row['manager']:
+        return ''
+    return f"{first or ''} {last or ''}".strip() or username
+
+
+def department_listing(company_id=None):
+    """Departments of a company (of every company when None), ordered by name, with active headcount,
+    manager name and salary total"""
+    def compute():
+        departments = Department.objects.all()
+        if company_id:
+            departments = departments.filter(company_id=company_id)
+        active = Q(employees__is_active=True)
+        rows = list(departments.annotate(
+            employee_count=Count('employees', filter=active),
+            salary_total=Sum('employees__salary', filter=active),
+        ).values(
+            'id', 'name', 'description', 'parent', 'is_active', 'created_at', 'company', 'company__name',
+            'manager', 'manager__first_name', 'manager__last_name', 'manager__username',
+            'employee_count', 'salary_total',
+        ).order_by('name', 'pk'))
+        for row in rows:
+            row['manager_name'] = _manager_name(row)
+            row['company_name'] = row.pop('company__name')
+            row['salary_total'] = row['salary_total'] or 0
+        return rows
+
+    return _cached('departments', company_id, compute)
+
+
+def company_listing(company_id=None, active_only=False):
+    """Companies (one when company_id is given), ordered by name, with active headcount, department
+    count and salary total"""
+    def compute():
+        companies = Company.objects.all()
+        if company_id:
+            companies = companies.filter(pk=company_id)
+        active = Q(employees__is_active=True)
+        department_count = Department.objects.filter(company=OuterRef('pk')).values('company').annotate(n=Count('pk')).values('n')
+        rows = list(companies.annotate(
+            employee_count=Count('employees', filter=active),
+            salary_total=Sum('employees__salary', filter=active),
+            department_count=Coalesce(Subquery(department_count, output_field=IntegerField()), Value(0)),
+        ).values(
+            'id', 'name', 'email', 'phone', 'is_active', 'max_employees', 'subscription_plan',
+            'employee_count', 'department_count', 'salary_total',
+        ).order_by('name', 'pk'))
+        for row in rows:
+            row['salary_total'] = row['salary_total'] or 0
+        return rows
+
+    rows = _cached('companies', company_id, compute)
+    return [row for row in rows if row['is_active']] if active_only else rows
@@ -0,0 +1,82 @@
+"""
+Live attendance board.
+
+Attendance writes publish a compact delta to the company's attendance topic
+(notifications.realtime) once the transaction commits. The HR attendance and
+biometric pages load one snapshot (attendance_snapshot) and then apply deltas
+instead of reloading the page.
+
+Delta keys: e = employee pk, d = date, in/out = 'HH:MM:SS' or null,
+h = total hours, s = status, src = 'biometric' or 'manual'.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from notifications import realtime
+
+from .models import Employee, Attendance, BiometricEvent
+
+
+def _time(value):
+    return value.strftime('%H:%M:%S') if value else None
+
+
+def attendance_delta(attendance, source='manual'):
+    return {
+        'e': attendance.employee_id,
+        'd': attendance.date.isoformat(),
+        'in': _time(attendance.clock_in),
+        'out': _time(attendance.clock_out),
+        'h': str(attendance.total_hours) if attendance.total_hours is not None else None,
+        's': attendance.status,
+        'src': source,
+    }
+
+
+def punch_delta(event):
+    return {
+        'id': event.pk,
+        'device': event.device.name if event.device_id else None,
+        'device_user_id': event.device_user_id,
+        'event_type': event.event_type,
+        'timestamp': event.timestamp.isoformat(),
+        'processed': event.processed,
+    }
+
+
+def publish_attendance(attendance, source='manual'):
+    """Push an attendance row to the company's live board after commit"""
+    message = attendance_delta(attendance, source)
+    company_id = attendance.company_id
+    transaction.on_commit(lambda: realtime.publish(realtime.ATTENDANCE, 'attendance', message, company_id=company_id))
+
+
+def publish_punch(event):
+    """Push a newly received biometric event to the company's live board after commit"""
+    message = punch_delta(event)
+    company_id = event.company_id
+    transaction.on_commit(lambda: realtime.publish(realtime.ATTENDANCE, 'punch', message, company_id=company_id))
+
+
+def attendance_snapshot(company_id, day):
+    """Active employees and their attendance for one day, in the same compact form as the deltas"""
+    employees = Employee.objects.filter(company_id=company_id, is_active=True).values_list(
+        'pk', 'employee_id', 'user__first_name', 'user__last_name', 'department__name'
+    ).order_by('employee_id')
+    records = Attendance.objects.filter(company_id=company_id, date=day).annotate(
+        biometric=Exists(BiometricEvent.objects.filter(attendance=OuterRef('pk')))
+    )
+
+    attendance = [attendance_delta(a, 'biometric' if a.biometric else 'manual') for a in records]
+    summary = {'present': 0, 'late': 0, 'half_day': 0, 'absent': 0}
+    for row in attendance:
+        summary[row['s']] = summary.get(row['s'], 0) + 1
+    return {
+        'date': day.isoformat(),
+        'employees': [
+            {'e': pk, 'id': employee_id, 'name': f'{first} {last}'.strip(), 'dept': dept}
+            for pk, employee_id, first, last, dept in employees
+        ],
+        'attendance': attendance,
+        'summary': summary,
+    }
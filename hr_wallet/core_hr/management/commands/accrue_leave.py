@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core_hr.leave_ledger import month_end, post_monthly_accruals, take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Post the monthly leave accruals to the leave ledger and snapshot the balances at the end of the month'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=str, help='Month to accrue (YYYY-MM, default: the current month)')
+        parser.add_argument('--company-id', type=int, help='Only accrue leave for this company')
+        parser.add_argument('--no-snapshot', action='store_true', help='Post the accruals without writing balance snapshots')
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format')
+        else:
+            month = timezone.now().date().replace(day=1)
+
+        posted = post_monthly_accruals(month, options['company_id'])
+        self.stdout.write(self.style.SUCCESS(f"Posted {posted} leave accruals for {month.strftime('%Y-%m')}"))
+        if not options['no_snapshot']:
+            snapshots = take_snapshots(month_end(month), options['company_id'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {snapshots} balance snapshots as of {month_end(month)}'))
@@ -0,0 +1,97 @@
+import os
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from core_hr.archive import iter_batches, write_jsonl_gz, next_month
+from core_hr.compact import decode_payload
+from core_hr.models import BiometricEvent, BiometricEventArchive
+
+ARCHIVE_FIELDS = ['pk', 'company_id', 'device_id', 'device_user_id', 'event_type', 'timestamp',
+                  'external_event_id', 'payload', 'processed', 'attendance_id', 'dedupe_key', 'created_at']
+
+
+class Command(BaseCommand):
+    help = ('Move processed biometric events older than the retention window into monthly '
+            'JSONL.gz files (one per company and month); restore with restore_biometric_events')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Keep this many days of events (defaults to BIOMETRIC_EVENT_RETENTION_DAYS)')
+        parser.add_argument('--company-id', type=int, help='Only archive this company')
+        parser.add_argument('--dir', type=str, help='Archive directory (defaults to BIOMETRIC_EVENT_ARCHIVE_DIR)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else getattr(settings, 'BIOMETRIC_EVENT_RETENTION_DAYS', 90)
+        # Whole days, so the horizon does not move with the time the command happens to run
+        cutoff = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=days), time.min))
+        archive_dir = options['dir'] or str(getattr(settings, 'BIOMETRIC_EVENT_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'biometric_events'))
+
+        # Unprocessed events stay until they are mapped to an employee
+        events = BiometricEvent.objects.filter(processed=True, timestamp__lt=cutoff)
+        if options['company_id']:
+            events = events.filter(company_id=options['company_id'])
+        buckets = (events.annotate(month=TruncMonth('timestamp'))
+                   .values_list('company_id', 'month').distinct().order_by('company_id', 'month'))
+
+        total = 0
+        for company_id, month in buckets:
+            month = month.date() if hasattr(month, 'date') else month
+            start = timezone.make_aware(datetime.combine(month, time.min))
+            end = min(cutoff, timezone.make_aware(datetime.combine(next_month(month), time.min)))
+            rows = events.filter(company_id=company_id, timestamp__gte=start, timestamp__lt=end)
+            if options['dry_run']:
+                count = rows.count()
+                self.stdout.write(f'Would archive {count} events for company {company_id}, {month:%Y-%m}')
+                total += count
+                continue
+            total += self._archive_bucket(rows, archive_dir, company_id, month, cutoff, options['batch_size'])
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} biometric events before {cutoff:%Y-%m-%d}'))
+
+    def _archive_bucket(self, rows, archive_dir, company_id, month, cutoff, batch_size):
+        batches = iter_batches(rows.values(*ARCHIVE_FIELDS), batch_size)
+        first = next(batches, None)
+        if first is None:
+            return 0
+        # Named after the first id so a re-run after a partial delete never overwrites an earlier file
+        path = os.path.join(archive_dir, str(company_id), f'{month:%Y-%m}-{first[0]["pk"]}.jsonl.gz')
+        archived_ids = []
+
+        def rows_to_write():
+            for batch in chain([first], batches):
+                for row in batch:
+                    # Files hold the decoded payload so they can be read without this code
+                    payload = row.pop('payload')
+                    row['raw_payload'] = decode_payload(payload) if payload else {}
+                    yield row
+                archived_ids.extend(row['pk'] for row in batch)
+
+        count = write_jsonl_gz(path, rows_to_write())
+        # Files for a month restored earlier are superseded: their rows are in the new file again
+        superseded = list(BiometricEventArchive.objects.filter(company_id=company_id, month=month, restored_at__isnull=False))
+        with transaction.atomic():
+            BiometricEventArchive.objects.create(
+                company_id=company_id, month=month, path=path, row_count=count, archived_before=cutoff,
+            )
+            BiometricEventArchive.objects.filter(pk__in=[a.pk for a in superseded]).delete()
+        BiometricEventArchive.invalidate_horizon(company_id)
+        for archive in superseded:
+            # A restored month re-archived from the same first id was just rewritten in place
+            if archive.path != path and os.path.exists(archive.path):
+                os.remove(archive.path)
+
+        # Only delete once the file is complete on disk and recorded in the manifest
+        for i in range(0, len(archived_ids), batch_size):
+            with transaction.atomic():
+                BiometricEvent.objects.filter(pk__in=archived_ids[i:i + batch_size]).delete()
+        self.stdout.write(f'Archived {count} events for company {company_id}, {month:%Y-%m} -> {path}')
+        return count
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+
+from core_hr.compact import dedupe_key, encode_payload
+
+# Mirrors of the BiometricEvent tables before and after the compact format, reduced to the columns that differ
+LEGACY_SCHEMA = """
+CREATE TABLE event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id INTEGER NOT NULL, device_id INTEGER, device_user_id VARCHAR(100) NOT NULL,
+    event_type VARCHAR(20) NOT NULL, timestamp DATETIME NOT NULL, processed BOOL NOT NULL,
+    raw_payload TEXT NOT NULL, dedupe_hash VARCHAR(64) NOT NULL UNIQUE
+);
+CREATE INDEX event_company_ts ON event (company_id, timestamp);
+CREATE INDEX event_company_user_ts ON event (company_id, device_user_id, timestamp);
+CREATE INDEX event_processed ON event (company_id, processed, timestamp);
+"""
+
+COMPACT_SCHEMA = """
+CREATE TABLE event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id INTEGER NOT NULL, device_id INTEGER, device_user_id VARCHAR(100) NOT NULL,
+    event_type VARCHAR(20) NOT NULL, timestamp DATETIME NOT NULL, processed BOOL NOT NULL,
+    payload BLOB, dedupe_key BIGINT NOT NULL,
+    UNIQUE (company_id, dedupe_key)
+);
+CREATE INDEX event_company_ts ON event (company_id, timestamp);
+CREATE INDEX event_company_user_ts ON event (company_id, device_user_id, timestamp);
+CREATE INDEX event_processed ON event (company_id, processed, timestamp);
+"""
+
+
+class Command(BaseCommand):
+    help = ('Compare on-disk size and insert rate of the legacy (hex hash + inline JSON) and compact '
+            '(64-bit key + compressed payload) biometric event layouts, using scratch SQLite files')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic punches to insert (default: 100000)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--companies', type=int, default=5)
+
+    def handle(self, *args, **options):
+        punches = list(self._punches(options['rows'], options['companies']))
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, schema, insert in (('legacy', LEGACY_SCHEMA, self._insert_legacy),
+                                          ('compact', COMPACT_SCHEMA, self._insert_compact)):
+                path = os.path.join(tmp, f'{label}.sqlite3')
+                conn = sqlite3.connect(path)
+                conn.executescript(schema)
+                started = time.perf_counter()
+                for i in range(0, len(punches), options['batch_size']):
+                    with conn:
+                        insert(conn, punches[i:i + options['batch_size']])
+                elapsed = time.perf_counter() - started
+                conn.execute('VACUUM')
+                sizes = self._object_sizes(conn)
+                conn.close()
+                results[label] = (elapsed, os.path.getsize(path), sizes)
+
+        for label, (elapsed, file_size, sizes) in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{label} layout'))
+            self.stdout.write(f'  inserts: {len(punches) / elapsed:,.0f} rows/s ({elapsed:.2f}s)')
+            self.stdout.write(f'  file size: {file_size / 1024:,.0f} KiB ({file_size / len(punches):.1f} bytes/row)')
+            for name, size in sizes:
+                self.stdout.write(f'    {name:<28} {size / 1024:>10,.0f} KiB')
+        legacy, compact = results['legacy'], results['compact']
+        self.stdout.write(self.style.SUCCESS(
+            f'Compact layout: {compact[1] / legacy[1]:.0%} of the legacy size, '
+            f'{legacy[0] / compact[0]:.2f}x the legacy insert rate'
+        ))
+
+    def _punches(self, rows, companies):
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        for i in range(rows):
+            company_id = i % companies + 1
+            device_id = i % 3 + 1
+            user_id = str(1000 + i % 500)
+            ts = start + timedelta(seconds=37 * i)
+            event_type = 'checkin' if i % 2 == 0 else 'checkout'
+            if i % 4 == 0:
+                # Pushed by the device: the request body
+                payload = {'device_user_id': user_id, 'event_type': event_type,
+                           'timestamp': ts.strftime('%Y-%m-%dT%H:%M:%SZ'), 'external_event_id': f'evt-{i}'}
+            else:
+                # Polled from the device: str() of the pyzk record
+                payload = {'source': 'sync', 'raw': f'<Attendance>: {user_id} : {ts:%Y-%m-%d %H:%M:%S} ({i % 2}, 0)'}
+            yield company_id, device_id, user_id, event_type, ts, payload
+
+    def _insert_legacy(self, conn, punches):
+        conn.executemany(
+            'INSERT OR IGNORE INTO event (company_id, device_id, device_user_id, event_type, timestamp, processed, '
+            'raw_payload, dedupe_hash) VALUES (?, ?, ?, ?, ?, 1, ?, ?)',
+            [(company_id, device_id, user_id, event_type, ts.isoformat(), json.dumps(payload),
+              hashlib.sha256(f'{device_id}|{company_id}|{user_id}|{int(ts.timestamp())}|{event_type}'.encode()).hexdigest())
+             for company_id, device_id, user_id, event_type, ts, payload in punches]
+        )
+
+    def _insert_compact(self, conn, punches):
+        conn.executemany(
+            'INSERT OR IGNORE INTO event (company_id, device_id, device_user_id, event_type, timestamp, processed, '
+            'payload, dedupe_key) VALUES (?, ?, ?, ?, ?, 1, ?, ?)',
+            [(company_id, device_id, user_id, event_type, ts.isoformat(), encode_payload(payload),
+              dedupe_key(device_id, company_id, user_id, ts, event_type))
+             for company_id, device_id, user_id, event_type, ts, payload in punches]
+        )
+
+    def _object_sizes(self, conn):
+        try:
+            return conn.execute(
+                'SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY SUM(pgsize) DESC'
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # SQLite built without the dbstat table: only the file size is reported
+            return []
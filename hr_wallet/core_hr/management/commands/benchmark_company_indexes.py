@@ -0,0 +1,87 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core_hr.models import Company, Employee, Attendance, LeaveRequest, Payroll, WorkHours
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Compare query plans and latency of company-scoped queries through the employee join '
+            'versus the denormalized company column')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company-id', type=int, help='Company to query (defaults to the first company)')
+        parser.add_argument('--repeat', type=int, default=50, help='Executions per query (default: 50)')
+        parser.add_argument('--seed-days', type=int, default=0,
+                            help='Insert this many days of synthetic attendance/leave rows per employee '
+                                 'inside a transaction that is rolled back afterwards')
+
+    def handle(self, *args, **options):
+        company = (Company.objects.filter(pk=options['company_id']).first() if options['company_id']
+                   else Company.objects.order_by('pk').first())
+        if company is None:
+            raise CommandError('No company found')
+
+        try:
+            with transaction.atomic():
+                if options['seed_days']:
+                    self._seed(company, options['seed_days'])
+                self._run(company, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, company, days):
+        employees = list(Employee.objects.filter(company=company).values_list('pk', flat=True))
+        if not employees:
+            raise CommandError(f'Company {company.pk} has no employees to seed rows for')
+        start = date.today() - timedelta(days=days + 3650)
+        statuses = ['present', 'present', 'present', 'late', 'absent']
+        # bulk_create skips save(), so company is set explicitly
+        Attendance.objects.bulk_create([
+            Attendance(employee_id=emp, company=company, date=start + timedelta(days=i), status=statuses[i % len(statuses)])
+            for emp in employees for i in range(days)
+        ], batch_size=2000)
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee_id=emp, company=company, leave_type='annual', start_date=start + timedelta(days=i),
+                         end_date=start + timedelta(days=i), days_requested=1, reason='benchmark',
+                         status='pending' if i % 10 == 0 else 'approved')
+            for emp in employees for i in range(0, days, 7)
+        ], batch_size=2000)
+        self.stdout.write(f'Seeded {len(employees) * days} attendance rows for {len(employees)} employees')
+
+    def _run(self, company, repeat):
+        today = date.today()
+        cases = [
+            ('Attendance by day and status',
+             Attendance.objects.filter(employee__company=company, date=today, status__in=['present', 'late']),
+             Attendance.objects.filter(company=company, date=today, status__in=['present', 'late'])),
+            ('Pending leave requests, newest first',
+             LeaveRequest.objects.filter(employee__company=company, status='pending').order_by('-created_at')[:50],
+             LeaveRequest.objects.filter(company=company, status='pending').order_by('-created_at')[:50]),
+            ('Payroll for a period',
+             Payroll.objects.filter(employee__company=company, pay_period_end__gte=today.replace(day=1)),
+             Payroll.objects.filter(company=company, pay_period_end__gte=today.replace(day=1))),
+            ('Work hours for a month',
+             WorkHours.objects.filter(employee__company=company, date__gte=today.replace(day=1)),
+             WorkHours.objects.filter(company=company, date__gte=today.replace(day=1))),
+        ]
+        for title, joined, direct in cases:
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            for label, qs in (('employee join', joined), ('company column', direct)):
+                self.stdout.write(f'  [{label}] plan:')
+                for line in qs.explain().splitlines():
+                    self.stdout.write(f'    {line}')
+                self.stdout.write(f'  [{label}] {self._time(qs, repeat):.3f} ms/query over {repeat} runs')
+
+    def _time(self, qs, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(qs.all())
+        return (time.perf_counter() - start) * 1000 / repeat
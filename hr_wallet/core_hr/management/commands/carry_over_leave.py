@@ -0,0 +1,23 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core_hr.leave_ledger import post_carry_over
+
+
+class Command(BaseCommand):
+    help = 'Cap the leave balances carried into the next year, forfeiting the excess on 1 January'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Year that is closing (default: last year)')
+        parser.add_argument('--max-days', type=Decimal, default=Decimal('5'), help='Days that may be carried over (default: 5)')
+        parser.add_argument('--leave-type', action='append', dest='leave_types', help='Leave type to cap (repeatable, default: annual)')
+        parser.add_argument('--company-id', type=int, help='Only carry over leave for this company')
+
+    def handle(self, *args, **options):
+        if options['max_days'] < 0:
+            raise CommandError('--max-days must not be negative')
+        year = options['year'] or timezone.now().year - 1
+        posted = post_carry_over(year, options['max_days'], options['company_id'], tuple(options['leave_types'] or ('annual',)))
+        self.stdout.write(self.style.SUCCESS(f'Posted {posted} carry-over entries for {year}'))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_hr.imports import CHUNK_SIZE, AttendanceImporter, ImportFileError, read_rows, write_errors
+from core_hr.models import Company
+
+
+class Command(BaseCommand):
+    help = ('Import attendance from a CSV or XLSX timesheet (employee_id, date, clock_in, clock_out, '
+            'break_minutes, status); existing rows for the same employee-day are overwritten')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV or XLSX file to import')
+        parser.add_argument('--company-id', type=int, required=True)
+        parser.add_argument('--date-format', type=str, default='%Y-%m-%d', help='strptime format of the date column (default: %%Y-%%m-%%d)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help=f'Rows written per transaction (default: {CHUNK_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Check every row without writing anything')
+        parser.add_argument('--errors', type=str, help='Write the skipped rows and their errors to this CSV file')
+
+    def handle(self, *args, **options):
+        if not Company.objects.filter(pk=options['company_id']).exists():
+            raise CommandError(f"Company {options['company_id']} not found")
+        importer = AttendanceImporter(
+            options['company_id'], dry_run=options['dry_run'], chunk_size=options['chunk_size'], date_format=options['date_format'],
+        )
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as f:
+                header, rows = read_rows(f, options['path'])
+                result = importer.run(header, rows)
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if result.errors:
+            for line, message, _ in result.errors[:10]:
+                self.stdout.write(self.style.WARNING(f'  line {line}: {message}'))
+            if options['errors']:
+                with open(options['errors'], 'w', newline='', encoding='utf-8') as f:
+                    write_errors(f, header, result.errors)
+                self.stdout.write(f"Skipped rows written to {options['errors']}")
+        verb = 'Checked' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.imported} employee-days from {result.rows} rows in {elapsed:.1f}s '
+            f'({result.rows / max(elapsed, 1e-9):,.0f} rows/s), {len(result.errors)} skipped'
+        ))
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from core_hr.models import BiometricDevice
+from core_hr.shifts import process_days
 from profile_api.views import _process_event  # reuse logic
 from datetime import datetime
 import logging
@@ -59,6 +60,7 @@ class Command(BaseCommand):
                         continue
                     # Use last_pull to limit processing window
                     last_pull = d.last_pull or (timezone.now() - timezone.timedelta(minutes=options['since_minutes']))
+                    days = set()
                     for r in records:
                         # r.user_id, r.timestamp, r.status (0=in, 1=out on some firmwares)
                         ts = r.timestamp
@@ -67,8 +69,12 @@ class Command(BaseCommand):
                         if ts < last_pull:
                             continue
                         event_type = 'checkin' if getattr(r, 'punch', getattr(r, 'status', 0)) in (0, 4) else 'checkout'
-                        _process_event(d.company, d, str(r.user_id), event_type, ts, raw_payload={'source': 'poll', 'raw': str(r)})
+                        ev, created = _process_event(d.company, d, str(r.user_id), event_type, ts, raw_payload={'source': 'poll', 'raw': str(r)}, reprocess=False)
+                        if created and ev.attendance_id:
+                            days.add(ev.attendance.date)
                         count += 1
+                    # Late punches from a device that was offline are paired once per shift day
+                    process_days(d.company_id, days)
                     d.last_pull = timezone.now()
                     d.save(update_fields=['last_pull'])
                 finally:
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db import IntegrityError
 from django.utils import timezone
 from datetime import datetime, timedelta, date, time
 from decimal import Decimal
@@ -237,16 +238,20 @@ class Command(BaseCommand):
                     'Child care',
                 ]
                 
-                LeaveRequest.objects.get_or_create(
-                    employee=employee,
-                    start_date=start_date,
-                    end_date=end_date,
-                    defaults={
-                        'leave_type': leave_type,
-                        'days_requested': days_requested,
-                        'reason': random.choice(reasons),
-                        'status': status,
-                    }
-                )
+                try:
+                    LeaveRequest.objects.get_or_create(
+                        employee=employee,
+                        start_date=start_date,
+                        end_date=end_date,
+                        defaults={
+                            'leave_type': leave_type,
+                            'days_requested': days_requested,
+                            'reason': random.choice(reasons),
+                            'status': status,
+                        }
+                    )
+                except IntegrityError:
+                    # Overlaps one of the employee's earlier random requests
+                    continue
         
         self.stdout.write(f'  Created leave requests for {employees.count()} employees')
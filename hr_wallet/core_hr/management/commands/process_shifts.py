@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core_hr.models import BiometricEvent
+from core_hr.shifts import process_days
+
+
+class Command(BaseCommand):
+    help = ('Re-pair biometric punches into work sessions and rewrite Attendance and WorkHours '
+            'for a date range, or only for the days that received punches recently')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company-id', type=int, help='Only process this company')
+        parser.add_argument('--from', dest='date_from', type=str, help='First shift day (YYYY-MM-DD, default: yesterday)')
+        parser.add_argument('--to', dest='date_to', type=str, help='Last shift day (YYYY-MM-DD, default: today)')
+        parser.add_argument('--changed-since-minutes', type=int,
+                            help='Only days with punches stored in the last N minutes (late or offline-device punches)')
+        parser.add_argument('--chunk-days', type=int, default=7, help='Shift days processed per batch (default: 7)')
+
+    def _parse(self, value, name):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'--{name} must be in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        date_from = self._parse(options['date_from'], 'from') or today - timedelta(days=1)
+        date_to = self._parse(options['date_to'], 'to') or today
+        if date_from > date_to:
+            raise CommandError('--from must not be after --to')
+
+        events = BiometricEvent.objects.filter(processed=True, attendance__isnull=False)
+        if options['company_id']:
+            events = events.filter(company_id=options['company_id'])
+        if options['changed_since_minutes'] is not None:
+            since = timezone.now() - timedelta(minutes=options['changed_since_minutes'])
+            # A punch can belong to the shift day before its calendar date (overnight shifts)
+            pending = {}
+            for company_id, day in events.filter(created_at__gte=since).values_list('company_id', 'attendance__date').distinct():
+                pending.setdefault(company_id, set()).update({day, day - timedelta(days=1)})
+            pending = {cid: {d for d in days if date_from <= d <= date_to} for cid, days in pending.items()}
+        else:
+            pending = {
+                company_id: {date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)}
+                for company_id in events.filter(
+                    timestamp__gte=timezone.make_aware(datetime.combine(date_from - timedelta(days=1), datetime.min.time())),
+                    timestamp__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=2), datetime.min.time())),
+                ).values_list('company_id', flat=True).distinct()
+            }
+
+        total = 0
+        for company_id, days in sorted(pending.items()):
+            days = sorted(days)
+            for i in range(0, len(days), options['chunk_days']):
+                total += len(process_days(company_id, days[i:i + options['chunk_days']]))
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {total} employee-days for {len(pending)} companies between {date_from} and {date_to}'
+        ))
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_hr.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily and monthly attendance rollups from the raw attendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company-id', type=int, help='Only rebuild rollups for this company')
+        parser.add_argument('--from', dest='date_from', type=str, help='First date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=str, help='Last date to rebuild (YYYY-MM-DD)')
+
+    def _parse(self, value, name):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'--{name} must be in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        date_from = self._parse(options['date_from'], 'from')
+        date_to = self._parse(options['date_to'], 'to')
+        if date_from and date_to and date_from > date_to:
+            raise CommandError('--from must not be after --to')
+
+        daily, monthly = rebuild_rollups(options['company_id'], date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {daily} daily and {monthly} monthly attendance rollups'))
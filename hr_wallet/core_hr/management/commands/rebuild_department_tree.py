@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core_hr.org_tree import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the department hierarchy closure table from the parent links'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company-id', type=int, help='Only rebuild the departments of this company')
+
+    def handle(self, *args, **options):
+        links = rebuild(options['company_id'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {links} department hierarchy links'))
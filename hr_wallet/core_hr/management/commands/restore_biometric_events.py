@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core_hr.archive import read_jsonl_gz, parse_month
+from core_hr.compact import dedupe_key_from_hash
+from core_hr.models import Attendance, BiometricDevice, BiometricEvent, BiometricEventArchive
+
+
+class Command(BaseCommand):
+    help = ('Load an archived month of biometric events back into the database for an audit. '
+            'Rows keep their original ids; running it twice is harmless')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company-id', type=int, required=True)
+        parser.add_argument('--month', type=str, required=True, help='Month to restore (YYYY-MM)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            month = parse_month(options['month'])
+        except ValueError:
+            raise CommandError('--month must be in YYYY-MM format')
+        company_id = options['company_id']
+        archives = list(BiometricEventArchive.objects.filter(company_id=company_id, month=month))
+        if not archives:
+            raise CommandError(f'No archived biometric events for company {company_id}, {month:%Y-%m}')
+
+        # Devices and attendance rows may have been deleted since; those links become NULL
+        devices = set(BiometricDevice.objects.filter(company_id=company_id).values_list('pk', flat=True))
+        total = 0
+        for archive in archives:
+            restored = 0
+            for batch in iter_batches_from_file(archive.path, options['batch_size']):
+                attendance_ids = set(Attendance.objects.filter(
+                    pk__in=[row['attendance_id'] for row in batch if row['attendance_id']]
+                ).values_list('pk', flat=True))
+                BiometricEvent.objects.bulk_create([
+                    BiometricEvent(
+                        pk=row['pk'],
+                        company_id=row['company_id'],
+                        device_id=row['device_id'] if row['device_id'] in devices else None,
+                        device_user_id=row['device_user_id'],
+                        event_type=row['event_type'],
+                        timestamp=parse_datetime(row['timestamp']),
+                        external_event_id=row['external_event_id'],
+                        raw_payload=row['raw_payload'],
+                        processed=row['processed'],
+                        attendance_id=row['attendance_id'] if row['attendance_id'] in attendance_ids else None,
+                        # Files written before the compact format carry the full hex hash
+                        dedupe_key=row['dedupe_key'] if 'dedupe_key' in row else dedupe_key_from_hash(row['dedupe_hash']),
+                    ) for row in batch
+                ], ignore_conflicts=True)
+                restored += len(batch)
+            archive.restored_at = timezone.now()
+            archive.save(update_fields=['restored_at'])
+            self.stdout.write(f'Restored {restored} events from {archive.path}')
+            total += restored
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Restored {total} biometric events for company {company_id}, {month:%Y-%m}. '
+            'They will be archived again by the next archive_biometric_events run'
+        ))
+
+
+def iter_batches_from_file(path, batch_size):
+    batch = []
+    for row in read_jsonl_gz(path):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
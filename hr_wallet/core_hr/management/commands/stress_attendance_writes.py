@@ -0,0 +1,161 @@
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from core_hr.attendance import record_punch, total_hours_for
+from core_hr.models import Attendance, BiometricEvent, Employee, WorkHours, WorkSession
+from core_hr.rollups import refresh_rollups_for
+from core_hr.shifts import CompanyShiftRules, pair_punches, shift_day, summarize_day
+
+
+class Command(BaseCommand):
+    help = ('Fire parallel clock-in/clock-out punches at a company\'s employees through the HR and biometric '
+            'write paths and check that no punch is lost; the rows written are removed afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--punches', type=int, default=5000, help='Punches per write path (default: 5000)')
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--company-id', type=int, help='Company to punch for (defaults to the first with active employees)')
+        parser.add_argument('--employees', type=int, default=10, help='Employees to spread punches over (default: 10)')
+        parser.add_argument('--date', type=str, default='2099-01-05', help='First scratch day to write (YYYY-MM-DD)')
+        parser.add_argument('--days', type=int, default=30, help='Scratch days to spread punches over (default: 30)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.filter(is_active=True).select_related('company').order_by('pk')
+        if options['company_id']:
+            employees = employees.filter(company_id=options['company_id'])
+        first = employees.first()
+        if first is None:
+            raise CommandError('No active employee found')
+        self.employees = list(employees.filter(company_id=first.company_id)[:options['employees']])
+        self.company = first.company
+        try:
+            start = datetime.strptime(options['date'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+        self.days = [start + timedelta(days=i) for i in range(options['days'])]
+        rng = random.Random(options['seed'])
+
+        try:
+            self._cleanup()
+            failures = self._stress_manual(rng, options['punches'], options['threads'])
+            self._cleanup()
+            failures += self._stress_biometric(rng, options['punches'], options['threads'])
+        finally:
+            self._cleanup()
+        if failures:
+            raise CommandError(f'{failures} check(s) failed')
+        self.stdout.write(self.style.SUCCESS('No lost or duplicated attendance writes'))
+
+    def _run(self, label, jobs, threads):
+        errors = []
+
+        def work(job):
+            try:
+                job()
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(work, jobs))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label}: {len(jobs)} punches for {len(self.employees)} employees on {threads} threads '
+                          f'in {elapsed:.2f}s ({len(jobs) / elapsed:,.0f}/s), {len(errors)} errors')
+        for error in sorted(set(errors))[:5]:
+            self.stdout.write(self.style.ERROR(f'  {error}'))
+        return len(errors)
+
+    def _compare(self, label, actual, expected):
+        """Number of keys where actual differs from expected, listing the first few"""
+        wrong = sorted(key for key in expected if actual.get(key) != expected[key])
+        for key in wrong[:5]:
+            self.stdout.write(self.style.ERROR(f'  {label} {key}: {actual.get(key)}, expected {expected[key]}'))
+        self.stdout.write(f'  {label}: {len(expected) - len(wrong)}/{len(expected)} employee-days correct')
+        return len(wrong)
+
+    def _rows(self):
+        rows = defaultdict(list)
+        for att in Attendance.objects.filter(employee__in=self.employees, date__in=self.days):
+            rows[(att.employee_id, att.date)].append((att.clock_in, att.clock_out, att.total_hours))
+        return rows
+
+    def _stress_manual(self, rng, count, threads):
+        punches = [(rng.choice(self.employees), rng.choice(self.days), rng.choice(['in', 'out']),
+                    (datetime.min + timedelta(seconds=rng.randrange(6 * 3600, 22 * 3600))).time())
+                   for _ in range(count)]
+        jobs = [
+            (lambda e=e, d=d, t=t: record_punch(e, d, clock_in=t)) if kind == 'in'
+            else (lambda e=e, d=d, t=t: record_punch(e, d, clock_out=t))
+            for e, d, kind, t in punches
+        ]
+        failures = self._run('HR clock-in/out', jobs, threads)
+
+        times = defaultdict(lambda: {'in': [], 'out': []})
+        for e, d, kind, t in punches:
+            times[(e.pk, d)][kind].append(t)
+        expected = {}
+        for (employee_id, day), kinds in times.items():
+            clock_in = min(kinds['in']) if kinds['in'] else None
+            clock_out = max(kinds['out']) if kinds['out'] else None
+            expected[(employee_id, day)] = [(clock_in, clock_out, total_hours_for(day, clock_in, clock_out))]
+        return failures + self._compare('attendance', self._rows(), expected)
+
+    def _stress_biometric(self, rng, count, threads):
+        from profile_api.views import _process_event
+
+        tz = timezone.get_current_timezone()
+        # Distinct seconds per employee, so every punch gets its own dedupe key
+        slots = rng.sample(range(len(self.employees) * len(self.days) * 10 * 3600), count)
+        punches = []
+        for slot in slots:
+            employee = self.employees[slot // (len(self.days) * 10 * 3600)]
+            day = self.days[slot // (10 * 3600) % len(self.days)]
+            ts = timezone.make_aware(datetime.combine(day, datetime.min.time()), tz) + timedelta(hours=8, seconds=slot % (10 * 3600))
+            punches.append((employee, ts, rng.choice(['checkin', 'checkout'])))
+        jobs = [(lambda e=e, ts=ts, kind=kind: _process_event(self.company, None, e.employee_id, kind, ts)) for e, ts, kind in punches]
+        failures = self._run('Biometric punches', jobs, threads)
+
+        stored = self._events().count()
+        self.stdout.write(f'  stored punches: {stored}/{count}')
+        failures += stored != count
+
+        # Punches land on whichever employee the company's device mappings resolve them to
+        resolved = dict(self._events().values_list('device_user_id', 'attendance__employee_id').distinct())
+        rules = CompanyShiftRules(self.company.pk)
+        departments = {e.pk: e.department_id for e in Employee.objects.filter(pk__in=resolved.values())}
+        by_key = defaultdict(list)
+        for employee, ts, kind in sorted(punches, key=lambda p: p[1]):
+            employee_id = resolved.get(employee.employee_id)
+            rule = rules.for_department(departments.get(employee_id))
+            by_key[(employee_id, shift_day(rule, ts, tz))].append((ts, kind))
+        expected = {}
+        for (employee_id, day), day_punches in by_key.items():
+            rule = rules.for_department(departments.get(employee_id))
+            summary = summarize_day(rule, day, pair_punches(day_punches, rule), tz)
+            expected[(employee_id, day)] = [(summary.clock_in, summary.clock_out,
+                                            (Decimal(summary.worked_minutes) / 60).quantize(Decimal('0.01')))]
+        return failures + self._compare('attendance', self._rows(), expected)
+
+    def _events(self):
+        return BiometricEvent.objects.filter(
+            company=self.company, device_user_id__in=[e.employee_id for e in self.employees],
+            timestamp__date__gte=self.days[0] - timedelta(days=1), timestamp__date__lte=self.days[-1] + timedelta(days=1),
+        )
+
+    def _cleanup(self):
+        days = [self.days[0] - timedelta(days=1)] + self.days + [self.days[-1] + timedelta(days=1)]
+        self._events().delete()
+        for model in (WorkSession, WorkHours, Attendance):
+            model.objects.filter(employee__in=self.employees, date__in=days).delete()
+        refresh_rollups_for([(e.pk, d) for e in self.employees for d in days])
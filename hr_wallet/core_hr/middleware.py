@@ -0,0 +1,69 @@
+"""
+Tenant (company) resolution for each request
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Company
+
+TENANT_CACHE_TIMEOUT = getattr(settings, 'TENANT_CACHE_TIMEOUT', 300)
+
+# Process-level cache of Company rows: {company_id: (expires_at, company)}.
+# Company saves/deletes in this process invalidate entries via core_hr.signals;
+# the timeout bounds staleness for edits made by other processes.
+_company_cache = {}
+_company_cache_lock = threading.Lock()
+
+
+def get_company(company_id):
+    """Return a Company by id from the process cache, loading it on a miss (None if missing)"""
+    if not company_id:
+        return None
+    now = time.monotonic()
+    entry = _company_cache.get(company_id)
+    if entry is None or entry[0] < now:
+        company = Company.objects.filter(pk=company_id).first()
+        if company is None:
+            return None
+        entry = (now + TENANT_CACHE_TIMEOUT, company)
+        with _company_cache_lock:
+            _company_cache[company_id] = entry
+    # Hand out a copy so per-request attribute changes never leak into the shared entry
+    return copy.copy(entry[1])
+
+
+def invalidate_company(company_id):
+    """Drop a company from the process cache"""
+    with _company_cache_lock:
+        _company_cache.pop(company_id, None)
+
+
+def resolve_tenant(request):
+    """Resolve the request's company from the logged-in user, or the session's company selection before login"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        company = get_company(getattr(user, 'company_id', None))
+        if company is not None:
+            # Prime the FK cache so request.user.company does not query again
+            user.company = company
+        return company
+    if hasattr(request, 'session'):
+        return get_company(request.session.get('selected_company_id'))
+    return None
+
+
+class TenantMiddleware:
+    """
+    Resolve the current company once per request and expose it as ``request.tenant``.
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tenant = resolve_tenant(request)
+        return self.get_response(request)
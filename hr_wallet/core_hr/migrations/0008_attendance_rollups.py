@@ -0,0 +1,104 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:15
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('core_hr', 'Attendance')
+    WorkHours = apps.get_model('core_hr', 'WorkHours')
+    AttendanceDailyRollup = apps.get_model('core_hr', 'AttendanceDailyRollup')
+    EmployeeMonthlyRollup = apps.get_model('core_hr', 'EmployeeMonthlyRollup')
+    counts = {
+        'present': Count('id', filter=Q(status='present')),
+        'late': Count('id', filter=Q(status='late')),
+        'absent': Count('id', filter=Q(status='absent')),
+        'half_day': Count('id', filter=Q(status='half_day')),
+        'hours': Sum('total_hours'),
+    }
+
+    daily = {}
+    for row in Attendance.objects.values('employee__company_id', 'employee__department_id', 'date').annotate(**counts).order_by():
+        key = (row['employee__company_id'], row['employee__department_id'], row['date'])
+        daily[key] = AttendanceDailyRollup(
+            company_id=key[0], department_id=key[1], date=key[2],
+            present_count=row['present'], late_count=row['late'], absent_count=row['absent'],
+            half_day_count=row['half_day'], total_hours=row['hours'] or Decimal('0.00'),
+        )
+    for row in WorkHours.objects.values('employee__company_id', 'employee__department_id', 'date').annotate(ot=Sum('overtime_hours')).order_by():
+        key = (row['employee__company_id'], row['employee__department_id'], row['date'])
+        if row['ot'] and key in daily:
+            daily[key].overtime_hours = row['ot']
+    AttendanceDailyRollup.objects.bulk_create(daily.values(), batch_size=1000)
+
+    monthly = {}
+    for row in (Attendance.objects.annotate(month=TruncMonth('date'))
+                .values('employee_id', 'employee__company_id', 'month').annotate(total=Count('id'), **counts).order_by()):
+        monthly[(row['employee_id'], row['month'])] = EmployeeMonthlyRollup(
+            employee_id=row['employee_id'], company_id=row['employee__company_id'], month=row['month'],
+            total_days=row['total'], present_days=row['present'], late_days=row['late'],
+            absent_days=row['absent'], half_days=row['half_day'], total_hours=row['hours'] or Decimal('0.00'),
+        )
+    for row in (WorkHours.objects.annotate(month=TruncMonth('date'))
+                .values('employee_id', 'month').annotate(ot=Sum('overtime_hours')).order_by()):
+        key = (row['employee_id'], row['month'])
+        if row['ot'] and key in monthly:
+            monthly[key].overtime_hours = row['ot']
+    EmployeeMonthlyRollup.objects.bulk_create(monthly.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0007_remove_company_annual_leave_days_remove_company_code_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('late_days', models.PositiveIntegerField(default=0)),
+                ('absent_days', models.PositiveIntegerField(default=0)),
+                ('half_days', models.PositiveIntegerField(default=0)),
+                ('total_hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='employee_monthly_rollups', to='core_hr.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='core_hr.employee')),
+            ],
+            options={
+                'ordering': ['employee', 'month'],
+                'indexes': [models.Index(fields=['company', 'month'], name='core_hr_emp_company_586184_idx')],
+                'unique_together': {('employee', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('half_day_count', models.PositiveIntegerField(default=0)),
+                ('total_hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='core_hr.company')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='core_hr.department')),
+            ],
+            options={
+                'ordering': ['company', 'date'],
+                'indexes': [models.Index(fields=['company', 'date'], name='core_hr_att_company_38c116_idx')],
+                'unique_together': {('company', 'department', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
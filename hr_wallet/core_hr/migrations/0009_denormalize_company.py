@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_company(apps, schema_editor):
+    Employee = apps.get_model('core_hr', 'Employee')
+    employee_company = Subquery(Employee.objects.filter(pk=OuterRef('employee_id')).values('company_id')[:1])
+    for model_name in ('Attendance', 'LeaveRequest', 'Payroll', 'WorkHours'):
+        model = apps.get_model('core_hr', model_name)
+        model.objects.filter(company__isnull=True).update(company_id=employee_company)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0008_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to='core_hr.company'),
+        ),
+        migrations.AddField(
+            model_name='leaverequest',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leave_requests', to='core_hr.company'),
+        ),
+        migrations.AddField(
+            model_name='payroll',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payrolls', to='core_hr.company'),
+        ),
+        migrations.AddField(
+            model_name='workhours',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='work_hours', to='core_hr.company'),
+        ),
+        migrations.RunPython(backfill_company, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['company', 'date', 'status'], name='core_hr_att_company_bf0d81_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['company', 'status', '-created_at'], name='core_hr_lea_company_67f7c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['company', 'pay_period_end'], name='core_hr_pay_company_b94ea3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workhours',
+            index=models.Index(fields=['company', 'date'], name='core_hr_wor_company_d2beb2_idx'),
+        ),
+    ]
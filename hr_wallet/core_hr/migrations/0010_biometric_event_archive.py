@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0009_denormalize_company'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BiometricEventArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the archived month')),
+                ('path', models.CharField(max_length=500)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('archived_before', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('restored_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['company', 'month', 'created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='biometricevent',
+            name='core_hr_bio_process_fc8e8a_idx',
+        ),
+        migrations.AddIndex(
+            model_name='biometricevent',
+            index=models.Index(fields=['company', 'processed', 'timestamp'], name='core_hr_bio_company_0dfda6_idx'),
+        ),
+        migrations.AddField(
+            model_name='biometriceventarchive',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='biometric_event_archives', to='core_hr.company'),
+        ),
+        migrations.AddIndex(
+            model_name='biometriceventarchive',
+            index=models.Index(fields=['company', 'month'], name='core_hr_bio_company_b3a4f9_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+
+from core_hr.compact import dedupe_key_from_hash, encode_payload
+
+BATCH_SIZE = 2000
+
+
+def convert_events(apps, schema_editor):
+    """Derive dedupe_key from dedupe_hash and compress raw_payload"""
+    BiometricEvent = apps.get_model('core_hr', 'BiometricEvent')
+    last_pk = 0
+    while True:
+        batch = list(BiometricEvent.objects.filter(pk__gt=last_pk).order_by('pk')
+                     .only('pk', 'dedupe_hash', 'raw_payload')[:BATCH_SIZE])
+        if not batch:
+            return
+        for ev in batch:
+            ev.dedupe_key = dedupe_key_from_hash(ev.dedupe_hash)
+            ev.payload = encode_payload(ev.raw_payload) if ev.raw_payload else None
+        BiometricEvent.objects.bulk_update(batch, ['dedupe_key', 'payload'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    """Irreversible: the full SHA-256 dedupe hashes are not kept"""
+
+    dependencies = [
+        ('core_hr', '0010_biometric_event_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biometricevent',
+            name='dedupe_key',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='biometricevent',
+            name='payload',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(convert_events),
+        migrations.RemoveField(
+            model_name='biometricevent',
+            name='dedupe_hash',
+        ),
+        migrations.RemoveField(
+            model_name='biometricevent',
+            name='raw_payload',
+        ),
+        migrations.AlterField(
+            model_name='biometricevent',
+            name='dedupe_key',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='biometricevent',
+            constraint=models.UniqueConstraint(fields=('company', 'dedupe_key'), name='uniq_biometric_event_dedupe'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:49
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0011_compact_biometric_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShiftRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_time', models.TimeField(default=datetime.time(9, 0))),
+                ('end_time', models.TimeField(default=datetime.time(17, 0))),
+                ('early_start_minutes', models.PositiveIntegerField(default=120)),
+                ('late_grace_minutes', models.PositiveIntegerField(default=10)),
+                ('unpaid_break_minutes', models.PositiveIntegerField(default=0)),
+                ('debounce_seconds', models.PositiveIntegerField(default=120)),
+                ('max_session_hours', models.PositiveIntegerField(default=16)),
+                ('is_active', models.BooleanField(default=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_rules', to='core_hr.company')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shift_rules', to='core_hr.department')),
+            ],
+            options={
+                'ordering': ['company', 'department', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('check_in', models.DateTimeField(blank=True, null=True)),
+                ('check_out', models.DateTimeField(blank=True, null=True)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_sessions', to='core_hr.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_sessions', to='core_hr.employee')),
+            ],
+            options={
+                'ordering': ['employee', 'date', 'check_in'],
+                'indexes': [models.Index(fields=['company', 'date'], name='core_hr_wor_company_2a7c28_idx'), models.Index(fields=['employee', 'date'], name='core_hr_wor_employe_93e5b6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:49
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0012_shift_engine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkWeek',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekmask', models.CharField(default='1111100', max_length=7, validators=[django.core.validators.RegexValidator('^[01]{7}$')])),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='work_week', to='core_hr.company')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('name', models.CharField(max_length=100)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='core_hr.company')),
+            ],
+            options={
+                'ordering': ['company', 'date'],
+                'unique_together': {('company', 'date')},
+            },
+        ),
+    ]
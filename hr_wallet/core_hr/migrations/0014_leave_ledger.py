@@ -0,0 +1,96 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+LEAVE_BALANCE_FIELDS = {
+    'annual': ('annual_leave_total', 'annual_leave_used'),
+    'sick': ('sick_leave_total', 'sick_leave_used'),
+    'personal': ('personal_leave_total', 'personal_leave_used'),
+}
+
+
+def post_opening_balances(apps, schema_editor):
+    """Open each employee's ledger with what their LeaveBalance counters have left"""
+    LeaveBalance = apps.get_model('core_hr', 'LeaveBalance')
+    LeaveLedgerEntry = apps.get_model('core_hr', 'LeaveLedgerEntry')
+    today = timezone.localdate()
+    entries = []
+    for balance in LeaveBalance.objects.select_related('employee'):
+        for leave_type, (total, used) in LEAVE_BALANCE_FIELDS.items():
+            remaining = getattr(balance, total) - getattr(balance, used)
+            if remaining:
+                entries.append(LeaveLedgerEntry(
+                    employee_id=balance.employee_id, company_id=balance.employee.company_id, leave_type=leave_type,
+                    kind='adjustment', date=today, days=remaining, note='Opening balance',
+                ))
+    LeaveLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core_hr', '0013_work_calendar'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leaverequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='LeaveBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('annual', 'Annual Leave'), ('sick', 'Sick Leave'), ('personal', 'Personal Leave'), ('maternity', 'Maternity Leave'), ('emergency', 'Emergency Leave')], max_length=20)),
+                ('as_of', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('last_entry_id', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_snapshots', to='core_hr.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_snapshots', to='core_hr.employee')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LeaveLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('annual', 'Annual Leave'), ('sick', 'Sick Leave'), ('personal', 'Personal Leave'), ('maternity', 'Maternity Leave'), ('emergency', 'Emergency Leave')], max_length=20)),
+                ('kind', models.CharField(choices=[('accrual', 'Monthly accrual'), ('usage', 'Approved leave'), ('cancellation', 'Cancelled leave'), ('carry_over', 'Year-end carry-over'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('date', models.DateField(help_text='Day the change takes effect')),
+                ('days', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger_entries', to='core_hr.company')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger', to='core_hr.employee')),
+                ('leave_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='core_hr.leaverequest')),
+            ],
+            options={
+                'ordering': ['employee', 'date', 'pk'],
+                'indexes': [models.Index(fields=['employee', 'leave_type', 'date'], name='core_hr_lea_employe_3aa5ed_idx'), models.Index(fields=['company', 'date'], name='core_hr_lea_company_1e7f4b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaveledgerentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind__in', ['accrual', 'carry_over'])), fields=('employee', 'leave_type', 'kind', 'date'), name='uniq_leave_periodic_posting'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaveledgerentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('leave_request__isnull', False)), fields=('leave_request', 'kind'), name='uniq_leave_request_posting'),
+        ),
+        migrations.AddIndex(
+            model_name='leavebalancesnapshot',
+            index=models.Index(fields=['company', 'as_of'], name='core_hr_lea_company_d280a2_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leavebalancesnapshot',
+            unique_together={('employee', 'leave_type', 'as_of')},
+        ),
+        migrations.RunPython(post_opening_balances, migrations.RunPython.noop),
+    ]
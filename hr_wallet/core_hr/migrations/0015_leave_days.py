@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+from datetime import timedelta
+
+
+def expand_leave_days(apps, schema_editor):
+    """Hold the days of existing pending and approved leave; where old requests overlap, approved ones keep the day"""
+    LeaveRequest = apps.get_model('core_hr', 'LeaveRequest')
+    LeaveDay = apps.get_model('core_hr', 'LeaveDay')
+    days = []
+    for pk, employee_id, company_id, start, end, status in LeaveRequest.objects.filter(
+        status__in=['pending', 'approved'],
+    ).order_by('status', 'pk').values_list('pk', 'employee_id', 'employee__company_id', 'start_date', 'end_date', 'status'):
+        days.extend(
+            LeaveDay(leave_request_id=pk, employee_id=employee_id, company_id=company_id, date=start + timedelta(days=i), status=status)
+            for i in range((end - start).days + 1)
+        )
+    LeaveDay.objects.bulk_create(days, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0014_leave_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved')], max_length=20)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_days', to='core_hr.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_days', to='core_hr.employee')),
+                ('leave_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='core_hr.leaverequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'date'], name='core_hr_lea_company_9937e4_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaveday',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='uniq_leave_day'),
+        ),
+        migrations.RunPython(expand_leave_days, migrations.RunPython.noop),
+    ]
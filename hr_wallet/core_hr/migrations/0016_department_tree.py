@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_departments(apps, schema_editor):
+    """Existing departments are all top-level: each is only its own ancestor"""
+    Department = apps.get_model('core_hr', 'Department')
+    DepartmentClosure = apps.get_model('core_hr', 'DepartmentClosure')
+    DepartmentClosure.objects.bulk_create([
+        DepartmentClosure(ancestor_id=pk, descendant_id=pk, depth=0)
+        for pk in Department.objects.values_list('pk', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0015_leave_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='core_hr.department'),
+        ),
+        migrations.CreateModel(
+            name='DepartmentClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='core_hr.department')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='core_hr.department')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='core_hr_dep_descend_a296ac_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='departmentclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='uniq_department_closure'),
+        ),
+        migrations.RunPython(link_departments, migrations.RunPython.noop),
+    ]
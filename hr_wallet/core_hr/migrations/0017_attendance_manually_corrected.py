@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0016_department_tree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='manually_corrected',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_buckets(apps, schema_editor):
+    """Keep the newest no-department rollup per company/day; the others are stale copies"""
+    AttendanceDailyRollup = apps.get_model('core_hr', 'AttendanceDailyRollup')
+    no_department = AttendanceDailyRollup.objects.filter(department__isnull=True)
+    keep = no_department.values('company_id', 'date').annotate(keep=Max('pk')).values_list('keep', flat=True)
+    no_department.exclude(pk__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_hr', '0017_attendance_manually_corrected'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendancedailyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('department__isnull', True)), fields=('company', 'date'), name='uniq_attendance_rollup_no_department'),
+        ),
+    ]
@@ -1,10 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import RegexValidator
 from django.utils import timezone
-from django.db.models import Sum, Count, Avg
-from datetime import datetime, timedelta
+from django.db.models import Sum, Count, Avg, OuterRef, Subquery
+from collections import defaultdict
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
+from .compact import encode_payload, decode_payload
+
 
 class Company(models.Model):
     """Company model - updated to match actual database schema"""
@@ -63,6 +69,14 @@ class Department(models.Model):
         blank=True,
         related_name='managed_departments'
     )
+    # Sub-departments must be moved or removed before their parent is deleted
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='children'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
@@ -71,6 +85,30 @@ class Department(models.Model):
         unique_together = ['company', 'name']
         ordering = ['company', 'name']
 
+    def clean(self):
+        super().clean()
+        if self.parent_id is None:
+            return
+        if self.parent.company_id != self.company_id:
+            raise ValidationError({'parent': 'The parent department must belong to the same company.'})
+        if self.pk and DepartmentClosure.objects.filter(ancestor_id=self.pk, descendant_id=self.parent_id).exists():
+            raise ValidationError({'parent': 'A department cannot be placed under itself or one of its sub-departments.'})
+
+    def save(self, *args, **kwargs):
+        from .org_tree import attach, move_subtree
+
+        update_fields = kwargs.get('update_fields')
+        creating = self.pk is None
+        moved = not creating and (update_fields is None or 'parent' in update_fields) and (
+            Department.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first() != self.parent_id
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                attach(self)
+            elif moved:
+                move_subtree(self)
+
     def __str__(self):
         company_name = self.company.name if self.company else "No Company"
         return f"{company_name} - {self.name}"
@@ -80,6 +118,28 @@ class Department(models.Model):
         return self.employees.filter(is_active=True).count()
 
 
+class DepartmentClosure(models.Model):
+    """One (ancestor, descendant) pair of the department tree, including each department with itself at depth 0.
+
+    Maintained by core_hr.org_tree when departments are created or moved, so
+    "everything under this department" is one indexed lookup at any depth.
+    """
+    ancestor = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='uniq_department_closure'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
+
+
 class Employee(models.Model):
     """Employee profile extending User model with multi-company support"""
     user = models.OneToOneField(
@@ -136,26 +196,11 @@ class Employee(models.Model):
         return self.leaverequest_set.filter(status='pending').count()
 
     def get_attendance_percentage(self, days=30):
-        """Get attendance percentage for last N days"""
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=days)
+        """Get attendance percentage for last N days, out of the working days scheduled in them"""
+        from .workdays import attendance_percentage
 
-        total_days = Attendance.objects.filter(
-            employee=self,
-            date__gte=start_date,
-            date__lte=end_date
-        ).count()
-
-        present_days = Attendance.objects.filter(
-            employee=self,
-            date__gte=start_date,
-            date__lte=end_date,
-            status__in=['present', 'late']
-        ).count()
-
-        if total_days == 0:
-            return 0
-        return round((present_days / total_days) * 100, 1)
+        end_date = timezone.now().date()
+        return attendance_percentage(self, end_date - timedelta(days=days), end_date)
 
     def get_latest_payroll(self):
         """Get latest payroll record"""
@@ -165,9 +210,34 @@ class Employee(models.Model):
         return f"{self.employee_id} - {self.user.get_full_name()}"
 
 
+def set_company_from_employee(instance):
+    """Copy the employee's company onto a denormalized row before it is saved.
+
+    A loaded employee always wins; otherwise the company is only looked up when
+    it is missing. Moving an employee to another company resyncs their existing
+    rows through sync_employee_company() (see core_hr.signals).
+    bulk_create() skips save(), so callers building rows in bulk must set company themselves.
+    """
+    if instance.employee_id is None:
+        return
+    employee = instance._state.fields_cache.get('employee')
+    if employee is not None and employee.pk == instance.employee_id:
+        instance.company_id = employee.company_id
+    elif instance.company_id is None:
+        instance.company_id = Employee.objects.filter(pk=instance.employee_id).values_list('company_id', flat=True).first()
+
+
+def sync_employee_company(employee_id, company_id):
+    """Move an employee's denormalized rows to their new company (queryset updates, no signals)"""
+    for model in (Attendance, LeaveRequest, LeaveDay, Payroll, WorkHours):
+        model.objects.filter(employee_id=employee_id).exclude(company_id=company_id).update(company_id=company_id)
+
+
 class Attendance(models.Model):
     """Employee attendance tracking"""
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    # Denormalized from employee so company-scoped queries can use their own index (set in save())
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='attendance_records')
     date = models.DateField()
     clock_in = models.TimeField(null=True, blank=True)
     clock_out = models.TimeField(null=True, blank=True)
@@ -184,27 +254,40 @@ class Attendance(models.Model):
         default='present'
     )
     notes = models.TextField(blank=True)
+    # Set by HR corrections (core_hr.attendance); punch reprocessing leaves these rows alone
+    manually_corrected = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ['employee', 'date']
+        indexes = [
+            models.Index(fields=['company', 'date', 'status']),
+        ]
+
+    def save(self, *args, **kwargs):
+        set_company_from_employee(self)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.employee} - {self.date}"
 
 
+LEAVE_TYPE_CHOICES = [
+    ('annual', 'Annual Leave'),
+    ('sick', 'Sick Leave'),
+    ('personal', 'Personal Leave'),
+    ('maternity', 'Maternity Leave'),
+    ('emergency', 'Emergency Leave'),
+]
+# Leave in these states holds its days (LeaveDay); rejected and cancelled leave frees them
+ACTIVE_LEAVE_STATUSES = ('pending', 'approved')
+
+
 class LeaveRequest(models.Model):
     """Employee leave requests"""
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
-    leave_type = models.CharField(
-        max_length=20,
-        choices=[
-            ('annual', 'Annual Leave'),
-            ('sick', 'Sick Leave'),
-            ('personal', 'Personal Leave'),
-            ('maternity', 'Maternity Leave'),
-            ('emergency', 'Emergency Leave'),
-        ]
-    )
+    # Denormalized from employee so company-scoped queries can use their own index (set in save())
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='leave_requests')
+    leave_type = models.CharField(max_length=20, choices=LEAVE_TYPE_CHOICES)
     start_date = models.DateField()
     end_date = models.DateField()
     days_requested = models.PositiveIntegerField()
@@ -215,6 +298,7 @@ class LeaveRequest(models.Model):
             ('pending', 'Pending'),
             ('approved', 'Approved'),
             ('rejected', 'Rejected'),
+            ('cancelled', 'Cancelled'),
         ],
         default='pending'
     )
@@ -228,13 +312,113 @@ class LeaveRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'status', '-created_at']),
+        ]
+
+    def overlapping_days(self):
+        """Days of this request already held by the employee's other pending or approved leave"""
+        days = LeaveDay.objects.filter(employee_id=self.employee_id, date__gte=self.start_date, date__lte=self.end_date)
+        if self.pk:
+            days = days.exclude(leave_request_id=self.pk)
+        return days.order_by('date')
+
+    def clean(self):
+        super().clean()
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': 'End date must not be before the start date.'})
+        if self.employee_id and self.start_date and self.end_date and self.status in ACTIVE_LEAVE_STATUSES:
+            clash = self.overlapping_days().first()
+            if clash:
+                raise ValidationError(f'Overlaps leave already requested for {clash.date:%Y-%m-%d}.')
+
+    def save(self, *args, **kwargs):
+        from .workdays import count_working_days
+
+        set_company_from_employee(self)
+        # Working days only: the company's weekends and holidays are not taken as leave
+        if self.company_id and self.start_date and self.end_date:
+            self.days_requested = count_working_days(self.company_id, self.start_date, self.end_date)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            LeaveDay.sync_for([self.pk])
+
     def __str__(self):
         return f"{self.employee} - {self.leave_type} ({self.start_date} to {self.end_date})"
 
 
+class LeaveDay(models.Model):
+    """One calendar day held by a pending or approved leave request.
+
+    Rewritten from the request by sync_for() whenever its dates or status
+    change. The unique (employee, date) index rejects overlapping leave and
+    makes overlap checks and team coverage index range scans.
+    """
+    leave_request = models.ForeignKey(LeaveRequest, on_delete=models.CASCADE, related_name='days')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_days')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='leave_days')
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=[('pending', 'Pending'), ('approved', 'Approved')])
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'date'], name='uniq_leave_day'),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} off on {self.date} ({self.status})"
+
+    @classmethod
+    def sync_for(cls, leave_ids):
+        """Rewrite the days of the given leave requests from their current dates and status.
+
+        Raises IntegrityError when one of them overlaps other leave of the same employee.
+        """
+        leave_ids = list(leave_ids)
+        cls.objects.filter(leave_request_id__in=leave_ids).delete()
+        days = []
+        for pk, employee_id, company_id, start, end, status in LeaveRequest.objects.filter(
+            pk__in=leave_ids, status__in=ACTIVE_LEAVE_STATUSES,
+        ).values_list('pk', 'employee_id', 'employee__company_id', 'start_date', 'end_date', 'status'):
+            days.extend(
+                cls(leave_request_id=pk, employee_id=employee_id, company_id=company_id, date=start + timedelta(days=i), status=status)
+                for i in range((end - start).days + 1)
+            )
+        cls.objects.bulk_create(days, batch_size=1000)
+
+    @classmethod
+    def clashes_for(cls, leave_ids):
+        """{leave_id: first clashing date} for requests whose days sync_for() could not write.
+
+        Leave from before overlaps were rejected may have no days of its own, so
+        requests are checked against the days already held and against each other.
+        """
+        clash = cls.objects.filter(
+            employee_id=OuterRef('employee_id'), date__gte=OuterRef('start_date'), date__lte=OuterRef('end_date'),
+        ).exclude(leave_request_id=OuterRef('pk')).order_by('date').values('date')[:1]
+        rows = LeaveRequest.objects.filter(pk__in=list(leave_ids)).annotate(clash=Subquery(clash)).order_by(
+            'start_date', 'pk',
+        ).values_list('pk', 'employee_id', 'start_date', 'end_date', 'clash')
+        clashes, taken = {}, defaultdict(list)
+        for pk, employee_id, start, end, day in rows:
+            if day is None:
+                day = next((max(start, s) for s, e in taken[employee_id] if s <= end and start <= e), None)
+            if day is not None:
+                clashes[pk] = day
+            else:
+                taken[employee_id].append((start, end))
+        return clashes
+
+
 class Payroll(models.Model):
     """Employee payroll records"""
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    # Denormalized from employee so company-scoped queries can use their own index (set in save())
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='payrolls')
     pay_period_start = models.DateField()
     pay_period_end = models.DateField()
     basic_salary = models.DecimalField(max_digits=10, decimal_places=2)
@@ -260,8 +444,12 @@ class Payroll(models.Model):
 
     class Meta:
         unique_together = ['employee', 'pay_period_start', 'pay_period_end']
+        indexes = [
+            models.Index(fields=['company', 'pay_period_end']),
+        ]
 
     def save(self, *args, **kwargs):
+        set_company_from_employee(self)
         self.gross_pay = self.basic_salary + self.allowances + self.overtime_pay
         self.total_deductions = self.tax_deduction + self.insurance_deduction + self.other_deductions
         self.net_pay = self.gross_pay - self.total_deductions
@@ -298,9 +486,76 @@ class LeaveBalance(models.Model):
         return f"{self.employee} - Leave Balance"
 
 
+class LeaveLedgerEntry(models.Model):
+    """One change to an employee's leave balance; rows are appended, never updated (core_hr.leave_ledger).
+
+    The balance of a leave type on a date is the sum of days of its entries
+    dated up to then.
+    """
+    KIND_CHOICES = [
+        ('accrual', 'Monthly accrual'),
+        ('usage', 'Approved leave'),
+        ('cancellation', 'Cancelled leave'),
+        ('carry_over', 'Year-end carry-over'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_ledger')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='leave_ledger_entries')
+    leave_type = models.CharField(max_length=20, choices=LEAVE_TYPE_CHOICES)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    date = models.DateField(help_text='Day the change takes effect')
+    # Positive adds to the balance, negative draws it down
+    days = models.DecimalField(max_digits=6, decimal_places=2)
+    leave_request = models.ForeignKey(LeaveRequest, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    note = models.CharField(max_length=200, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'leave_type', 'date']),
+            models.Index(fields=['company', 'date']),
+        ]
+        constraints = [
+            # Accrual and carry-over jobs can be rerun; a leave request is posted once per kind
+            models.UniqueConstraint(fields=['employee', 'leave_type', 'kind', 'date'],
+                                    condition=models.Q(kind__in=['accrual', 'carry_over']), name='uniq_leave_periodic_posting'),
+            models.UniqueConstraint(fields=['leave_request', 'kind'],
+                                    condition=models.Q(leave_request__isnull=False), name='uniq_leave_request_posting'),
+        ]
+        ordering = ['employee', 'date', 'pk']
+
+    def __str__(self):
+        return f"{self.employee_id} {self.leave_type} {self.kind} {self.days:+} ({self.date})"
+
+
+class LeaveBalanceSnapshot(models.Model):
+    """Leave balance from every ledger entry dated up to as_of and numbered up to last_entry_id"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_snapshots')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='leave_snapshots')
+    leave_type = models.CharField(max_length=20, choices=LEAVE_TYPE_CHOICES)
+    as_of = models.DateField()
+    balance = models.DecimalField(max_digits=8, decimal_places=2)
+    # Entries numbered above this were posted after the snapshot, possibly back-dated before as_of
+    last_entry_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['employee', 'leave_type', 'as_of']
+        indexes = [
+            models.Index(fields=['company', 'as_of']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} {self.leave_type} {self.balance} on {self.as_of}"
+
+
 class WorkHours(models.Model):
     """Employee work hours tracking"""
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    # Denormalized from employee so company-scoped queries can use their own index (set in save())
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='work_hours')
     date = models.DateField()
     regular_hours = models.DecimalField(max_digits=4, decimal_places=2, default=0)
     overtime_hours = models.DecimalField(max_digits=4, decimal_places=2, default=0)
@@ -310,8 +565,12 @@ class WorkHours(models.Model):
 
     class Meta:
         unique_together = ['employee', 'date']
+        indexes = [
+            models.Index(fields=['company', 'date']),
+        ]
 
     def save(self, *args, **kwargs):
+        set_company_from_employee(self)
         self.total_hours = self.regular_hours + self.overtime_hours
         super().save(*args, **kwargs)
 
@@ -320,6 +579,146 @@ class WorkHours(models.Model):
 
 
 
+class ShiftRule(models.Model):
+    """How biometric punches are paired into work sessions for a company (or one of its departments).
+
+    A shift day runs for 24 hours from early_start_minutes before start_time, so
+    overnight shifts (end_time before start_time) stay on the day they started.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='shift_rules')
+    # Empty for the company-wide rule; department rules take precedence
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True, related_name='shift_rules')
+    name = models.CharField(max_length=100)
+    start_time = models.TimeField(default=time(9, 0))
+    end_time = models.TimeField(default=time(17, 0))
+    early_start_minutes = models.PositiveIntegerField(default=120)
+    late_grace_minutes = models.PositiveIntegerField(default=10)
+    # Deducted from a single unbroken session; split sessions already leave the break out
+    unpaid_break_minutes = models.PositiveIntegerField(default=0)
+    # Repeated punches of the same type within this many seconds count once
+    debounce_seconds = models.PositiveIntegerField(default=120)
+    # A check-in left open longer than this is treated as a missed check-out
+    max_session_hours = models.PositiveIntegerField(default=16)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['company', 'department', 'name']
+
+    def __str__(self):
+        return f"{self.name} ({self.start_time:%H:%M}-{self.end_time:%H:%M})"
+
+    @property
+    def scheduled_minutes(self):
+        """Paid minutes in the shift; time worked beyond this is overtime"""
+        span = (self.end_time.hour * 60 + self.end_time.minute) - (self.start_time.hour * 60 + self.start_time.minute)
+        if span <= 0:
+            span += 24 * 60
+        return max(span - self.unpaid_break_minutes, 0)
+
+
+class WorkWeek(models.Model):
+    """The weekdays a company works; companies without one work Monday to Friday (core_hr.workdays)"""
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name='work_week')
+    # One flag per weekday, Monday first, as in numpy's busday weekmask: '1111100' is Monday to Friday
+    weekmask = models.CharField(max_length=7, default='1111100', validators=[RegexValidator(r'^[01]{7}$')])
+
+    def __str__(self):
+        return f"{self.company} ({self.weekmask})"
+
+
+class Holiday(models.Model):
+    """A company holiday; it is not a working day even if it falls in the work week"""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='holidays')
+    date = models.DateField()
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ['company', 'date']
+        ordering = ['company', 'date']
+
+    def __str__(self):
+        return f"{self.name} ({self.date})"
+
+
+class WorkSession(models.Model):
+    """A check-in/check-out pair built from biometric punches (core_hr.shifts); one side may be missing"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='work_sessions')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='work_sessions')
+    # The shift day the session belongs to, which an overnight check-out can run past
+    date = models.DateField()
+    check_in = models.DateTimeField(null=True, blank=True)
+    check_out = models.DateTimeField(null=True, blank=True)
+    minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'date']),
+            models.Index(fields=['employee', 'date']),
+        ]
+        ordering = ['employee', 'date', 'check_in']
+
+    def __str__(self):
+        return f"{self.employee_id} {self.date} ({self.minutes} min)"
+
+
+class AttendanceDailyRollup(models.Model):
+    """Attendance totals per company, department and day, maintained from Attendance writes.
+
+    Hours come from Attendance.total_hours; overtime from WorkHours.overtime_hours.
+    Rows are grouped by the employee's current department (rebuild to regroup).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='attendance_rollups')
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True, related_name='attendance_rollups')
+    date = models.DateField()
+    present_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    half_day_count = models.PositiveIntegerField(default=0)
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    overtime_hours = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['company', 'department', 'date']
+        constraints = [
+            # NULLs are distinct in unique_together, so the no-department bucket needs its own constraint
+            models.UniqueConstraint(fields=['company', 'date'], condition=models.Q(department__isnull=True),
+                                    name='uniq_attendance_rollup_no_department'),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'date']),
+        ]
+        ordering = ['company', 'date']
+
+    def __str__(self):
+        return f"{self.company_id}/{self.department_id or '-'} {self.date}"
+
+
+class EmployeeMonthlyRollup(models.Model):
+    """Attendance totals per employee and calendar month (month = first day of month)"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='monthly_rollups')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='employee_monthly_rollups')
+    month = models.DateField()
+    total_days = models.PositiveIntegerField(default=0)
+    present_days = models.PositiveIntegerField(default=0)
+    late_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)
+    half_days = models.PositiveIntegerField(default=0)
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    overtime_hours = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['employee', 'month']
+        indexes = [
+            models.Index(fields=['company', 'month']),
+        ]
+        ordering = ['employee', 'month']
+
+    def __str__(self):
+        return f"{self.employee_id} {self.month:%Y-%m}"
+
+
 class BiometricDevice(models.Model):
     """Represents a biometric device (e.g., ZKTeco) for attendance integration."""
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='biometric_devices')
@@ -390,19 +789,74 @@ class BiometricEvent(models.Model):
     event_type = models.CharField(max_length=20, choices=EVENT_TYPES, default='unknown')
     timestamp = models.DateTimeField()
     external_event_id = models.CharField(max_length=128, blank=True)
-    raw_payload = models.JSONField(default=dict, blank=True)
+    # Compressed raw device payload (core_hr.compact); read and write it through raw_payload
+    payload = models.BinaryField(null=True, blank=True)
     processed = models.BooleanField(default=False)
     attendance = models.ForeignKey(Attendance, on_delete=models.SET_NULL, null=True, blank=True, related_name='biometric_events')
-    dedupe_hash = models.CharField(max_length=64, unique=True)
+    # Signed 64-bit idempotency key, unique per company (core_hr.compact.dedupe_key)
+    dedupe_key = models.BigIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['company', 'timestamp']),
             models.Index(fields=['company', 'device_user_id', 'timestamp']),
-            models.Index(fields=['processed']),
+            # Status counts and retention both filter on processed within a company and time range
+            models.Index(fields=['company', 'processed', 'timestamp']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'dedupe_key'], name='uniq_biometric_event_dedupe'),
         ]
         ordering = ['-timestamp']
 
     def __str__(self):
         return f"{self.device_user_id} {self.event_type} @ {self.timestamp}"
+
+    @property
+    def raw_payload(self):
+        return decode_payload(self.payload) if self.payload else {}
+
+    @raw_payload.setter
+    def raw_payload(self, value):
+        self.payload = encode_payload(value) if value else None
+
+    @property
+    def dedupe_hash(self):
+        """Hex form of dedupe_key, kept for API consumers"""
+        return f'{self.dedupe_key & 0xFFFFFFFFFFFFFFFF:016x}' if self.dedupe_key is not None else None
+
+
+class BiometricEventArchive(models.Model):
+    """A company-month of processed BiometricEvents moved out of the table into a JSONL.gz file."""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='biometric_event_archives')
+    month = models.DateField(help_text='First day of the archived month')
+    path = models.CharField(max_length=500)
+    row_count = models.PositiveIntegerField(default=0)
+    # Retention cutoff of the run that wrote this file; older punches are no longer accepted
+    archived_before = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    restored_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'month']),
+        ]
+        ordering = ['company', 'month', 'created_at']
+
+    def __str__(self):
+        return f"{self.company_id} {self.month:%Y-%m} ({self.row_count} events)"
+
+    @classmethod
+    def horizon_for(cls, company_id):
+        """Punches before this time have been archived for the company (None if nothing has)"""
+        key = f'biometric_archive_horizon:{company_id}'
+        horizon = cache.get(key)
+        if horizon is None:
+            horizon = cls.objects.filter(company_id=company_id).aggregate(h=models.Max('archived_before'))['h'] or ''
+            # Short-lived: archive runs happen in another process and cannot invalidate this cache
+            cache.set(key, horizon, 60)
+        return horizon or None
+
+    @classmethod
+    def invalidate_horizon(cls, company_id):
+        cache.delete(f'biometric_archive_horizon:{company_id}')
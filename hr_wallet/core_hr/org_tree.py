@@ -0,0 +1,101 @@
+"""
+Department hierarchy on a closure table.
+
+DepartmentClosure holds one row for every (ancestor, descendant) pair of the
+tree, each department being its own ancestor at depth 0. Creating a
+department copies its parent's ancestor rows; moving one rewrites only the
+rows that link its subtree to the ancestors it leaves and joins. Subtree
+filters and roll-ups through the tree are then a single join on the
+closure's (ancestor, descendant) index, with no recursion at any depth.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Department, DepartmentClosure
+
+
+def attach(department):
+    """Closure rows of a new department: itself, and its parent's ancestors one level further away"""
+    links = [DepartmentClosure(ancestor_id=department.pk, descendant_id=department.pk, depth=0)]
+    if department.parent_id:
+        links.extend(
+            DepartmentClosure(ancestor_id=ancestor_id, descendant_id=department.pk, depth=depth + 1)
+            for ancestor_id, depth in DepartmentClosure.objects.filter(
+                descendant_id=department.parent_id,
+            ).values_list('ancestor_id', 'depth')
+        )
+    DepartmentClosure.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def move_subtree(department):
+    """Re-link a department and everything under it after its parent changed"""
+    subtree = list(DepartmentClosure.objects.filter(ancestor_id=department.pk).values_list('descendant_id', 'depth'))
+    if not subtree:
+        # Created before the tree existed
+        attach(department)
+        return
+    ids = [descendant_id for descendant_id, _ in subtree]
+    if department.parent_id in ids:
+        raise ValueError('A department cannot be placed under itself or one of its sub-departments')
+    DepartmentClosure.objects.filter(descendant_id__in=ids).exclude(ancestor_id__in=ids).delete()
+    if department.parent_id:
+        ancestors = DepartmentClosure.objects.filter(descendant_id=department.parent_id).values_list('ancestor_id', 'depth')
+        DepartmentClosure.objects.bulk_create([
+            DepartmentClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ], batch_size=1000)
+
+
+def subtree(department_id):
+    """Subquery of the ids of a department and every department under it, for department_id__in filters"""
+    return DepartmentClosure.objects.filter(ancestor_id=department_id).values('descendant_id')
+
+
+def approval_chain(department_id):
+    """Managers from a department up to the top of the tree, nearest first"""
+    if department_id is None:
+        return []
+    managers = DepartmentClosure.objects.filter(
+        descendant_id=department_id, ancestor__manager__isnull=False,
+    ).order_by('depth').values_list('ancestor__manager_id', flat=True)
+    return list(dict.fromkeys(managers))
+
+
+def rollup(company_id):
+    """{department_id: (headcount, salary cost)} of active employees in each department's whole subtree"""
+    active = Q(descendant__employees__is_active=True)
+    rows = DepartmentClosure.objects.filter(ancestor__company_id=company_id).values('ancestor_id').annotate(
+        headcount=Count('descendant__employees', filter=active),
+        salary_cost=Sum('descendant__employees__salary', filter=active),
+    ).order_by()
+    return {row['ancestor_id']: (row['headcount'], row['salary_cost'] or 0) for row in rows}
+
+
+def closure_links(parents):
+    """(ancestor, descendant, depth) for every pair of a {department: parent} map; a cycle stops at the repeat"""
+    for pk in parents:
+        node, depth, seen = pk, 0, set()
+        while node is not None and node not in seen:
+            seen.add(node)
+            yield node, pk, depth
+            node, depth = parents.get(node), depth + 1
+
+
+def rebuild(company_id=None):
+    """Recompute the closure rows from the parent links, e.g. after departments were bulk loaded.
+
+    Returns the number of rows written.
+    """
+    departments = Department.objects.all()
+    if company_id:
+        departments = departments.filter(company_id=company_id)
+    parents = dict(departments.values_list('pk', 'parent_id'))
+    links = [
+        DepartmentClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+        for ancestor_id, descendant_id, depth in closure_links(parents)
+    ]
+    with transaction.atomic():
+        DepartmentClosure.objects.filter(descendant_id__in=list(parents)).delete()
+        DepartmentClosure.objects.bulk_create(links, batch_size=1000)
+    return len(links)
@@ -0,0 +1,257 @@
+"""
+Attendance rollups for period analytics.
+
+AttendanceDailyRollup keeps one row per company/department/day and
+EmployeeMonthlyRollup one row per employee/month. Attendance and WorkHours
+writes refresh the affected buckets (see core_hr.signals); bulk writers call
+refresh_rollups_for() themselves, and rebuild_rollups() recomputes a whole
+range from the raw rows.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Employee, Attendance, WorkHours, AttendanceDailyRollup, EmployeeMonthlyRollup
+
+ZERO = Decimal('0.00')
+
+STATUS_COUNTS = {
+    'present': Count('id', filter=Q(status='present')),
+    'late': Count('id', filter=Q(status='late')),
+    'absent': Count('id', filter=Q(status='absent')),
+    'half_day': Count('id', filter=Q(status='half_day')),
+}
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _month_end(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def refresh_daily_rollup(company_id, department_id, day):
+    """Recompute one company/department/day bucket from the raw rows"""
+    scope = Q(company_id=company_id, date=day)
+    if department_id is None:
+        scope &= Q(employee__department__isnull=True)
+    else:
+        scope &= Q(employee__department_id=department_id)
+
+    counts = Attendance.objects.filter(scope).aggregate(total_hours=Sum('total_hours'), **STATUS_COUNTS)
+    overtime = WorkHours.objects.filter(scope).aggregate(total=Sum('overtime_hours'))['total']
+
+    lookup = {'company_id': company_id, 'department_id': department_id, 'date': day}
+    if not any(counts[status] for status in STATUS_COUNTS) and not overtime:
+        AttendanceDailyRollup.objects.filter(**lookup).delete()
+        return None
+    rollup, _ = AttendanceDailyRollup.objects.update_or_create(defaults={
+        'present_count': counts['present'],
+        'late_count': counts['late'],
+        'absent_count': counts['absent'],
+        'half_day_count': counts['half_day'],
+        'total_hours': counts['total_hours'] or ZERO,
+        'overtime_hours': overtime or ZERO,
+    }, **lookup)
+    return rollup
+
+
+def refresh_employee_month(employee_id, company_id, month):
+    """Recompute one employee/month bucket from the raw rows"""
+    month = _month_start(month)
+    scope = Q(employee_id=employee_id, date__gte=month, date__lt=_month_end(month))
+
+    counts = Attendance.objects.filter(scope).aggregate(
+        total=Count('id'), total_hours=Sum('total_hours'), **STATUS_COUNTS
+    )
+    overtime = WorkHours.objects.filter(scope).aggregate(total=Sum('overtime_hours'))['total']
+
+    if not counts['total'] and not overtime:
+        EmployeeMonthlyRollup.objects.filter(employee_id=employee_id, month=month).delete()
+        return None
+    rollup, _ = EmployeeMonthlyRollup.objects.update_or_create(
+        employee_id=employee_id,
+        month=month,
+        defaults={
+            'company_id': company_id,
+            'total_days': counts['total'],
+            'present_days': counts['present'],
+            'late_days': counts['late'],
+            'absent_days': counts['absent'],
+            'half_days': counts['half_day'],
+            'total_hours': counts['total_hours'] or ZERO,
+            'overtime_hours': overtime or ZERO,
+        },
+    )
+    return rollup
+
+
+# From this many buckets up, refresh_rollups_for() recomputes them with grouped queries
+GROUPED_REFRESH_MIN_BUCKETS = 8
+
+
+def refresh_rollups_for(keys):
+    """Refresh every bucket touched by a set of (employee_id, date) pairs"""
+    keys = set(keys)
+    if not keys:
+        return
+    employees = {
+        row['id']: row for row in
+        Employee.objects.filter(pk__in={employee_id for employee_id, _ in keys}).values('id', 'company_id', 'department_id')
+    }
+    daily, monthly = set(), set()
+    for employee_id, day in keys:
+        emp = employees.get(employee_id)
+        if emp is None:
+            continue
+        daily.add((emp['company_id'], emp['department_id'], day))
+        monthly.add((employee_id, emp['company_id'], _month_start(day)))
+
+    with transaction.atomic():
+        if len(daily) + len(monthly) >= GROUPED_REFRESH_MIN_BUCKETS:
+            _refresh_grouped(daily, {(employee_id, month) for employee_id, _, month in monthly})
+            return
+        for company_id, department_id, day in daily:
+            refresh_daily_rollup(company_id, department_id, day)
+        for employee_id, company_id, month in monthly:
+            refresh_employee_month(employee_id, company_id, month)
+
+
+def _daily_rows(scope):
+    """{(company_id, department_id, date): unsaved AttendanceDailyRollup} for the rows in scope"""
+    rows = {}
+    for row in (Attendance.objects.filter(scope)
+                .values('company_id', 'employee__department_id', 'date')
+                .annotate(total_hours=Sum('total_hours'), **STATUS_COUNTS).order_by()):
+        key = (row['company_id'], row['employee__department_id'], row['date'])
+        rows[key] = AttendanceDailyRollup(
+            company_id=key[0], department_id=key[1], date=key[2],
+            present_count=row['present'], late_count=row['late'],
+            absent_count=row['absent'], half_day_count=row['half_day'],
+            total_hours=row['total_hours'] or ZERO,
+        )
+    for row in (WorkHours.objects.filter(scope)
+                .values('company_id', 'employee__department_id', 'date')
+                .annotate(overtime=Sum('overtime_hours')).order_by()):
+        if not row['overtime']:
+            continue
+        key = (row['company_id'], row['employee__department_id'], row['date'])
+        rollup = rows.setdefault(key, AttendanceDailyRollup(company_id=key[0], department_id=key[1], date=key[2]))
+        rollup.overtime_hours = row['overtime']
+    return rows
+
+
+def _monthly_rows(scope):
+    """{(employee_id, month): unsaved EmployeeMonthlyRollup} for the rows in scope"""
+    rows = {}
+    for row in (Attendance.objects.filter(scope)
+                .annotate(month=TruncMonth('date'))
+                .values('employee_id', 'company_id', 'month')
+                .annotate(total=Count('id'), total_hours=Sum('total_hours'), **STATUS_COUNTS).order_by()):
+        key = (row['employee_id'], row['month'])
+        rows[key] = EmployeeMonthlyRollup(
+            employee_id=row['employee_id'], company_id=row['company_id'], month=row['month'],
+            total_days=row['total'], present_days=row['present'], late_days=row['late'],
+            absent_days=row['absent'], half_days=row['half_day'],
+            total_hours=row['total_hours'] or ZERO,
+        )
+    for row in (WorkHours.objects.filter(scope)
+                .annotate(month=TruncMonth('date'))
+                .values('employee_id', 'company_id', 'month')
+                .annotate(overtime=Sum('overtime_hours')).order_by()):
+        if not row['overtime']:
+            continue
+        key = (row['employee_id'], row['month'])
+        rollup = rows.setdefault(key, EmployeeMonthlyRollup(
+            employee_id=row['employee_id'], company_id=row['company_id'], month=row['month'],
+        ))
+        rollup.overtime_hours = row['overtime']
+    return rows
+
+
+def _refresh_grouped(daily, monthly):
+    """Recompute the given daily (company, department, date) and monthly (employee, month) buckets"""
+    company_ids = {company_id for company_id, _, _ in daily}
+    days = {day for _, _, day in daily}
+    daily_rows = _daily_rows(Q(company_id__in=company_ids, date__in=days))
+    stale = [
+        pk for pk, company_id, department_id, day in AttendanceDailyRollup.objects.filter(
+            company_id__in=company_ids, date__in=days,
+        ).values_list('pk', 'company_id', 'department_id', 'date')
+        if (company_id, department_id, day) in daily
+    ]
+    AttendanceDailyRollup.objects.filter(pk__in=stale).delete()
+    AttendanceDailyRollup.objects.bulk_create([row for key, row in daily_rows.items() if key in daily], batch_size=1000)
+
+    employee_ids = {employee_id for employee_id, _ in monthly}
+    months = {month for _, month in monthly}
+    monthly_rows = _monthly_rows(Q(employee_id__in=employee_ids, date__gte=min(months), date__lt=_month_end(max(months))))
+    stale = [
+        pk for pk, employee_id, month in EmployeeMonthlyRollup.objects.filter(
+            employee_id__in=employee_ids, month__in=months,
+        ).values_list('pk', 'employee_id', 'month')
+        if (employee_id, month) in monthly
+    ]
+    EmployeeMonthlyRollup.objects.filter(pk__in=stale).delete()
+    EmployeeMonthlyRollup.objects.bulk_create([row for key, row in monthly_rows.items() if key in monthly], batch_size=1000)
+
+
+def rebuild_rollups(company_id=None, date_from=None, date_to=None):
+    """Recompute all rollups (optionally for one company and/or date range) with grouped queries.
+
+    Monthly rollups are rebuilt for every month touching the range. Returns the
+    number of (daily, monthly) rows written.
+    """
+    scope = Q()
+    if company_id:
+        scope &= Q(company_id=company_id)
+    month_scope = Q(scope)
+    if date_from:
+        scope &= Q(date__gte=date_from)
+        month_scope &= Q(date__gte=_month_start(date_from))
+    if date_to:
+        scope &= Q(date__lte=date_to)
+        month_scope &= Q(date__lt=_month_end(_month_start(date_to)))
+
+    daily_rows = _daily_rows(scope)
+    monthly_rows = _monthly_rows(month_scope)
+
+    daily_delete = Q()
+    monthly_delete = Q()
+    if company_id:
+        daily_delete &= Q(company_id=company_id)
+        monthly_delete &= Q(company_id=company_id)
+    if date_from:
+        daily_delete &= Q(date__gte=date_from)
+        monthly_delete &= Q(month__gte=_month_start(date_from))
+    if date_to:
+        daily_delete &= Q(date__lte=date_to)
+        monthly_delete &= Q(month__lte=_month_start(date_to))
+
+    with transaction.atomic():
+        AttendanceDailyRollup.objects.filter(daily_delete).delete()
+        EmployeeMonthlyRollup.objects.filter(monthly_delete).delete()
+        AttendanceDailyRollup.objects.bulk_create(daily_rows.values(), batch_size=1000)
+        EmployeeMonthlyRollup.objects.bulk_create(monthly_rows.values(), batch_size=1000)
+    return len(daily_rows), len(monthly_rows)
+
+
+def summarize_company_attendance(company_id, date_from, date_to, department_id=None):
+    """Totals for a date range read from the daily rollup (a few hundred rows at most per year)"""
+    qs = AttendanceDailyRollup.objects.filter(company_id=company_id, date__gte=date_from, date__lte=date_to)
+    if department_id:
+        qs = qs.filter(department_id=department_id)
+    totals = qs.aggregate(
+        present=Sum('present_count'),
+        late=Sum('late_count'),
+        absent=Sum('absent_count'),
+        half_day=Sum('half_day_count'),
+        total_hours=Sum('total_hours'),
+        overtime_hours=Sum('overtime_hours'),
+    )
+    return {key: value or 0 for key, value in totals.items()}
@@ -0,0 +1,252 @@
+"""
+Shift engine: pairs biometric punches into work sessions.
+
+Punches are assigned to the shift day whose window contains them (see
+ShiftRule), paired in time order into WorkSession rows, and summarized into
+Attendance (first in, last out, paid hours, status) and WorkHours (regular
+and overtime hours). process_days() handles a whole company-day, or a few
+employees of it, in memory and writes the results in bulk; pair_punches()
+and summarize_day() are pure and carry all of the rules.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Attendance, BiometricEvent, BiometricEventArchive, Employee, ShiftRule, WorkHours, WorkSession
+from .attendance import lock_rows, write_atomic
+from .rollups import refresh_rollups_for
+from .stats import bump_company_stats_version, bump_employee_stats_version
+
+# Either side is None for an unpaired punch
+Session = namedtuple('Session', 'check_in check_out')
+DaySummary = namedtuple('DaySummary', 'clock_in clock_out worked_minutes break_minutes regular_minutes overtime_minutes status')
+
+HOUR = Decimal(60)
+CENTS = Decimal('0.01')
+
+
+def _hours(minutes):
+    return (Decimal(minutes) / HOUR).quantize(CENTS)
+
+
+def shift_window(rule, day, tz):
+    """The [start, end) datetimes of a shift day"""
+    start = timezone.make_aware(datetime.combine(day, rule.start_time), tz) - timedelta(minutes=rule.early_start_minutes)
+    return start, start + timedelta(days=1)
+
+
+def shift_day(rule, ts, tz):
+    """The shift day a punch belongs to"""
+    local = timezone.localtime(ts, tz)
+    offset = timedelta(hours=rule.start_time.hour, minutes=rule.start_time.minute) - timedelta(minutes=rule.early_start_minutes)
+    return (local.replace(tzinfo=None) - offset).date()
+
+
+def pair_punches(punches, rule):
+    """Pair time-ordered (timestamp, event_type) punches into Sessions.
+
+    Repeats of the same punch within the debounce window count once (the first
+    check-in, the last check-out). Punches of unknown type alternate between in
+    and out.
+    """
+    debounce = timedelta(seconds=rule.debounce_seconds)
+    max_session = timedelta(hours=rule.max_session_hours)
+    sessions = []
+    open_in = None
+    for ts, event_type in punches:
+        if event_type not in ('checkin', 'checkout'):
+            event_type = 'checkin' if open_in is None else 'checkout'
+        if event_type == 'checkin':
+            if open_in is not None:
+                if ts - open_in <= debounce:
+                    continue
+                sessions.append(Session(open_in, None))
+            open_in = ts
+            continue
+        if open_in is not None and ts - open_in <= max_session:
+            sessions.append(Session(open_in, ts))
+            open_in = None
+            continue
+        if open_in is not None:
+            sessions.append(Session(open_in, None))
+            open_in = None
+        last = sessions[-1] if sessions else None
+        if last and last.check_out is not None and ts - last.check_out <= debounce:
+            sessions[-1] = last._replace(check_out=ts)
+        else:
+            sessions.append(Session(None, ts))
+    if open_in is not None:
+        sessions.append(Session(open_in, None))
+    return sessions
+
+
+def session_minutes(session):
+    if session.check_in is None or session.check_out is None:
+        return 0
+    return int((session.check_out - session.check_in).total_seconds() // 60)
+
+
+def summarize_day(rule, day, sessions, tz):
+    """Attendance figures for one employee's sessions on a shift day"""
+    ins = [s.check_in for s in sessions if s.check_in is not None]
+    outs = [s.check_out for s in sessions if s.check_out is not None]
+    first_in = min(ins) if ins else None
+    last_out = max(outs) if outs else None
+
+    closed = [s for s in sessions if s.check_in is not None and s.check_out is not None]
+    worked = sum(session_minutes(s) for s in closed)
+    if len(closed) == 1 and worked > rule.unpaid_break_minutes:
+        worked -= rule.unpaid_break_minutes
+    span = int((last_out - first_in).total_seconds() // 60) if first_in and last_out and last_out > first_in else 0
+    regular = min(worked, rule.scheduled_minutes)
+
+    if first_in is not None and first_in > (
+        timezone.make_aware(datetime.combine(day, rule.start_time), tz) + timedelta(minutes=rule.late_grace_minutes)
+    ):
+        status = 'late'
+    elif closed and worked * 2 < rule.scheduled_minutes:
+        status = 'half_day'
+    else:
+        status = 'present'
+
+    return DaySummary(
+        clock_in=timezone.localtime(first_in, tz).time() if first_in else None,
+        clock_out=timezone.localtime(last_out, tz).time() if last_out else None,
+        worked_minutes=worked,
+        break_minutes=max(span - worked, 0) if closed else 0,
+        regular_minutes=regular,
+        overtime_minutes=worked - regular,
+        status=status,
+    )
+
+
+class CompanyShiftRules:
+    """The active shift rules of a company, resolved per department"""
+
+    def __init__(self, company_id):
+        self.default = None
+        self.by_department = {}
+        for rule in ShiftRule.objects.filter(company_id=company_id, is_active=True).order_by('pk'):
+            if rule.department_id is None:
+                self.default = self.default or rule
+            else:
+                self.by_department.setdefault(rule.department_id, rule)
+        if self.default is None:
+            self.default = ShiftRule(company_id=company_id, name='Default')
+
+    def for_department(self, department_id):
+        return self.by_department.get(department_id, self.default)
+
+
+def _punches_by_key(company_id, days, rules, tz, employee_ids=None):
+    """{(employee_id, shift day): [(event pk, timestamp, event_type, attendance_id)]} for punches on the given days"""
+    # Wide enough for any shift window; punches are then filtered by their own shift day
+    lo = timezone.make_aware(datetime.combine(min(days) - timedelta(days=1), datetime.min.time()), tz)
+    hi = timezone.make_aware(datetime.combine(max(days) + timedelta(days=2), datetime.min.time()), tz)
+    events = BiometricEvent.objects.filter(
+        company_id=company_id, processed=True, attendance__isnull=False, timestamp__gte=lo, timestamp__lt=hi,
+    )
+    if employee_ids is not None:
+        events = events.filter(attendance__employee_id__in=employee_ids)
+    punches = list(events.order_by('timestamp', 'pk').values_list(
+        'pk', 'timestamp', 'event_type', 'attendance_id', 'attendance__employee_id',
+    ))
+    departments = dict(Employee.objects.filter(pk__in={p[4] for p in punches}).values_list('pk', 'department_id'))
+
+    by_key = defaultdict(list)
+    for pk, ts, event_type, attendance_id, employee_id in punches:
+        day = shift_day(rules.for_department(departments.get(employee_id)), ts, tz)
+        if day in days:
+            by_key[(employee_id, day)].append((pk, ts, event_type, attendance_id))
+    return by_key, departments
+
+
+def process_days(company_id, days, employee_ids=None, rules=None):
+    """Re-pair the punches of a company (or some of its employees) for the given shift days.
+
+    Sessions, Attendance and WorkHours for every employee-day with punches are
+    rewritten in bulk, except Attendance and WorkHours of days HR has corrected
+    (Attendance.manually_corrected), which keep their values. Days before the archive horizon are skipped, since their
+    punches are no longer in the table. Returns {(employee_id, day): Attendance}.
+    """
+    days = set(days)
+    horizon = BiometricEventArchive.horizon_for(company_id)
+    if horizon is not None:
+        days = {day for day in days if day >= timezone.localtime(horizon).date()}
+    if not days:
+        return {}
+    tz = timezone.get_current_timezone()
+    rules = rules or CompanyShiftRules(company_id)
+
+    keys = set(_punches_by_key(company_id, days, rules, tz, employee_ids)[0])
+    if not keys:
+        return {}
+    with write_atomic():
+        attendance = lock_rows(Attendance, company_id, keys)
+        work_hours = lock_rows(WorkHours, company_id, keys)
+        # Read again under the locks: a punch stored since the first read is included, and
+        # one stored from now on waits for this transaction and then reprocesses the day itself
+        employee_ids = {employee_id for employee_id, _ in keys}
+        by_key, departments = _punches_by_key(company_id, days, rules, tz, employee_ids)
+        by_key = {key: rows for key, rows in by_key.items() if key in keys}
+
+        sessions, changed = [], set()
+        for key, rows in by_key.items():
+            employee_id, day = key
+            rule = rules.for_department(departments.get(employee_id))
+            paired = pair_punches([(ts, event_type) for _, ts, event_type, _ in rows], rule)
+            summary = summarize_day(rule, day, paired, tz)
+            sessions.extend(
+                WorkSession(employee_id=employee_id, company_id=company_id, date=day,
+                            check_in=s.check_in, check_out=s.check_out, minutes=session_minutes(s))
+                for s in paired
+            )
+            att, wh = attendance[key], work_hours[key]
+            if att.manually_corrected:
+                continue
+            # Rollups only read the status and the hours
+            before = (att.status, att.total_hours, wh.overtime_hours)
+            att.clock_in, att.clock_out = summary.clock_in, summary.clock_out
+            att.total_hours = _hours(summary.worked_minutes)
+            att.break_duration = timedelta(minutes=summary.break_minutes) if summary.break_minutes else None
+            att.status = summary.status
+            wh.regular_hours = _hours(summary.regular_minutes)
+            wh.overtime_hours = _hours(summary.overtime_minutes)
+            wh.break_hours = _hours(summary.break_minutes)
+            wh.total_hours = wh.regular_hours + wh.overtime_hours
+            if (att.status, att.total_hours, wh.overtime_hours) != before:
+                changed.add(key)
+        recomputed = [key for key in by_key if not attendance[key].manually_corrected]
+        Attendance.objects.bulk_update([attendance[key] for key in recomputed], ['clock_in', 'clock_out', 'total_hours', 'break_duration', 'status'])
+        WorkHours.objects.bulk_update([work_hours[key] for key in recomputed], ['regular_hours', 'overtime_hours', 'break_hours', 'total_hours'])
+
+        # Punches stored against another day (an overnight check-out, or a changed rule) move to their shift day
+        moved = [BiometricEvent(pk=pk, attendance_id=attendance[key].pk)
+                 for key, rows in by_key.items() for pk, _, _, attendance_id in rows if attendance_id != attendance[key].pk]
+        stale_ids = {attendance_id for rows in by_key.values() for _, _, _, attendance_id in rows} - {a.pk for a in attendance.values()}
+        if moved:
+            BiometricEvent.objects.bulk_update(moved, ['attendance'], batch_size=500)
+        # Rows that only existed for punches which have now moved elsewhere
+        stale = list(Attendance.objects.filter(pk__in=stale_ids, notes='', manually_corrected=False, biometric_events__isnull=True).values_list('pk', 'employee_id', 'date'))
+        if stale:
+            Attendance.objects.filter(pk__in=[pk for pk, _, _ in stale]).delete()
+            for _, employee_id, day in stale:
+                WorkHours.objects.filter(employee_id=employee_id, date=day).delete()
+                WorkSession.objects.filter(employee_id=employee_id, date=day).delete()
+
+        WorkSession.objects.filter(company_id=company_id, date__in=days, employee_id__in=employee_ids).delete()
+        WorkSession.objects.bulk_create(sessions, batch_size=1000)
+
+    # Bulk writes skip the model signals
+    refresh_rollups_for(changed | {(employee_id, day) for _, employee_id, day in stale})
+    transaction.on_commit(lambda: _bump_stats(company_id, employee_ids))
+    return attendance
+
+
+def _bump_stats(company_id, employee_ids):
+    bump_company_stats_version(company_id)
+    for employee_id in employee_ids:
+        bump_employee_stats_version(employee_id)
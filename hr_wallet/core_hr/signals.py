@@ -0,0 +1,108 @@
+"""
+Signal handlers that keep cached HR data in step with model writes.
+
+Queryset ``update()``/``bulk_create()`` calls bypass these handlers; code using
+them must call the matching invalidation helper explicitly.
+"""
+from django.conf import settings
+from django.db.models import Max, Min
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    Company, Employee, Department, LeaveRequest, Attendance, LeaveBalance, WorkHours, WorkWeek, Holiday,
+    sync_employee_company,
+)
+from .stats import bump_company_stats_version, bump_employee_stats_version
+from .rollups import refresh_rollups_for, rebuild_rollups
+from .middleware import invalidate_company
+from .workdays import bump_calendar_version
+from .listings import bump_listing_version
+
+
+@receiver([post_save, post_delete], sender=Company)
+def company_changed(sender, instance, **kwargs):
+    invalidate_company(instance.pk)
+    bump_listing_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Employee)
+@receiver([post_save, post_delete], sender=Department)
+def company_row_changed(sender, instance, **kwargs):
+    bump_company_stats_version(instance.company_id)
+    bump_listing_version(instance.company_id)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_employee_company(sender, instance, update_fields=None, **kwargs):
+    """Remember the company an employee is moving away from, if any"""
+    instance._previous_company_id = None
+    if instance.pk is None or (update_fields is not None and 'company' not in update_fields):
+        return
+    previous = Employee.objects.filter(pk=instance.pk).values_list('company_id', flat=True).first()
+    if previous is not None and previous != instance.company_id:
+        instance._previous_company_id = previous
+
+
+@receiver(post_save, sender=Employee)
+def employee_company_moved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_company_id', None)
+    if previous is None:
+        return
+    sync_employee_company(instance.pk, instance.company_id)
+    spans = [
+        model.objects.filter(employee=instance).aggregate(first=Min('date'), last=Max('date'))
+        for model in (Attendance, WorkHours)
+    ]
+    spans = [span for span in spans if span['first']]
+    if spans:
+        first, last = min(span['first'] for span in spans), max(span['last'] for span in spans)
+        for company_id in (previous, instance.company_id):
+            rebuild_rollups(company_id, first, last)
+    bump_company_stats_version(previous)
+    bump_listing_version(previous)
+    bump_employee_stats_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=LeaveRequest)
+@receiver([post_save, post_delete], sender=Attendance)
+def employee_row_changed(sender, instance, **kwargs):
+    bump_company_stats_version(instance.company_id)
+    bump_employee_stats_version(instance.employee_id)
+
+
+@receiver([post_save, post_delete], sender=LeaveBalance)
+@receiver([post_save, post_delete], sender=WorkHours)
+def employee_figures_changed(sender, instance, **kwargs):
+    bump_employee_stats_version(instance.employee_id)
+
+
+@receiver(pre_save, sender=Attendance)
+@receiver(pre_save, sender=WorkHours)
+def remember_rollup_key(sender, instance, update_fields=None, **kwargs):
+    """Remember the bucket a row is in before it is saved, so moving it to another day refreshes both"""
+    instance._previous_rollup_key = None
+    if instance.pk is None or (update_fields is not None and not {'date', 'employee'} & set(update_fields)):
+        return
+    instance._previous_rollup_key = sender.objects.filter(pk=instance.pk).values_list('employee_id', 'date').first()
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=WorkHours)
+def attendance_rollup_changed(sender, instance, **kwargs):
+    keys = {(instance.employee_id, instance.date)}
+    previous = getattr(instance, '_previous_rollup_key', None)
+    if previous:
+        keys.add(previous)
+    refresh_rollups_for(keys)
+
+
+@receiver([post_save, post_delete], sender=WorkWeek)
+@receiver([post_save, post_delete], sender=Holiday)
+def calendar_changed(sender, instance, **kwargs):
+    bump_calendar_version(instance.company_id)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    bump_company_stats_version(instance.company_id)
@@ -0,0 +1,185 @@
+"""
+Dashboard statistics backed by the Django cache.
+
+Every company (and every employee) has a version counter in the cache. Cached
+stats are keyed by that version, so bumping it on writes (see core_hr.signals)
+invalidates all related entries at once without having to know which keys exist.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum, Subquery, OuterRef, Value, DecimalField, IntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Employee, Department, LeaveRequest, Attendance, WorkHours
+from .workdays import attendance_percentage, get_calendar_version
+
+STATS_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', 300)
+EMPLOYEE_STATS_CACHE_TIMEOUT = getattr(settings, 'EMPLOYEE_STATS_CACHE_TIMEOUT', 60)
+
+EMPTY_COMPANY_STATS = {
+    'total_employees': 0,
+    'staff_employees': 0,
+    'total_departments': 0,
+    'pending_leaves': 0,
+    'employees_present_today': 0,
+    'today_attendance': 0,
+    'total_users': 0,
+    'hr_managers': 0,
+}
+
+
+EMPTY_EMPLOYEE_STATS = {
+    'hours_worked': Decimal('0'),
+    'pending_requests': 0,
+    'attendance_percentage': 0,
+    'has_leave_balance': False,
+    'leave_balance': 0,
+    'sick_leave_remaining': 0,
+    'personal_leave_remaining': 0,
+}
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key expired or was never set; anything cached under version 1 is stale
+        cache.add(key, 2, None)
+
+
+def _version_key(company_id):
+    return f'dashboard_stats:version:{company_id}'
+
+
+def _employee_version_key(employee_id):
+    return f'employee_stats:version:{employee_id}'
+
+
+def get_company_stats_version(company_id):
+    """Return the current stats version for a company, initialising it if needed"""
+    return _get_version(_version_key(company_id))
+
+
+def bump_company_stats_version(company_id):
+    """Invalidate all cached stats for a company"""
+    if company_id:
+        _bump_version(_version_key(company_id))
+
+
+def bump_employee_stats_version(employee_id):
+    """Invalidate all cached stats for an employee"""
+    if employee_id:
+        _bump_version(_employee_version_key(employee_id))
+
+
+def get_company_dashboard_stats(company):
+    """Get dashboard counters for a company, served from cache when possible"""
+    if company is None:
+        return dict(EMPTY_COMPANY_STATS)
+
+    today = timezone.now().date()
+    version = get_company_stats_version(company.pk)
+    key = f'dashboard_stats:{company.pk}:{version}:{today.isoformat()}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute_company_stats(company.pk, today)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def _compute_company_stats(company_id, today):
+    """Run the grouped COUNT queries behind the dashboards for one company"""
+    stats = dict(EMPTY_COMPANY_STATS)
+
+    stats.update(Employee.objects.filter(company_id=company_id, is_active=True).aggregate(
+        total_employees=Count('id'),
+        staff_employees=Count('id', filter=~Q(user__role='hr_manager')),
+    ))
+    stats['total_departments'] = Department.objects.filter(company_id=company_id).count()
+    stats['pending_leaves'] = LeaveRequest.objects.filter(
+        company_id=company_id, status='pending'
+    ).count()
+    stats.update(Attendance.objects.filter(company_id=company_id, date=today).aggregate(
+        employees_present_today=Count('id', filter=Q(status='present')),
+        today_attendance=Count('id', filter=Q(status__in=['present', 'late'])),
+    ))
+    stats.update(get_user_model().objects.filter(company_id=company_id).aggregate(
+        total_users=Count('id'),
+        hr_managers=Count('id', filter=Q(role='hr_manager')),
+    ))
+    return stats
+
+
+def get_employee_dashboard_stats(employee, days=30):
+    """Get the employee portal dashboard figures, served from cache when possible"""
+    today = timezone.now().date()
+    version = _get_version(_employee_version_key(employee.pk))
+    # Holidays change the expected working days behind the attendance percentage
+    calendar_version = get_calendar_version(employee.company_id)
+    key = f'employee_stats:{employee.pk}:{version}:{calendar_version}:{days}:{today.isoformat()}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute_employee_stats(employee, today, days)
+        cache.set(key, stats, EMPLOYEE_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def _compute_employee_stats(employee, today, days):
+    """Compute the employee dashboard figures with two aggregated queries"""
+    employee_id = employee.pk
+    stats = dict(EMPTY_EMPLOYEE_STATS)
+
+    # 1) Days present over the last N days, out of the working days in them
+    start = today - timedelta(days=days)
+    present_days = Attendance.objects.filter(
+        employee_id=employee_id,
+        date__gte=start,
+        date__lte=today,
+        status__in=['present', 'late'],
+    ).count()
+    stats['attendance_percentage'] = attendance_percentage(employee, start, today, present_days)
+
+    # 2) Month-to-date hours and pending requests as subqueries, leave balance via join
+    month_hours = WorkHours.objects.filter(
+        employee=OuterRef('pk'),
+        date__gte=today.replace(day=1),
+        date__lte=today,
+    ).order_by().values('employee').annotate(total=Sum('total_hours')).values('total')
+    pending = LeaveRequest.objects.filter(
+        employee=OuterRef('pk'),
+        status='pending',
+    ).order_by().values('employee').annotate(total=Count('id')).values('total')
+
+    row = Employee.objects.filter(pk=employee_id).order_by().annotate(
+        hours_worked=Coalesce(Subquery(month_hours), Value(Decimal('0')), output_field=DecimalField()),
+        pending_requests=Coalesce(Subquery(pending), Value(0), output_field=IntegerField()),
+    ).values(
+        'hours_worked', 'pending_requests', 'leavebalance__id',
+        'leavebalance__annual_leave_total', 'leavebalance__annual_leave_used',
+        'leavebalance__sick_leave_total', 'leavebalance__sick_leave_used',
+        'leavebalance__personal_leave_total', 'leavebalance__personal_leave_used',
+    ).first()
+    if row is None:
+        return stats
+
+    stats['hours_worked'] = row['hours_worked']
+    stats['pending_requests'] = row['pending_requests']
+    if row['leavebalance__id'] is not None:
+        stats['has_leave_balance'] = True
+        stats['leave_balance'] = row['leavebalance__annual_leave_total'] - row['leavebalance__annual_leave_used']
+        stats['sick_leave_remaining'] = row['leavebalance__sick_leave_total'] - row['leavebalance__sick_leave_used']
+        stats['personal_leave_remaining'] = row['leavebalance__personal_leave_total'] - row['leavebalance__personal_leave_used']
+    return stats
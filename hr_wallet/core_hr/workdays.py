@@ -0,0 +1,184 @@
+"""
+Working-day calendar: company work weeks (WorkWeek) and holidays (Holiday).
+
+Each company-year is compiled once into a byte mask with one flag per day
+and cached under a per-company version that core_hr.signals bumps when the
+work week or a holiday changes. A WorkCalendar joins the masks of the years
+it covers and keeps a running total over them, so the working days between
+any two dates are one subtraction, as in numpy.busday_count. Counting for
+thousands of (start, end) pairs at once is a vectorized lookup when NumPy is
+installed and a plain loop otherwise.
+"""
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.core.cache import cache
+
+from .models import Attendance, Employee, Holiday, LeaveRequest, WorkWeek
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_WEEKMASK = '1111100'
+YEAR_CACHE_TIMEOUT = 24 * 3600
+
+
+def _version_key(company_id):
+    return f'workdays:version:{company_id}'
+
+
+def get_calendar_version(company_id):
+    version = cache.get(_version_key(company_id))
+    if version is None:
+        cache.add(_version_key(company_id), 1, None)
+        version = cache.get(_version_key(company_id), 1)
+    return version
+
+
+def bump_calendar_version(company_id):
+    try:
+        cache.incr(_version_key(company_id))
+    except ValueError:
+        cache.add(_version_key(company_id), 2, None)
+
+
+def compile_year(weekmask, holidays, year):
+    """One byte per day of the year: 1 for a working day, 0 otherwise"""
+    first = date(year, 1, 1)
+    length = (date(year + 1, 1, 1) - first).days
+    offset = first.weekday()
+    mask = bytearray(weekmask[(offset + i) % 7] == '1' for i in range(length))
+    for day in holidays:
+        if day.year == year:
+            mask[(day - first).days] = 0
+    return bytes(mask)
+
+
+def year_mask(company_id, year):
+    """The compiled working-day mask of a company-year, from the cache when possible"""
+    key = f'workdays:{company_id}:{get_calendar_version(company_id)}:{year}'
+    mask = cache.get(key)
+    if mask is None:
+        weekmask = WorkWeek.objects.filter(company_id=company_id).values_list('weekmask', flat=True).first()
+        holidays = Holiday.objects.filter(company_id=company_id, date__year=year).values_list('date', flat=True)
+        mask = compile_year(weekmask or DEFAULT_WEEKMASK, holidays, year)
+        cache.set(key, mask, YEAR_CACHE_TIMEOUT)
+    return mask
+
+
+class WorkCalendar:
+    """The working days of one company over the whole years first_year to last_year"""
+
+    def __init__(self, company_id, first_year, last_year=None):
+        last_year = last_year or first_year
+        self.company_id = company_id
+        self.first = date(first_year, 1, 1)
+        self.last_year = last_year
+        self.mask = b''.join(year_mask(company_id, year) for year in range(first_year, last_year + 1))
+        # totals[i] is the number of working days before day i
+        if np is not None:
+            self.totals = np.concatenate(([0], np.cumsum(np.frombuffer(self.mask, dtype=np.uint8), dtype=np.int64)))
+        else:
+            self.totals = [0, *accumulate(self.mask)]
+
+    @classmethod
+    def for_range(cls, company_id, start, end):
+        return cls(company_id, min(start, end).year, max(start, end).year)
+
+    def _index(self, day):
+        index = (day - self.first).days
+        if not 0 <= index < len(self.mask):
+            raise ValueError(f'{day} is outside the calendar ({self.first.year} to {self.last_year})')
+        return index
+
+    def is_working_day(self, day):
+        return bool(self.mask[self._index(day)])
+
+    def count(self, start, end):
+        """Working days from start to end, both included (0 when end is before start)"""
+        if end < start:
+            return 0
+        return int(self.totals[self._index(end) + 1] - self.totals[self._index(start)])
+
+    def count_many(self, starts, ends):
+        """count() for each (start, end) pair, as a list"""
+        if np is None:
+            return [self.count(start, end) for start, end in zip(starts, ends)]
+        origin = self.first.toordinal()
+        s = np.fromiter((d.toordinal() for d in starts), dtype=np.int64) - origin
+        e = np.fromiter((d.toordinal() for d in ends), dtype=np.int64) - origin
+        if len(s) != len(e):
+            raise ValueError('starts and ends differ in length')
+        empty = e < s
+        inside = (s >= 0) & (e < len(self.mask))
+        if not (inside | empty).all():
+            raise ValueError('a range is outside the calendar')
+        s, e = np.where(empty, 0, s), np.where(empty, 0, e)
+        return np.where(empty, 0, self.totals[e + 1] - self.totals[s]).tolist()
+
+    def working_days(self, start, end):
+        first = self._index(start)
+        return [start + timedelta(days=i) for i, flag in enumerate(self.mask[first:self._index(end) + 1]) if flag]
+
+
+def count_working_days(company_id, start, end):
+    """Working days of a company from start to end, both included"""
+    if end < start:
+        return 0
+    return WorkCalendar.for_range(company_id, start, end).count(start, end)
+
+
+def expected_working_days(company_id, start, end, employees=None):
+    """{employee pk: working days from start (or the hire date, if later) to end} for active employees"""
+    if employees is None:
+        employees = Employee.objects.filter(company_id=company_id, is_active=True)
+    rows = list(employees.values_list('pk', 'hire_date'))
+    calendar = WorkCalendar.for_range(company_id, start, end)
+    counts = calendar.count_many([max(start, hire_date or start) for _, hire_date in rows], [end] * len(rows))
+    return {pk: count for (pk, _), count in zip(rows, counts)}
+
+
+def find_absences(company_id, start, end, employees=None):
+    """{employee pk: [working days with no attendance and no approved leave]} for active employees.
+
+    A day counts from the employee's hire date; an Attendance row marked
+    'absent' is an absence too.
+    """
+    if employees is None:
+        employees = Employee.objects.filter(company_id=company_id, is_active=True)
+    rows = list(employees.values_list('pk', 'hire_date'))
+    days = WorkCalendar.for_range(company_id, start, end).working_days(start, end)
+    pks = [pk for pk, _ in rows]
+    attended = set(Attendance.objects.filter(
+        employee_id__in=pks, date__gte=start, date__lte=end,
+    ).exclude(status='absent').values_list('employee_id', 'date'))
+    on_leave = set()
+    for employee_id, leave_start, leave_end in LeaveRequest.objects.filter(
+        employee_id__in=pks, status='approved', start_date__lte=end, end_date__gte=start,
+    ).values_list('employee_id', 'start_date', 'end_date'):
+        on_leave.update((employee_id, day) for day in days if leave_start <= day <= leave_end)
+
+    return {
+        pk: [day for day in days if day >= (hire_date or start) and (pk, day) not in attended and (pk, day) not in on_leave]
+        for pk, hire_date in rows
+    }
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, 'date') else value
+
+
+def attendance_percentage(employee, start, end, present_days=None):
+    """Present and late days as a percentage of the working days from start (or the hire date, if later) to end"""
+    start = max(start, _as_date(employee.hire_date) or start)
+    expected = count_working_days(employee.company_id, start, end)
+    if present_days is None:
+        present_days = Attendance.objects.filter(
+            employee=employee, date__gte=start, date__lte=end, status__in=['present', 'late'],
+        ).count()
+    if not expected:
+        return 0
+    # Days worked on weekends or holidays do not push it past 100
+    return round(min(present_days / expected, 1) * 100, 1)
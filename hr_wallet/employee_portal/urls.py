@@ -14,4 +14,5 @@ urlpatterns = [
     path('api/dashboard-stats/', views.api_dashboard_stats, name='api_dashboard_stats'),
     path('api/recent-attendance/', views.api_recent_attendance, name='api_recent_attendance'),
     path('api/update-profile/', views.api_update_profile, name='api_update_profile'),
+    path('api/submit-leave/', views.api_submit_leave, name='api_submit_leave'),
 ]
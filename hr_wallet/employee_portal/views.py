@@ -3,9 +3,12 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.views.decorators.http import require_http_methods
 from accounts.decorators import require_role, audit_action
-from core_hr.models import Employee, Attendance, LeaveRequest, Payroll, LeaveBalance, WorkHours
+from core_hr.models import Employee, Attendance, LeaveRequest, Payroll, LeaveBalance, WorkHours, EmployeeMonthlyRollup, LEAVE_TYPE_CHOICES
+from core_hr.stats import get_employee_dashboard_stats
 
 
 @login_required
@@ -19,16 +22,15 @@ def dashboard(request):
             'user', 'department', 'company'
         ).get(user=request.user)
 
-        leave_balance = employee.get_leave_balance()
+        stats = get_employee_dashboard_stats(employee)
 
         context = {
             'employee': employee,
-            'hours_worked': employee.get_current_month_hours(),
-            'leave_balance': leave_balance.annual_leave_remaining,
-            'pending_requests': employee.get_pending_leave_requests(),
-            'attendance_percentage': employee.get_attendance_percentage(),
+            'hours_worked': stats['hours_worked'],
+            'leave_balance': stats['leave_balance'],
+            'pending_requests': stats['pending_requests'],
+            'attendance_percentage': stats['attendance_percentage'],
             'current_date': timezone.now().date(),
-            'leave_balance_obj': leave_balance,
         }
     except Employee.DoesNotExist:
         context = {
@@ -38,7 +40,6 @@ def dashboard(request):
             'pending_requests': 0,
             'attendance_percentage': 0,
             'current_date': timezone.now().date(),
-            'leave_balance_obj': None,
             'error': 'Employee profile not found. Please contact HR.'
         }
     except Exception as e:
@@ -49,7 +50,6 @@ def dashboard(request):
             'pending_requests': 0,
             'attendance_percentage': 0,
             'current_date': timezone.now().date(),
-            'leave_balance_obj': None,
             'error': 'Unable to load dashboard data.'
         }
 
@@ -94,13 +94,13 @@ def attendance(request):
         # Get all attendance records with optimized query
         all_attendance = Attendance.objects.filter(employee=employee).order_by('-date')
 
-        # Calculate statistics from all records using database aggregation
-        from django.db.models import Sum, Count, Q
-        stats = all_attendance.aggregate(
-            total_days=Count('id'),
-            present_days=Count('id', filter=Q(status__in=['present', 'late'])),
-            late_days=Count('id', filter=Q(status='late')),
-            absent_days=Count('id', filter=Q(status='absent'))
+        # All-time statistics from the monthly rollup (one row per month instead of one per day)
+        from django.db.models import Sum, F
+        stats = EmployeeMonthlyRollup.objects.filter(employee=employee).aggregate(
+            total_days=Sum('total_days'),
+            present_days=Sum(F('present_days') + F('late_days')),
+            late_days=Sum('late_days'),
+            absent_days=Sum('absent_days')
         )
 
         # Get last 30 days for display
@@ -120,7 +120,7 @@ def attendance(request):
             'late_days': stats['late_days'] or 0,
             'absent_days': stats['absent_days'] or 0,
             'total_hours': total_hours,
-            'attendance_percentage': employee.get_attendance_percentage(),
+            'attendance_percentage': get_employee_dashboard_stats(employee)['attendance_percentage'],
         }
     except Employee.DoesNotExist:
         context = {
@@ -244,15 +244,15 @@ def api_dashboard_stats(request):
             'user', 'department', 'company'
         ).get(user=request.user)
 
-        leave_balance = employee.get_leave_balance()
+        stats = get_employee_dashboard_stats(employee)
 
         data = {
-            'hours_worked': float(employee.get_current_month_hours()),
-            'leave_balance': leave_balance.annual_leave_remaining,
-            'pending_requests': employee.get_pending_leave_requests(),
-            'attendance_percentage': employee.get_attendance_percentage(),
-            'sick_leave_remaining': leave_balance.sick_leave_remaining,
-            'personal_leave_remaining': leave_balance.personal_leave_remaining,
+            'hours_worked': float(stats['hours_worked']),
+            'leave_balance': stats['leave_balance'],
+            'pending_requests': stats['pending_requests'],
+            'attendance_percentage': stats['attendance_percentage'],
+            'sick_leave_remaining': stats['sick_leave_remaining'],
+            'personal_leave_remaining': stats['personal_leave_remaining'],
         }
     except Employee.DoesNotExist:
         data = {
@@ -361,3 +361,43 @@ def api_update_profile(request):
             'success': False,
             'message': f'Error updating profile: {str(e)}'
         })
+
+
+@login_required
+@require_role('employee')
+@require_http_methods(["POST"])
+def api_submit_leave(request):
+    """API endpoint for submitting a leave request; leave overlapping the employee's pending or approved leave is refused"""
+    try:
+        employee = Employee.objects.select_related('company').get(user=request.user)
+    except Employee.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Employee profile not found'}, status=404)
+
+    leave_type = (request.POST.get('leave_type') or '').strip()
+    if leave_type not in dict(LEAVE_TYPE_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Invalid leave type'}, status=400)
+    try:
+        start_date = timezone.datetime.strptime(request.POST.get('start_date') or '', '%Y-%m-%d').date()
+        end_date = timezone.datetime.strptime(request.POST.get('end_date') or '', '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Dates must be in YYYY-MM-DD format'}, status=400)
+
+    leave = LeaveRequest(
+        employee=employee, leave_type=leave_type, start_date=start_date, end_date=end_date,
+        reason=(request.POST.get('reason') or '').strip()[:1000],
+    )
+    try:
+        leave.full_clean(exclude=['days_requested'])
+        leave.save()
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'message': ' '.join(e.messages)}, status=400)
+    except IntegrityError:
+        # Another request for the same days was stored between the check and the save
+        return JsonResponse({'success': False, 'message': 'Overlaps leave already requested.'}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'message': 'Leave request submitted',
+        'leave_id': leave.pk,
+        'days_requested': leave.days_requested,
+    })
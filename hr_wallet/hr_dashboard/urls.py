@@ -19,10 +19,17 @@ urlpatterns = [
     path('api/leaves/<int:pk>/status/', views.change_leave_status_api, name='change_leave_status_api'),
     path('api/leaves/bulk/', views.bulk_change_leaves_api, name='bulk_change_leaves_api'),
     path('api/leaves/export/', views.export_leaves_api, name='export_leaves_api'),
+    path('api/leaves/balance/', views.leave_balance_api, name='leave_balance_api'),
+    path('api/leaves/coverage/', views.leave_coverage_api, name='leave_coverage_api'),
 
     # HR APIs: Attendance
     path('api/attendance/clock-in/', views.attendance_clock_in_api, name='attendance_clock_in_api'),
     path('api/attendance/clock-out/', views.attendance_clock_out_api, name='attendance_clock_out_api'),
     path('api/attendance/update/', views.update_attendance_api, name='update_attendance_api'),
+    path('api/attendance/batch/', views.batch_update_attendance_api, name='batch_update_attendance_api'),
+    path('api/attendance/import/', views.import_attendance_api, name='import_attendance_api'),
     path('api/attendance/export/', views.export_attendance_api, name='export_attendance_api'),
+    path('api/attendance/summary/', views.attendance_summary_api, name='attendance_summary_api'),
+    path('api/attendance/absences/', views.attendance_absences_api, name='attendance_absences_api'),
+    path('api/attendance/live/', views.attendance_live_api, name='attendance_live_api'),
 ]
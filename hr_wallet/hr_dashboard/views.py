@@ -1,10 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Q, Exists, OuterRef
 from django.utils import timezone
 from accounts.decorators import require_role, audit_action
-from core_hr.models import Employee, Department, LeaveRequest, Attendance, BiometricDevice, BiometricEvent
+from core_hr.models import Employee, Department, LeaveRequest, LeaveBalance, LeaveDay, LeaveLedgerEntry, Attendance, BiometricDevice, BiometricEvent
+from core_hr.stats import get_company_dashboard_stats, bump_company_stats_version, bump_employee_stats_version
+from core_hr.rollups import summarize_company_attendance
+from core_hr.live import attendance_snapshot, publish_attendance
+from core_hr.attendance import apply_corrections, record_punch, update_attendance
+from core_hr.imports import AttendanceImporter, ImportFileError, read_rows, write_errors
+from core_hr.workdays import expected_working_days, find_absences
+from core_hr.leave_ledger import balances_as_of, post_cancellation, post_usage
+from core_hr.leave_coverage import coverage, headcounts, peak_team_off
 
 
 @login_required
@@ -13,23 +21,26 @@ from core_hr.models import Employee, Department, LeaveRequest, Attendance, Biome
 def dashboard(request):
     """HR Manager Dashboard with optimized queries"""
     try:
+        company = request.tenant
         # Use select_related to optimize queries for related objects
-        recent_leave_requests = LeaveRequest.objects.select_related(
+        recent_leave_requests = LeaveRequest.objects.filter(
+            company=company
+        ).select_related(
             'employee__user', 'employee__department'
         ).order_by('-created_at')[:5]
 
-        recent_employees = Employee.objects.select_related(
+        recent_employees = Employee.objects.filter(
+            company=company
+        ).select_related(
             'user', 'department', 'company'
         ).order_by('-hire_date')[:5]
 
+        stats = get_company_dashboard_stats(company)
         context = {
-            'total_employees': Employee.objects.filter(is_active=True).count(),
-            'total_departments': Department.objects.count(),
-            'pending_leaves': LeaveRequest.objects.filter(status='pending').count(),
-            'employees_present_today': Attendance.objects.filter(
-                date=timezone.now().date(),
-                status='present'
-            ).count(),
+            'total_employees': stats['total_employees'],
+            'total_departments': stats['total_departments'],
+            'pending_leaves': stats['pending_leaves'],
+            'employees_present_today': stats['employees_present_today'],
             'recent_leave_requests': recent_leave_requests,
             'recent_employees': recent_employees,
         }
@@ -56,7 +67,7 @@ def manage_employees(request):
         # Filter by company for security
         employees = Employee.objects.filter(
             is_active=True, 
-            company=request.user.company
+            company=request.tenant
         ).select_related(
             'user', 'department', 'company'
         ).order_by('employee_id')
@@ -83,7 +94,7 @@ def departments(request):
 @require_role('hr_manager')
 def biometric_monitor(request):
     """Read-only Biometric monitoring page for HR Managers with real-time device status."""
-    devices = BiometricDevice.objects.filter(company=request.user.company)
+    devices = BiometricDevice.objects.filter(company=request.tenant)
     return render(request, 'hr_dashboard/biometric.html', {
         'devices': devices
     })
@@ -96,9 +107,12 @@ def leave_approvals(request):
     """Leave Approval Management with optimized queries"""
     try:
         # Use select_related for all related objects
-        pending_leaves = LeaveRequest.objects.filter(status='pending').select_related(
+        pending_leaves = list(LeaveRequest.objects.filter(company=request.tenant, status='pending').select_related(
             'employee__user', 'employee__department', 'employee__company'
-        ).order_by('-created_at')
+        ).order_by('-created_at'))
+        team_off = peak_team_off(pending_leaves)
+        for leave in pending_leaves:
+            leave.team_off = team_off.get(leave.pk, 0)
 
         return render(request, 'hr_dashboard/leave_approvals.html', {
             'pending_leaves': pending_leaves
@@ -125,29 +139,34 @@ def attendance_overview(request):
         dept_id = (request.GET.get('department_id') or '').strip()
         q = (request.GET.get('q') or '').strip()
 
-        employees_qs = Employee.objects.filter(is_active=True, company=request.user.company).select_related('user', 'department', 'company')
+        employees_qs = Employee.objects.filter(is_active=True, company=request.tenant).select_related('user', 'department', 'company')
         if dept_id:
             employees_qs = employees_qs.filter(department_id=dept_id)
         if q:
             employees_qs = employees_qs.filter(Q(user__first_name__icontains=q) | Q(user__last_name__icontains=q) | Q(employee_id__icontains=q))
         employees_qs = employees_qs.order_by('employee_id')
 
-        attendance_qs = Attendance.objects.filter(employee__company=request.user.company, date=target_date).select_related('employee__user', 'employee__department')
+        attendance_qs = Attendance.objects.filter(company=request.tenant, date=target_date).annotate(
+            from_biometric=Exists(BiometricEvent.objects.filter(attendance=OuterRef('pk')))
+        )
         if status_filter in ['present', 'absent', 'late', 'half_day']:
             attendance_qs = attendance_qs.filter(status=status_filter)
-        attendance_by_emp = {a.employee.pk: a for a in attendance_qs}
+        attendance_by_emp = {a.employee_id: a for a in attendance_qs}
 
         rows = []
         for emp in employees_qs:
             rows.append({'employee': emp, 'attendance': attendance_by_emp.get(emp.pk)})
 
-        departments = Department.objects.filter(company=request.user.company, is_active=True).order_by('name')
-        present_today = Attendance.objects.filter(employee__company=request.user.company, date=target_date, status__in=['present', 'late']).count()
+        departments = Department.objects.filter(company=request.tenant, is_active=True).order_by('name')
+        day_totals = summarize_company_attendance(request.tenant.pk if request.tenant else None, target_date, target_date)
+        present_today = day_totals['present'] + day_totals['late']
 
         return render(request, 'hr_dashboard/attendance.html', {
             'rows': rows,
             'departments': departments,
             'present_today': present_today,
+            'late_today': day_totals['late'],
+            'absent_today': day_totals['absent'],
             'today': target_date,
             'filters': {
                 'date': target_date.strftime('%Y-%m-%d'),
@@ -175,13 +194,43 @@ def create_employee(request):
 
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse, HttpResponse
-from django.db import transaction
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Q, F, Sum
 import json
 import csv
 from io import StringIO
 
 
+# Leave types that draw down a LeaveBalance counter
+LEAVE_BALANCE_FIELDS = {
+    'annual': 'annual_leave_used',
+    'sick': 'sick_leave_used',
+    'personal': 'personal_leave_used',
+}
+
+
+def _apply_leave_usage(usage):
+    """Add approved days to LeaveBalance counters.
+
+    ``usage`` maps employee_id -> {leave_type: days}. Each employee gets one
+    F()-expression UPDATE, so concurrent approvals never overwrite each other.
+    """
+    for employee_id, per_type in usage.items():
+        changes = {
+            LEAVE_BALANCE_FIELDS[leave_type]: F(LEAVE_BALANCE_FIELDS[leave_type]) + days
+            for leave_type, days in per_type.items()
+            if leave_type in LEAVE_BALANCE_FIELDS and days
+        }
+        if changes:
+            LeaveBalance.objects.filter(employee_id=employee_id).update(updated_at=timezone.now(), **changes)
+
+
+def _invalidate_leave_stats(company_id, employee_ids):
+    bump_company_stats_version(company_id)
+    for employee_id in employee_ids:
+        bump_employee_stats_version(employee_id)
+
+
 @login_required
 @require_role('hr_manager')
 @require_http_methods(["PATCH"])
@@ -192,38 +241,42 @@ def change_leave_status_api(request, pk):
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
     new_status = (data.get('status') or '').lower()
-    if new_status not in ['approved', 'rejected']:
+    if new_status not in ['approved', 'rejected', 'cancelled']:
         return JsonResponse({'error': 'Invalid status'}, status=400)
 
     leave = get_object_or_404(
         LeaveRequest.objects.select_related('employee__user', 'employee__company'),
         pk=pk,
-        employee__company=request.user.company
+        company=request.tenant
     )
 
-    if leave.status != 'pending':
-        return JsonResponse({'error': 'Only pending requests can be updated'}, status=400)
-
-    with transaction.atomic():
-        leave.status = new_status
-        leave.approved_by = request.user
-        leave.save()
-
-        # Adjust leave balance on approval
-        if new_status == 'approved':
-            lb = None
-            try:
-                lb = getattr(leave.employee, 'leavebalance', None)
-            except Exception:
-                lb = None
-            if lb:
-                if leave.leave_type == 'annual':
-                    lb.annual_leave_used = (lb.annual_leave_used or 0) + leave.days_requested
-                elif leave.leave_type == 'sick':
-                    lb.sick_leave_used = (lb.sick_leave_used or 0) + leave.days_requested
-                elif leave.leave_type == 'personal':
-                    lb.personal_leave_used = (lb.personal_leave_used or 0) + leave.days_requested
-                lb.save()
+    current = 'approved' if new_status == 'cancelled' else 'pending'
+    try:
+        with transaction.atomic():
+            # Claimed with a conditional UPDATE, so two reviewers cannot both apply the same request
+            claimed = LeaveRequest.objects.filter(pk=leave.pk, status=current).update(
+                status=new_status,
+                approved_by=request.user,
+                updated_at=timezone.now(),
+            )
+            if not claimed:
+                message = 'Only approved requests can be cancelled' if new_status == 'cancelled' else 'Only pending requests can be updated'
+                return JsonResponse({'error': message}, status=400)
+
+            LeaveDay.sync_for([leave.pk])
+            if new_status == 'approved':
+                _apply_leave_usage({leave.employee_id: {leave.leave_type: leave.days_requested}})
+                post_usage([leave], request.user)
+            elif new_status == 'cancelled':
+                _apply_leave_usage({leave.employee_id: {leave.leave_type: -leave.days_requested}})
+                post_cancellation(leave, request.user)
+            transaction.on_commit(lambda: _invalidate_leave_stats(leave.company_id, {leave.employee_id}))
+    except IntegrityError:
+        # Leave booked before overlaps were rejected can still clash with other leave
+        clash = LeaveDay.clashes_for([leave.pk]).get(leave.pk)
+        if clash is None:
+            raise
+        return JsonResponse({'error': f'Overlaps leave already booked for {clash:%Y-%m-%d}', 'date': clash.strftime('%Y-%m-%d')}, status=409)
 
     return JsonResponse({'success': True})
 
@@ -242,39 +295,115 @@ def bulk_change_leaves_api(request):
     if not isinstance(ids, list) or status_target not in ['approved', 'rejected']:
         return JsonResponse({'error': 'ids (list) and valid status are required'}, status=400)
 
-    leaves = LeaveRequest.objects.filter(
-        id__in=ids, status='pending', employee__company=request.user.company
-    )
-
-    updated = 0
     with transaction.atomic():
-        for leave in leaves.select_related('employee'):
-            leave.status = status_target
-            leave.approved_by = request.user
-            leave.save()
-            updated += 1
-            if status_target == 'approved':
-                try:
-                    lb = getattr(leave.employee, 'leavebalance', None)
-                    if lb:  # Only proceed if leave balance exists
-                        if leave.leave_type == 'annual':
-                            lb.annual_leave_used = (lb.annual_leave_used or 0) + leave.days_requested
-                        elif leave.leave_type == 'sick':
-                            lb.sick_leave_used = (lb.sick_leave_used or 0) + leave.days_requested
-                        elif leave.leave_type == 'personal':
-                            lb.personal_leave_used = (lb.personal_leave_used or 0) + leave.days_requested
-                        lb.save()
-                except Exception:
-                    pass
-
-    return JsonResponse({'success': True, 'updated': updated})
+        # Lock the pending rows so a concurrent approval cannot double count them
+        targets = dict(
+            LeaveRequest.objects.select_for_update(of=('self',)).filter(
+                id__in=ids, status='pending', company=request.tenant
+            ).values_list('id', 'employee_id')
+        )
+        # Leave booked before overlaps were rejected can still clash with other leave; it stays pending
+        skipped = LeaveDay.clashes_for(targets) if status_target == 'approved' else {}
+        target_ids = [leave_id for leave_id in targets if leave_id not in skipped]
+
+        # Sum approved days per (employee, leave_type) before flipping the status
+        usage = {}
+        if status_target == 'approved' and target_ids:
+            totals = LeaveRequest.objects.filter(
+                id__in=target_ids, leave_type__in=list(LEAVE_BALANCE_FIELDS)
+            ).values('employee_id', 'leave_type').annotate(days=Sum('days_requested')).order_by()
+            for row in totals:
+                usage.setdefault(row['employee_id'], {})[row['leave_type']] = row['days']
+
+        updated = LeaveRequest.objects.filter(id__in=target_ids).update(
+            status=status_target,
+            approved_by=request.user,
+            updated_at=timezone.now(),
+        )
+        LeaveDay.sync_for(target_ids)
+        _apply_leave_usage(usage)
+        if status_target == 'approved':
+            post_usage(LeaveRequest.objects.filter(id__in=target_ids), request.user)
+        # Queryset updates skip post_save, so invalidate the cached counters here
+        company_id = request.tenant.pk if request.tenant else None
+        transaction.on_commit(lambda: _invalidate_leave_stats(company_id, {targets[i] for i in target_ids}))
+
+    return JsonResponse({
+        'success': True,
+        'updated': updated,
+        'skipped': [{'id': leave_id, 'date': day.strftime('%Y-%m-%d')} for leave_id, day in sorted(skipped.items())],
+    })
+
+
+@login_required
+@require_role('hr_manager')
+@require_http_methods(["GET"])
+def leave_balance_api(request):
+    """An employee's leave balances on a date (default today) and the ledger entries behind the latest changes"""
+    employee_pk = request.GET.get('employee_pk')
+    if not employee_pk:
+        return JsonResponse({'error': 'employee_pk is required'}, status=400)
+    emp = _get_employee_for_company_or_404(request, employee_pk)
+    as_of = _parse_date(request.GET.get('as_of'))
+
+    balances = balances_as_of([emp.pk], as_of)
+    entries = LeaveLedgerEntry.objects.filter(employee=emp, date__lte=as_of).order_by('-date', '-pk')[:50]
+    return JsonResponse({
+        'employee_pk': emp.pk,
+        'as_of': as_of.strftime('%Y-%m-%d'),
+        'balances': {leave_type: str(balance) for (_, leave_type), balance in sorted(balances.items())},
+        'entries': [{
+            'date': entry.date.strftime('%Y-%m-%d'),
+            'leave_type': entry.leave_type,
+            'kind': entry.kind,
+            'days': str(entry.days),
+            'leave_request': entry.leave_request_id,
+            'note': entry.note,
+        } for entry in entries],
+    })
+
+
+@login_required
+@require_role('hr_manager')
+@require_http_methods(["GET"])
+def leave_coverage_api(request):
+    """People off per day and department over a period, with each department's headcount"""
+    date_from = _parse_date(request.GET.get('date_from'))
+    date_to = _parse_date(request.GET.get('date_to') or (date_from + timedelta(days=30)).strftime('%Y-%m-%d'))
+    if date_from > date_to:
+        return JsonResponse({'error': 'date_from must not be after date_to'}, status=400)
+    if (date_to - date_from).days > 366:
+        return JsonResponse({'error': 'The period can span at most one year'}, status=400)
+    statuses = ('pending', 'approved') if request.GET.get('include_pending') in ('1', 'true') else ('approved',)
+    dept_id = request.GET.get('department_id')
+    if dept_id and not dept_id.isdigit():
+        return JsonResponse({'error': 'department_id must be a number'}, status=400)
+    department_ids = [int(dept_id)] if dept_id else None
+
+    off = coverage(request.tenant.pk, date_from, date_to, department_ids, statuses)
+    days = {}
+    for (day, department_id), count in sorted(off.items(), key=lambda item: item[0][0]):
+        row = days.setdefault(day, {'date': day.strftime('%Y-%m-%d'), 'total': 0, 'departments': {}})
+        row['departments'][str(department_id) if department_id else 'unassigned'] = count
+        row['total'] += count
+    counts = headcounts(request.tenant.pk)
+    departments = Department.objects.filter(company=request.tenant, is_active=True).order_by('name')
+    if department_ids is not None:
+        departments = departments.filter(pk__in=department_ids)
+    return JsonResponse({
+        'date_from': date_from.strftime('%Y-%m-%d'),
+        'date_to': date_to.strftime('%Y-%m-%d'),
+        'statuses': list(statuses),
+        'departments': [{'id': d.pk, 'name': d.name, 'headcount': counts.get(d.pk, 0)} for d in departments],
+        'days': list(days.values()),
+    })
 
 
 @login_required
 @require_role('hr_manager')
 @require_http_methods(["GET"])
 def export_leaves_api(request):
-    qs = LeaveRequest.objects.filter(employee__company=request.user.company).select_related('employee__user', 'employee__department')
+    qs = LeaveRequest.objects.filter(company=request.tenant).select_related('employee__user', 'employee__department')
 
     status_filter = (request.GET.get('status') or '').lower()
     if status_filter in ['pending', 'approved', 'rejected']:
@@ -309,12 +438,13 @@ def export_leaves_api(request):
     return resp
 
 # -------------------- Attendance APIs --------------------
-from decimal import Decimal
 from datetime import datetime, timedelta
+from django.db.models.functions import TruncMonth
+from core_hr.models import AttendanceDailyRollup
 
 
 def _get_employee_for_company_or_404(request, employee_pk):
-    return get_object_or_404(Employee.objects.select_related('company'), pk=employee_pk, company=request.user.company)
+    return get_object_or_404(Employee.objects.select_related('company'), pk=employee_pk, company=request.tenant)
 
 
 def _parse_date(value):
@@ -335,20 +465,6 @@ def _parse_time(value):
         return None
 
 
-def _recompute_total_hours(att):
-    if att.clock_in and att.clock_out:
-        dt_in = datetime.combine(att.date, att.clock_in)
-        dt_out = datetime.combine(att.date, att.clock_out)
-        if dt_out < dt_in:
-            dt_out = dt_out + timedelta(days=1)
-        delta = dt_out - dt_in
-        if att.break_duration:
-            delta -= att.break_duration
-        hours = Decimal(delta.total_seconds() / 3600.0).quantize(Decimal('0.01'))
-        att.total_hours = hours
-    return att
-
-
 @login_required
 @require_role('hr_manager')
 @require_http_methods(["POST"])
@@ -361,12 +477,8 @@ def attendance_clock_in_api(request):
     t = _parse_time(data.get('time')) or timezone.now().time()
 
     emp = _get_employee_for_company_or_404(request, employee_pk)
-    att, _created = Attendance.objects.get_or_create(employee=emp, date=target_date)
-    att.clock_in = t
-    # simple status heuristic
-    att.status = att.status or 'present'
-    att = _recompute_total_hours(att)
-    att.save()
+    att = record_punch(emp, target_date, clock_in=t)
+    publish_attendance(att)
     return JsonResponse({'success': True})
 
 
@@ -382,10 +494,8 @@ def attendance_clock_out_api(request):
     t = _parse_time(data.get('time')) or timezone.now().time()
 
     emp = _get_employee_for_company_or_404(request, employee_pk)
-    att, _created = Attendance.objects.get_or_create(employee=emp, date=target_date)
-    att.clock_out = t
-    att = _recompute_total_hours(att)
-    att.save()
+    att = record_punch(emp, target_date, clock_out=t)
+    publish_attendance(att)
     return JsonResponse({'success': True})
 
 
@@ -400,33 +510,163 @@ def update_attendance_api(request):
     target_date = _parse_date(data.get('date'))
 
     emp = _get_employee_for_company_or_404(request, employee_pk)
-    att, _ = Attendance.objects.get_or_create(employee=emp, date=target_date)
 
     ci = _parse_time(data.get('clock_in'))
     co = _parse_time(data.get('clock_out'))
     status = data.get('status')
     notes = data.get('notes')
 
+    fields = {}
     if ci is not None:
-        att.clock_in = ci
+        fields['clock_in'] = ci
     if co is not None:
-        att.clock_out = co
+        fields['clock_out'] = co
     if status in ['present', 'absent', 'late', 'half_day']:
-        att.status = status
+        fields['status'] = status
     if notes is not None:
-        att.notes = notes
+        fields['notes'] = notes
 
-    att = _recompute_total_hours(att)
-    att.save()
+    att = update_attendance(emp, target_date, **fields)
+    publish_attendance(att)
     return JsonResponse({'success': True})
 
 
+ATTENDANCE_BATCH_LIMIT = 2000
+IMPORT_ERRORS_SHOWN = 200
+ATTENDANCE_STATUSES = ['present', 'absent', 'late', 'half_day']
+
+
+def _parse_correction(row, employees):
+    """((employee_pk, date), fields) for one batch row, or raise ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError('row must be an object')
+    emp = employees.get(str(row.get('employee_pk')))
+    if emp is None:
+        raise ValueError('employee not found')
+    try:
+        day = datetime.strptime(row.get('date') or '', '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('date must be YYYY-MM-DD')
+    fields = {}
+    for name in ('clock_in', 'clock_out'):
+        if name not in row:
+            continue
+        # An explicit null clears the time
+        if row[name] is None:
+            fields[name] = None
+            continue
+        t = _parse_time(row[name])
+        if t is None:
+            raise ValueError(f'{name} must be HH:MM')
+        fields[name] = t
+    if 'status' in row:
+        if row['status'] not in ATTENDANCE_STATUSES:
+            raise ValueError(f"status must be one of {', '.join(ATTENDANCE_STATUSES)}")
+        fields['status'] = row['status']
+    if 'notes' in row:
+        fields['notes'] = str(row['notes'] or '')
+    return (emp.pk, day), fields
+
+
+def _json_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+@login_required
+@require_role('hr_manager')
+@require_http_methods(["POST"])
+def batch_update_attendance_api(request):
+    """Apply many attendance corrections at once: {"rows": [{employee_pk, date, clock_in, clock_out, status, notes}]}.
+
+    Either every row is applied or, if any row is invalid, none is. Each row
+    in the response lists the fields it changed as {field: [old, new]}.
+    """
+    try:
+        rows = json.loads(request.body or '{}').get('rows')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    if not isinstance(rows, list) or not rows:
+        return JsonResponse({'error': 'rows must be a non-empty list'}, status=400)
+    if len(rows) > ATTENDANCE_BATCH_LIMIT:
+        return JsonResponse({'error': f'At most {ATTENDANCE_BATCH_LIMIT} rows per batch'}, status=400)
+
+    employee_pks = {str(row.get('employee_pk')) for row in rows if isinstance(row, dict)}
+    employees = {
+        str(emp.pk): emp for emp in
+        Employee.objects.filter(company=request.tenant, pk__in=[pk for pk in employee_pks if pk.isdigit()])
+    }
+    corrections, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            corrections.append(_parse_correction(row, employees))
+        except ValueError as e:
+            errors.append({'row': index, 'error': str(e)})
+    if errors:
+        return JsonResponse({'error': 'Invalid rows, nothing was applied', 'rows': errors}, status=400)
+
+    results = apply_corrections(request.tenant.pk, corrections)
+    data = []
+    for att, created, changes in results:
+        if changes or created:
+            publish_attendance(att)
+        data.append({
+            'employee_pk': att.employee_id,
+            'date': att.date.isoformat(),
+            'created': created,
+            'changes': {field: [_json_value(old), _json_value(new)] for field, (old, new) in changes.items()},
+        })
+    return JsonResponse({
+        'success': True,
+        'updated': sum(1 for row in data if row['changes'] or row['created']),
+        'unchanged': sum(1 for row in data if not (row['changes'] or row['created'])),
+        'rows': data,
+    })
+
+
+@login_required
+@require_role('hr_manager')
+@require_http_methods(["POST"])
+def import_attendance_api(request):
+    """Import a CSV/XLSX timesheet uploaded as "file"; dry_run=1 only checks it.
+
+    With errors=csv, skipped rows come back as a CSV file instead of in the
+    JSON summary (which lists the first IMPORT_ERRORS_SHOWN of them).
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'file is required'}, status=400)
+    dry_run = request.POST.get('dry_run') in ['1', 'true', 'yes']
+    importer = AttendanceImporter(request.tenant.pk, dry_run=dry_run, date_format=request.POST.get('date_format') or '%Y-%m-%d')
+    try:
+        header, rows = read_rows(upload.file, upload.name)
+        result = importer.run(header, rows)
+    except ImportFileError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if result.errors and request.POST.get('errors') == 'csv':
+        buffer = StringIO()
+        write_errors(buffer, header, result.errors)
+        resp = HttpResponse(buffer.getvalue(), content_type='text/csv')
+        resp['Content-Disposition'] = 'attachment; filename="attendance_import_errors.csv"'
+        return resp
+    return JsonResponse({
+        'success': True,
+        'dry_run': dry_run,
+        'rows': result.rows,
+        'imported': result.imported,
+        'skipped': len(result.errors),
+        'errors': [{'line': line, 'error': message} for line, message, _ in result.errors[:IMPORT_ERRORS_SHOWN]],
+    })
+
+
 @login_required
 @require_role('hr_manager')
 @require_http_methods(["GET"])
 def export_attendance_api(request):
     target_date = _parse_date(request.GET.get('date'))
-    qs = Attendance.objects.filter(employee__company=request.user.company, date=target_date).select_related('employee__user', 'employee__department')
+    qs = Attendance.objects.filter(company=request.tenant, date=target_date).select_related('employee__user', 'employee__department')
 
     status_filter = (request.GET.get('status') or '').lower()
     if status_filter in ['present', 'absent', 'late', 'half_day']:
@@ -464,6 +704,99 @@ def export_attendance_api(request):
     return resp
 
 
+@login_required
+@require_role('hr_manager')
+@require_http_methods(["GET"])
+def attendance_summary_api(request):
+    """Attendance totals for a period, grouped by day or month, read from the daily rollup"""
+    today = timezone.now().date()
+    date_to = _parse_date(request.GET.get('date_to'))
+    date_from = _parse_date(request.GET.get('date_from') or (today - timedelta(days=30)).strftime('%Y-%m-%d'))
+    if date_from > date_to:
+        return JsonResponse({'error': 'date_from must not be after date_to'}, status=400)
+    group = request.GET.get('group', 'day')
+    if group not in ['day', 'month']:
+        return JsonResponse({'error': 'group must be day or month'}, status=400)
+
+    qs = AttendanceDailyRollup.objects.filter(company=request.tenant, date__gte=date_from, date__lte=date_to)
+    dept_id = request.GET.get('department_id')
+    if dept_id:
+        if not dept_id.isdigit():
+            return JsonResponse({'error': 'department_id must be a number'}, status=400)
+        qs = qs.filter(department_id=dept_id)
+
+    period = TruncMonth('date') if group == 'month' else F('date')
+    rows = qs.annotate(period=period).values('period').annotate(
+        present=Sum('present_count'),
+        late=Sum('late_count'),
+        absent=Sum('absent_count'),
+        half_day=Sum('half_day_count'),
+        total_hours=Sum('total_hours'),
+        overtime_hours=Sum('overtime_hours'),
+    ).order_by('period')
+
+    results = [{
+        'period': row['period'].strftime('%Y-%m' if group == 'month' else '%Y-%m-%d'),
+        'present': row['present'],
+        'late': row['late'],
+        'absent': row['absent'],
+        'half_day': row['half_day'],
+        'total_hours': str(row['total_hours']),
+        'overtime_hours': str(row['overtime_hours']),
+    } for row in rows]
+    return JsonResponse({
+        'date_from': date_from.strftime('%Y-%m-%d'),
+        'date_to': date_to.strftime('%Y-%m-%d'),
+        'group': group,
+        'results': results,
+    })
+
+
+@login_required
+@require_role('hr_manager')
+@require_http_methods(["GET"])
+def attendance_absences_api(request):
+    """Working days each active employee missed in a period (no attendance and no approved leave)"""
+    today = timezone.now().date()
+    date_to = _parse_date(request.GET.get('date_to'))
+    date_from = _parse_date(request.GET.get('date_from') or (today - timedelta(days=30)).strftime('%Y-%m-%d'))
+    if date_from > date_to:
+        return JsonResponse({'error': 'date_from must not be after date_to'}, status=400)
+    if (date_to - date_from).days > 366:
+        return JsonResponse({'error': 'The period can span at most one year'}, status=400)
+
+    employees = Employee.objects.filter(company=request.tenant, is_active=True)
+    dept_id = request.GET.get('department_id')
+    if dept_id:
+        if not dept_id.isdigit():
+            return JsonResponse({'error': 'department_id must be a number'}, status=400)
+        employees = employees.filter(department_id=dept_id)
+    expected = expected_working_days(request.tenant.pk, date_from, date_to, employees)
+    absences = find_absences(request.tenant.pk, date_from, date_to, employees)
+    results = [{
+        'employee_pk': pk,
+        'expected_days': expected[pk],
+        'absent_days': len(days),
+        'dates': [day.strftime('%Y-%m-%d') for day in days],
+    } for pk, days in absences.items() if days]
+    return JsonResponse({
+        'date_from': date_from.strftime('%Y-%m-%d'),
+        'date_to': date_to.strftime('%Y-%m-%d'),
+        'employees': len(expected),
+        'results': sorted(results, key=lambda row: -row['absent_days']),
+    })
+
+
+@login_required
+@require_role('hr_manager')
+@require_http_methods(["GET"])
+def attendance_live_api(request):
+    """Snapshot for the live attendance board; later changes arrive as deltas on the attendance topic"""
+    if request.tenant is None:
+        return JsonResponse({'error': 'No company selected'}, status=400)
+    return JsonResponse(attendance_snapshot(request.tenant.pk, _parse_date(request.GET.get('date'))))
+
+
 @login_required
 @require_role('hr_manager')
 def biometric_attendance_dashboard(request):
@@ -474,7 +807,7 @@ def biometric_attendance_dashboard(request):
     date_to = request.GET.get('date_to')
     employee_id = request.GET.get('employee_id')
     status = request.GET.get('status')
-    events = BiometricEvent.objects.filter(company=request.user.company)
+    events = BiometricEvent.objects.filter(company=request.tenant)
     if device_id:
         events = events.filter(device_id=device_id)
     if date_from:
@@ -486,8 +819,8 @@ def biometric_attendance_dashboard(request):
     if status:
         events = events.filter(event_type=status)
     events = events.select_related('device', 'attendance').order_by('-timestamp')[:200]
-    devices = BiometricDevice.objects.filter(company=request.user.company)
-    employees = Employee.objects.filter(company=request.user.company, is_active=True)
+    devices = BiometricDevice.objects.filter(company=request.tenant)
+    employees = Employee.objects.filter(company=request.tenant, is_active=True)
     return render(request, 'hr_dashboard/biometric_attendance.html', {
         'events': events,
         'devices': devices,
@@ -542,21 +875,7 @@ def hr_profile(request):
         ).order_by('-timestamp')[:10]
 
         # Get statistics for HR dashboard
-        total_employees = Employee.objects.filter(
-            company=request.user.company,
-            is_active=True
-        ).exclude(user__role='hr_manager').count()
-
-        pending_leaves = LeaveRequest.objects.filter(
-            employee__company=request.user.company,
-            status='pending'
-        ).count()
-
-        today_attendance = Attendance.objects.filter(
-            employee__company=request.user.company,
-            date=timezone.now().date(),
-            status__in=['present', 'late']
-        ).count()
+        stats = get_company_dashboard_stats(request.tenant)
 
         # Get salary information if available
         from payroll.models import EmployeeSalary
@@ -571,9 +890,9 @@ def hr_profile(request):
             'recent_activities': recent_activities,
             'current_salary': current_salary,
             'stats': {
-                'total_employees': total_employees,
-                'pending_leaves': pending_leaves,
-                'today_attendance': today_attendance,
+                'total_employees': stats['staff_employees'],
+                'pending_leaves': stats['pending_leaves'],
+                'today_attendance': stats['today_attendance'],
             }
         }
 
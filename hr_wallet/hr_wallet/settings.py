@@ -48,12 +48,31 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core_hr.middleware.TenantMiddleware',
     'accounts.middleware.RoleBasedAccessMiddleware',
     'accounts.middleware.SecurityAuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# URL prefix routing for accounts.middleware, compiled once into accounts.routing.RouteTable
+ROLE_URL_PATTERNS = {
+    'super_admin': ['/admin-panel/'],
+    'hr_manager': ['/hr-dashboard/'],
+    'employee': ['/employee-portal/'],
+}
+PUBLIC_URL_PREFIXES = [
+    '/accounts/company-selection/',
+    '/accounts/login/',
+    '/accounts/logout/',
+    '/login/',
+    '/logout/',
+    '/admin/',
+    '/static/',
+    '/media/',
+]
+AUDITED_URL_PREFIXES = ['/admin-panel/', '/hr-dashboard/', '/employee-portal/']
+
 ROOT_URLCONF = 'hr_wallet.urls'
 
 TEMPLATES = [
@@ -80,6 +99,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
@@ -151,7 +173,8 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            # Enqueues records; a listener thread does the file writes (see accounts.audit)
+            'class': 'accounts.audit.QueueFileHandler',
             'filename': BASE_DIR / 'logs' / 'hr_wallet.log',
             'formatter': 'verbose',
         },
@@ -192,12 +215,42 @@ os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # Cache settings
+# LocMemCache is per-process; use a shared backend (Redis/Memcached) when running
+# several workers so dashboard stats invalidation reaches every process.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Seconds a company's dashboard counters stay cached (writes invalidate them sooner)
+DASHBOARD_STATS_CACHE_TIMEOUT = 300
+# Short TTL for the polled employee portal figures (writes invalidate them sooner)
+EMPLOYEE_STATS_CACHE_TIMEOUT = 60
+
+# Seconds a worker process keeps a Company row cached for request.tenant
+TENANT_CACHE_TIMEOUT = 300
+
+# Batched AuditLog writes (see accounts.audit). OVERFLOW is 'drop' or 'block'.
+AUDIT_LOG_BUFFER = {
+    'ENABLED': True,
+    'FLUSH_INTERVAL_MS': 500,
+    'BATCH_SIZE': 100,
+    'MAX_QUEUE_SIZE': 10000,
+    'OVERFLOW': 'drop',
+    'BLOCK_TIMEOUT_MS': 50,
+}
+
+# Audit log rows older than this many months are rolled into monthly JSONL.gz
+# files by `manage.py archive_audit_logs`
+AUDIT_LOG_RETENTION_MONTHS = 12
+AUDIT_LOG_ARCHIVE_DIR = BASE_DIR / 'archive' / 'audit_logs'
+
+# Processed biometric punches older than this are moved to monthly archive files
+# (archive_biometric_events); punches older than the archived window are rejected
+BIOMETRIC_EVENT_RETENTION_DAYS = 90
+BIOMETRIC_EVENT_ARCHIVE_DIR = BASE_DIR / 'archive' / 'biometric_events'
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -216,11 +269,32 @@ REST_FRAMEWORK = {
 # Channels configuration
 ASGI_APPLICATION = 'hr_wallet.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            "hosts": [('127.0.0.1', 6379)],
+# channels_redis lets every process reach every socket; CHANNEL_LAYER_REDIS_URL
+# picks the server. CHANNEL_LAYER_IN_MEMORY=1 switches to the in-process layer,
+# which only reaches sockets served by the same process (single-process setups
+# and the test suite).
+CHANNEL_LAYER_REDIS_URL = os.environ.get('CHANNEL_LAYER_REDIS_URL', 'redis://127.0.0.1:6379/0')
+CHANNEL_LAYER_IN_MEMORY = os.environ.get('CHANNEL_LAYER_IN_MEMORY', '').lower() in ('1', 'true', 'yes')
+
+if CHANNEL_LAYER_IN_MEMORY:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
         },
-    },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                "hosts": [CHANNEL_LAYER_REDIS_URL],
+            },
+        },
+    }
+
+# Sends are skipped while the channel layer is failing (see notifications.realtime)
+CHANNEL_LAYER_BREAKER = {
+    'SEND_TIMEOUT_MS': 500,
+    'FAILURE_THRESHOLD': 3,
+    'RESET_TIMEOUT': 30,
 }
@@ -1,56 +1,140 @@
+import asyncio
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import realtime
 from .models import Notification
 
-User = get_user_model()
+# Flush early rather than letting a burst build one huge frame
+MAX_FRAME_MESSAGES = 200
 
-class NotificationConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        self.user_id = self.scope['url_route']['kwargs']['user_id']
-        self.room_group_name = f'notifications_{self.user_id}'
 
-        # Join room group
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
+class LiveConsumer(AsyncWebsocketConsumer):
+    """
+    One socket per user, multiplexing notifications, live attendance and device status.
+
+    The user comes from the authenticated session scope. Outbound messages are
+    queued and sent as a single {"type": "batch", "messages": [...]} frame every
+    LIVE_FLUSH_INTERVAL_MS; mark_read acknowledgements received in the same
+    interval are applied with one UPDATE.
 
+    Client messages:
+        {"type": "subscribe", "topics": ["attendance", "devices"]}
+        {"type": "unsubscribe", "topics": ["devices"]}
+        {"type": "mark_read", "notification_id": 1} or {"type": "mark_read", "notification_ids": [1, 2]}
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        # Legacy route still carries the user id; it must match the session
+        url_user_id = self.scope['url_route']['kwargs'].get('user_id')
+        if url_user_id is not None and str(url_user_id) != str(user.pk):
+            await self.close(code=4403)
+            return
+
+        self.user = user
+        self.groups_by_topic = {}
+        self.outbox = []
+        self.pending_reads = set()
+        self.flush_interval = getattr(settings, 'LIVE_FLUSH_INTERVAL_MS', 100) / 1000.0
         await self.accept()
+        await self.subscribe([realtime.NOTIFICATIONS])
+        self.flusher = asyncio.ensure_future(self.flush_loop())
 
     async def disconnect(self, close_code):
-        # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
-
-    # Receive message from WebSocket
-    async def receive(self, text_data):
-        text_data_json = json.loads(text_data)
-        message_type = text_data_json.get('type', '')
-        
+        flusher = getattr(self, 'flusher', None)
+        if flusher is None:
+            return
+        flusher.cancel()
+        if self.pending_reads:
+            await self.apply_reads()
+        for group in self.groups_by_topic.values():
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.groups_by_topic = {}
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or '{}')
+        except ValueError:
+            self.queue('error', 'error', {'error': 'Invalid JSON'})
+            return
+        message_type = data.get('type', '')
+
         if message_type == 'mark_read':
-            notification_id = text_data_json.get('notification_id')
-            await self.mark_notification_read(notification_id)
+            ids = data['notification_ids'] if 'notification_ids' in data else [data.get('notification_id')]
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                self.queue('error', 'error', {'error': 'notification_ids must be a list of integers'})
+                return
+            self.pending_reads.update(ids)
+        elif message_type == 'subscribe':
+            await self.subscribe(data.get('topics') or [])
+        elif message_type == 'unsubscribe':
+            await self.unsubscribe(data.get('topics') or [])
+
+    async def subscribe(self, topics):
+        allowed = realtime.allowed_topics(self.user)
+        denied = []
+        for topic in topics:
+            if topic not in allowed:
+                denied.append(topic)
+                continue
+            if topic in self.groups_by_topic:
+                continue
+            group = realtime.topic_group(topic, user_id=self.user.pk, company_id=self.user.company_id)
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups_by_topic[topic] = group
+        self.queue('control', 'subscribed', {'topics': sorted(self.groups_by_topic), 'denied': denied})
+
+    async def unsubscribe(self, topics):
+        for topic in topics:
+            group = self.groups_by_topic.pop(topic, None)
+            if group is not None:
+                await self.channel_layer.group_discard(group, self.channel_name)
+        self.queue('control', 'subscribed', {'topics': sorted(self.groups_by_topic), 'denied': []})
+
+    def queue(self, topic, event, message):
+        self.outbox.append({'topic': topic, 'type': event, 'message': message})
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
 
-    # Receive message from room group
+    async def flush(self):
+        if self.pending_reads:
+            await self.apply_reads()
+        while self.outbox:
+            frame, self.outbox = self.outbox[:MAX_FRAME_MESSAGES], self.outbox[MAX_FRAME_MESSAGES:]
+            await self.send(text_data=json.dumps({'type': 'batch', 'messages': frame}, cls=DjangoJSONEncoder))
+
+    async def apply_reads(self):
+        ids, self.pending_reads = self.pending_reads, set()
+        await self.mark_notifications_read(ids)
+        self.queue(realtime.NOTIFICATIONS, 'read', {'ids': sorted(ids)})
+
+    # Channel-layer handlers
     async def notification_message(self, event):
-        message = event['message']
+        self.queue(realtime.NOTIFICATIONS, 'notification', event['message'])
 
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'notification',
-            'message': message
-        }))
+    async def live_message(self, event):
+        if event['topic'] in self.groups_by_topic:
+            self.queue(event['topic'], event['event'], event['message'])
 
     @database_sync_to_async
-    def mark_notification_read(self, notification_id):
-        try:
-            notification = Notification.objects.get(id=notification_id, user_id=self.user_id)
-            notification.is_read = True
-            notification.save()
-            return True
-        except Notification.DoesNotExist:
-            return False
+    def mark_notifications_read(self, ids):
+        from .services import bump_unread_versions
+        updated = Notification.objects.filter(user_id=self.user.pk, id__in=ids, is_read=False).update(is_read=True)
+        if updated:
+            bump_unread_versions([self.user.pk])
+        return updated
+
+
+# Kept for existing imports
+NotificationConsumer = LiveConsumer
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from core_hr.models import Company
+from notifications.services import notify_many
+
+
+class Command(BaseCommand):
+    help = 'Send an in-app notification to every active user of a company'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company-id', type=int, required=True)
+        parser.add_argument('--title', type=str, required=True)
+        parser.add_argument('--message', type=str, required=True)
+        parser.add_argument('--type', dest='notification_type', type=str, default='announcement')
+        parser.add_argument('--role', type=str, help='Only notify users with this role')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not Company.objects.filter(pk=options['company_id']).exists():
+            raise CommandError(f"Company {options['company_id']} not found")
+
+        users = User.objects.filter(company_id=options['company_id'], is_active=True)
+        if options['role']:
+            users = users.filter(role=options['role'])
+        user_ids = list(users.values_list('id', flat=True))
+        if not user_ids:
+            self.stdout.write('No matching users')
+            return
+
+        def progress(done, total):
+            self.stdout.write(f'  inserted {done}/{total}')
+
+        result = notify_many(
+            user_ids, options['title'], options['message'],
+            notification_type=options['notification_type'],
+            batch_size=options['batch_size'], progress=progress, wait=True,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {result.created} notifications in {result.elapsed:.2f}s ({result.rate:.0f}/s); '
+            f'{result.queued_for_push} queued for real-time delivery'
+        ))
+        if result.dispatch is not None:
+            self.stdout.write(
+                f'Pushed {result.dispatch.sent} ({result.dispatch.failed} failed) in '
+                f'{result.dispatch.elapsed:.2f}s ({result.dispatch.rate:.0f}/s)'
+            )
@@ -1,9 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 import json
 
 class Notification(models.Model):
@@ -23,31 +21,25 @@ class Notification(models.Model):
         ordering = ['-created_date']
 
     def save(self, *args, **kwargs):
+        # Single-row path; use notifications.services.notify_many to notify many users
         is_new = self.pk is None
         super().save(*args, **kwargs)
 
+        from .services import bump_unread_versions
+        user_id = self.user_id
+        transaction.on_commit(lambda: bump_unread_versions([user_id]))
+
         # Send real-time notification if new and user has in-app notifications enabled
         if is_new:
-            try:
-                pref = getattr(self.user, 'notificationpreference', None)
-                if not pref or pref.in_app_enabled:
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        f'notifications_{self.user.id}',
-                        {
-                            'type': 'notification_message',
-                            'message': {
-                                'id': self.id,
-                                'title': self.title,
-                                'message': self.message,
-                                'notification_type': self.notification_type,
-                                'created_date': self.created_date.isoformat(),
-                            }
-                        }
-                    )
-            except Exception:
-                # Fail silently if channels not available
-                pass
+            pref = getattr(self.user, 'notificationpreference', None)
+            if not pref or pref.in_app_enabled:
+                from .realtime import group_send
+                from .services import notification_payload
+                # Bounded and skipped while the channel layer is unhealthy
+                group_send(f'notifications_{self.user_id}', {
+                    'type': 'notification_message',
+                    'message': notification_payload(self),
+                })
 
 class NotificationPreference(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -0,0 +1,205 @@
+"""
+Topics multiplexed over the live WebSocket (see consumers.LiveConsumer).
+
+Each topic maps to a channel-layer group: notifications are per user, live
+attendance and device status are per company and only available to HR
+managers and super admins. publish() sends an event to a topic's group from
+synchronous code; a missing or failing channel layer never breaks the caller.
+
+Every group send in the project goes through group_send()/agroup_send(), which
+bound each send with a timeout and share one circuit breaker: after
+FAILURE_THRESHOLD consecutive failures sends are skipped for RESET_TIMEOUT
+seconds, then a single trial send decides whether to close the breaker again.
+Send latency and outcome counters are kept per process (channel_layer_metrics).
+
+Settings (all optional)::
+
+    CHANNEL_LAYER_BREAKER = {
+        'SEND_TIMEOUT_MS': 500,
+        'FAILURE_THRESHOLD': 3,
+        'RESET_TIMEOUT': 30,
+    }
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BREAKER_SETTINGS = {
+    'SEND_TIMEOUT_MS': 500,
+    'FAILURE_THRESHOLD': 3,
+    'RESET_TIMEOUT': 30,
+}
+
+NOTIFICATIONS = 'notifications'
+ATTENDANCE = 'attendance'
+DEVICES = 'devices'
+
+TOPICS = (NOTIFICATIONS, ATTENDANCE, DEVICES)
+
+# Company-wide topics are limited to these roles
+COMPANY_TOPIC_ROLES = ('hr_manager', 'super_admin')
+
+
+def topic_group(topic, user_id=None, company_id=None):
+    """Channel-layer group name for a topic"""
+    if topic == NOTIFICATIONS:
+        return f'notifications_{user_id}'
+    if topic in (ATTENDANCE, DEVICES):
+        return f'{topic}_{company_id}'
+    raise ValueError(f'Unknown topic: {topic}')
+
+
+def allowed_topics(user):
+    """Topics a user may subscribe to"""
+    if not getattr(user, 'is_authenticated', False):
+        return ()
+    if getattr(user, 'role', None) in COMPANY_TOPIC_ROLES and getattr(user, 'company_id', None):
+        return TOPICS
+    return (NOTIFICATIONS,)
+
+
+class ChannelLayerBreaker:
+    """Circuit breaker and latency metrics around channel-layer sends"""
+
+    LATENCY_SAMPLES = 1000
+
+    def __init__(self, send_timeout_ms=500, failure_threshold=3, reset_timeout=30):
+        self.send_timeout = send_timeout_ms / 1000.0
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.latencies = deque(maxlen=self.LATENCY_SAMPLES)
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Whether a send should be attempted now; counts a skip if not"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.skipped += 1
+            return False
+
+    def record_success(self, elapsed):
+        with self._lock:
+            self.sent += 1
+            self.latencies.append(elapsed)
+            if self.opened_at is not None:
+                logger.info("Channel layer recovered, resuming sends")
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self, elapsed):
+        with self._lock:
+            self.failed += 1
+            self.latencies.append(elapsed)
+            self.consecutive_failures += 1
+            reopen = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopen or (self.opened_at is None and self.consecutive_failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                logger.warning("Channel layer unhealthy after %d failures, skipping sends for %ss",
+                               self.consecutive_failures, self.reset_timeout)
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self.latencies)
+
+        def percentile(p):
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            'state': self.state,
+            'sent': self.sent,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'consecutive_failures': self.consecutive_failures,
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99),
+                           'max': round(samples[-1] * 1000, 2) if samples else None},
+        }
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_breaker():
+    """Process-wide ChannelLayerBreaker configured from settings.CHANNEL_LAYER_BREAKER"""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                config = dict(DEFAULT_BREAKER_SETTINGS, **getattr(settings, 'CHANNEL_LAYER_BREAKER', {}))
+                _breaker = ChannelLayerBreaker(
+                    send_timeout_ms=config['SEND_TIMEOUT_MS'],
+                    failure_threshold=config['FAILURE_THRESHOLD'],
+                    reset_timeout=config['RESET_TIMEOUT'],
+                )
+    return _breaker
+
+
+def channel_layer_metrics():
+    """Breaker state and send counters/latency percentiles for this process"""
+    return get_breaker().snapshot()
+
+
+async def agroup_send(group, message):
+    """Send to a channel-layer group through the breaker; returns True if it was delivered to the layer"""
+    from channels.layers import get_channel_layer
+
+    breaker = get_breaker()
+    if not breaker.allow():
+        return False
+    started = time.perf_counter()
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            raise RuntimeError('No channel layer configured')
+        await asyncio.wait_for(channel_layer.group_send(group, message), breaker.send_timeout)
+    except Exception:
+        breaker.record_failure(time.perf_counter() - started)
+        logger.debug("Channel layer send to %s failed", group, exc_info=True)
+        return False
+    breaker.record_success(time.perf_counter() - started)
+    return True
+
+
+def group_send(group, message):
+    """Synchronous agroup_send()"""
+    return async_to_sync(agroup_send)(group, message)
+
+
+def publish(topic, event, message, user_id=None, company_id=None):
+    """Send `message` as `event` to every socket subscribed to the topic; returns False if it could not be sent"""
+    return group_send(topic_group(topic, user_id, company_id), {
+        'type': 'live_message',
+        'topic': topic,
+        'event': event,
+        'message': message,
+    })
@@ -2,5 +2,6 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
-    re_path(r'ws/notifications/(?P<user_id>\w+)/$', consumers.NotificationConsumer.as_asgi()),
+    re_path(r'ws/live/$', consumers.LiveConsumer.as_asgi()),
+    re_path(r'ws/notifications/(?P<user_id>\w+)/$', consumers.LiveConsumer.as_asgi()),
 ]
@@ -0,0 +1,229 @@
+"""
+Notification fan-out.
+
+notify_many() creates notifications for many users at once: preferences are
+loaded in one query per chunk, rows are inserted with bulk_create, and the
+real-time channel messages are sent concurrently in batches from a background
+worker once the transaction commits, so the caller never waits on the channel
+layer.
+
+Each user's unread count and latest unread notifications are cached under a
+version token that changes on create and mark-read (get_unread_summary).
+"""
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification, NotificationPreference
+
+logger = logging.getLogger(__name__)
+
+NotifyResult = namedtuple('NotifyResult', ['created', 'queued_for_push', 'elapsed', 'rate', 'dispatch'])
+DispatchResult = namedtuple('DispatchResult', ['sent', 'failed', 'elapsed', 'rate'])
+
+INSERT_BATCH_SIZE = 1000
+SEND_BATCH_SIZE = 200
+
+_dispatch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-dispatch')
+
+
+def notification_payload(notification):
+    """The message body pushed to a user's notification group"""
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'created_date': notification.created_date.isoformat(),
+    }
+
+
+def _user_ids(users):
+    ids = []
+    for user in users:
+        ids.append(user if isinstance(user, int) else user.pk)
+    return list(dict.fromkeys(ids))
+
+
+def _refetch_inserted(rows):
+    """Load the rows of a bulk_create() chunk whose primary keys the backend did not return"""
+    logger.info("Backend returned no ids for %d new notifications; reading them back", len(rows))
+    latest = {}
+    for row in Notification.objects.filter(
+        user_id__in=[row.user_id for row in rows], title=rows[0].title, notification_type=rows[0].notification_type,
+        created_date__gte=min(row.created_date for row in rows),
+    ).order_by('id'):
+        latest[row.user_id] = row
+    if len(latest) < len(rows):
+        logger.warning("%d new notifications could not be read back and will not be pushed", len(rows) - len(latest))
+    return list(latest.values())
+
+
+def notify_many(users, title, message, notification_type='general', related_object=None,
+                batch_size=INSERT_BATCH_SIZE, send_batch_size=SEND_BATCH_SIZE, progress=None, wait=False):
+    """
+    Create one notification per user and push them over the channel layer.
+
+    `users` may contain User instances or ids. `progress(done, total)` is called
+    after each inserted chunk. Channel sends run on a background worker after
+    commit; pass wait=True to block until they finish (e.g. from a management
+    command); the DispatchResult is then included in the returned NotifyResult
+    unless the call is inside a transaction that has not committed yet.
+    """
+    started = time.perf_counter()
+    user_ids = _user_ids(users)
+    total = len(user_ids)
+    content_type = ContentType.objects.get_for_model(related_object) if related_object is not None else None
+    object_id = str(related_object.pk) if related_object is not None else ''
+
+    payloads = []
+    created = 0
+    for i in range(0, total, batch_size):
+        chunk = user_ids[i:i + batch_size]
+        # Users without a preference row get the default (in-app enabled)
+        in_app_disabled = set(NotificationPreference.objects.filter(
+            user_id__in=chunk, in_app_enabled=False
+        ).values_list('user_id', flat=True))
+
+        rows = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id, title=title, message=message, notification_type=notification_type,
+                content_type=content_type, object_id=object_id,
+            ) for user_id in chunk
+        ], batch_size=batch_size)
+        created += len(rows)
+        if any(row.pk is None for row in rows):
+            rows = _refetch_inserted(rows)
+        payloads.extend(
+            (row.user_id, notification_payload(row)) for row in rows
+            if row.user_id not in in_app_disabled
+        )
+        if progress:
+            progress(created, total)
+
+    elapsed = time.perf_counter() - started
+    logger.info("Created %d notifications in %.2fs (%.0f/s)", created, elapsed, created / elapsed if elapsed else 0)
+
+    # Pollers must not see the new watermark before the rows are visible
+    transaction.on_commit(lambda: bump_unread_versions(user_ids))
+
+    dispatched = []
+    if payloads:
+        def dispatch():
+            future = _dispatch_executor.submit(dispatch_notifications, payloads, send_batch_size)
+            if wait:
+                dispatched.append(future.result())
+        # Nothing is pushed for rows that end up rolled back
+        transaction.on_commit(dispatch)
+
+    return NotifyResult(created, len(payloads), elapsed, created / elapsed if elapsed else 0,
+                        dispatched[0] if dispatched else None)
+
+
+def dispatch_notifications(payloads, batch_size=SEND_BATCH_SIZE, progress=None):
+    """
+    Send (user_id, message) pairs to their notification groups.
+
+    Each batch is sent concurrently with asyncio.gather. Sends skipped by the
+    channel-layer circuit breaker count as failed. Returns a DispatchResult.
+    """
+    from .realtime import agroup_send
+
+    started = time.perf_counter()
+
+    async def send_all():
+        sent = failed = 0
+        for i in range(0, len(payloads), batch_size):
+            batch = payloads[i:i + batch_size]
+            results = await asyncio.gather(*[
+                agroup_send(f'notifications_{user_id}', {
+                    'type': 'notification_message',
+                    'message': payload,
+                }) for user_id, payload in batch
+            ])
+            batch_failed = results.count(False)
+            sent += len(batch) - batch_failed
+            failed += batch_failed
+            if progress:
+                progress(sent + failed, len(payloads))
+        return sent, failed
+
+    sent, failed = async_to_sync(send_all)()
+    elapsed = time.perf_counter() - started
+    rate = sent / elapsed if elapsed else 0
+    if failed:
+        logger.warning("Pushed %d notifications, %d failed, in %.2fs (%.0f/s)", sent, failed, elapsed, rate)
+    else:
+        logger.info("Pushed %d notifications in %.2fs (%.0f/s)", sent, elapsed, rate)
+    return DispatchResult(sent, failed, elapsed, rate)
+
+
+UNREAD_LATEST_COUNT = 20
+UNREAD_CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300)
+
+
+def _unread_version_key(user_id):
+    return f'notifications_unread:version:{user_id}'
+
+
+def bump_unread_versions(user_ids):
+    """
+    Mark the cached unread state of these users as stale.
+
+    Versions are opaque tokens rather than counters so a whole fan-out is
+    one set_many call. The token doubles as the `since` watermark clients poll with.
+    """
+    token = str(time.time_ns())
+    cache.set_many({_unread_version_key(user_id): token for user_id in user_ids}, None)
+
+
+def get_unread_version(user_id):
+    version = cache.get(_unread_version_key(user_id))
+    if version is None:
+        version = str(time.time_ns())
+        cache.add(_unread_version_key(user_id), version, None)
+        version = cache.get(_unread_version_key(user_id), version)
+    return version
+
+
+def get_unread_summary(user_id, since=None):
+    """
+    Unread count and latest unread notifications for a user, served from cache.
+
+    Returns (watermark, summary). summary is None when `since` equals the current
+    watermark, i.e. nothing changed since the client's last poll; that path is a
+    single cache read.
+    """
+    version = get_unread_version(user_id)
+    if since is not None and since == version:
+        return version, None
+
+    key = f'notifications_unread:{user_id}:{version}'
+    summary = cache.get(key)
+    if summary is None:
+        unread = Notification.objects.filter(user_id=user_id, is_read=False)
+        summary = {
+            'count': unread.count(),
+            'latest': [notification_payload(n) for n in unread.order_by('-created_date', '-id')[:UNREAD_LATEST_COUNT]],
+        }
+        cache.set(key, summary, UNREAD_CACHE_TIMEOUT)
+    return version, summary
+
+
+def mark_all_read(user_id, up_to=None):
+    """Mark a user's unread notifications read with one UPDATE; `up_to` limits it to ids the client has seen"""
+    unread = Notification.objects.filter(user_id=user_id, is_read=False)
+    if up_to is not None:
+        unread = unread.filter(id__lte=up_to)
+    updated = unread.update(is_read=True)
+    if updated:
+        transaction.on_commit(lambda: bump_unread_versions([user_id]))
+    return updated
@@ -5,6 +5,7 @@ app_name = 'notifications'
 urlpatterns = [
     path('api/unread/', views.unread, name='api_unread'),
     path('api/mark-read/<int:pk>/', views.mark_read, name='api_mark_read'),
+    path('api/mark-all-read/', views.mark_all_read_api, name='api_mark_all_read'),
     path('settings/', views.preferences, name='settings'),
 ]
 
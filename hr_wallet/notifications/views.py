@@ -1,13 +1,19 @@
 from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
 from .models import Notification, NotificationPreference
+from .services import get_unread_summary, mark_all_read
 
 @login_required
 def unread(request):
-    items = Notification.objects.filter(user=request.user, is_read=False)[:20]
-    data = [{'id': n.id, 'title': n.title, 'message': n.message, 't': n.notification_type, 'ts': n.created_date.isoformat()} for n in items]
-    return JsonResponse({'success': True, 'data': data})
+    """Unread count and latest unread notifications; pass ?since=<watermark> to skip unchanged data"""
+    watermark, summary = get_unread_summary(request.user.pk, since=request.GET.get('since'))
+    if summary is None:
+        return JsonResponse({'success': True, 'changed': False, 'watermark': watermark})
+    data = [{'id': n['id'], 'title': n['title'], 'message': n['message'], 't': n['notification_type'], 'ts': n['created_date']}
+            for n in summary['latest']]
+    return JsonResponse({'success': True, 'changed': True, 'watermark': watermark, 'count': summary['count'], 'data': data})
 
 @login_required
 def mark_read(request, pk):
@@ -16,6 +22,18 @@ def mark_read(request, pk):
     n.save(update_fields=['is_read'])
     return JsonResponse({'success': True})
 
+@login_required
+@require_http_methods(["POST"])
+def mark_all_read_api(request):
+    """Mark every unread notification read in one UPDATE; optional up_to=<id> bounds it to what the client has seen"""
+    up_to = request.POST.get('up_to')
+    try:
+        up_to = int(up_to) if up_to else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'up_to must be an integer'}, status=400)
+    updated = mark_all_read(request.user.pk, up_to=up_to)
+    return JsonResponse({'success': True, 'updated': updated})
+
 @login_required
 def preferences(request):
     pref, _ = NotificationPreference.objects.get_or_create(user=request.user)
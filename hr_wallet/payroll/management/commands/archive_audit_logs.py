@@ -0,0 +1,80 @@
+import os
+from datetime import datetime, time
+from itertools import chain
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from core_hr.archive import iter_batches, write_jsonl_gz, parse_month, months_before, next_month
+from payroll.models import AuditLog
+
+ARCHIVE_FIELDS = ['pk', 'company_id', 'user_id', 'action_type', 'target_model', 'target_id',
+                  'changes', 'ip_address', 'user_agent', 'timestamp']
+
+
+class Command(BaseCommand):
+    help = ('Roll audit log rows older than the retention window out of the database into '
+            'monthly JSONL.gz files (one per company and month)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=str,
+                            help='Archive months before this one (YYYY-MM). '
+                                 'Defaults to AUDIT_LOG_RETENTION_MONTHS before the current month')
+        parser.add_argument('--dir', type=str, help='Archive directory (defaults to AUDIT_LOG_ARCHIVE_DIR)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = parse_month(options['before'])
+            except ValueError:
+                raise CommandError('--before must be in YYYY-MM format')
+        else:
+            cutoff = months_before(timezone.localdate(), getattr(settings, 'AUDIT_LOG_RETENTION_MONTHS', 12))
+        archive_dir = options['dir'] or str(getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'audit_logs'))
+        cutoff_at = timezone.make_aware(datetime.combine(cutoff, time.min))
+
+        buckets = (AuditLog.objects.filter(timestamp__lt=cutoff_at)
+                   .annotate(month=TruncMonth('timestamp'))
+                   .values_list('company_id', 'month').distinct().order_by('company_id', 'month'))
+        total = 0
+        for company_id, month in buckets:
+            month = month.date() if hasattr(month, 'date') else month
+            start = timezone.make_aware(datetime.combine(month, time.min))
+            end = timezone.make_aware(datetime.combine(next_month(month), time.min))
+            rows = AuditLog.objects.filter(company_id=company_id, timestamp__gte=start, timestamp__lt=end)
+            if options['dry_run']:
+                count = rows.count()
+                self.stdout.write(f'Would archive {count} rows for company {company_id}, {month:%Y-%m}')
+                total += count
+                continue
+            total += self._archive_bucket(rows, archive_dir, company_id, month, options['batch_size'])
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} audit log rows older than {cutoff:%Y-%m}'))
+
+    def _archive_bucket(self, rows, archive_dir, company_id, month, batch_size):
+        batches = iter_batches(rows.values(*ARCHIVE_FIELDS), batch_size)
+        first = next(batches, None)
+        if first is None:
+            return 0
+        # Named after the first id so a re-run after a partial delete never overwrites an earlier file
+        path = os.path.join(archive_dir, str(company_id), f'{month:%Y-%m}-{first[0]["pk"]}.jsonl.gz')
+        archived_ids = []
+
+        def rows_to_write():
+            for batch in chain([first], batches):
+                yield from batch
+                archived_ids.extend(row['pk'] for row in batch)
+
+        count = write_jsonl_gz(path, rows_to_write())
+        # Only delete once the file is complete on disk
+        for i in range(0, len(archived_ids), batch_size):
+            with transaction.atomic():
+                AuditLog.objects.filter(pk__in=archived_ids[i:i + batch_size]).delete()
+        self.stdout.write(f'Archived {count} rows for company {company_id}, {month:%Y-%m} -> {path}')
+        return count
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0003_auto_20250919_1718'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action_type',
+            field=models.CharField(choices=[('salary_created', 'Salary Created'), ('salary_updated', 'Salary Updated'), ('salary_approved', 'Salary Approved'), ('salary_rejected', 'Salary Rejected'), ('payroll_generated', 'Payroll Generated'), ('payslip_created', 'Payslip Created'), ('payslip_updated', 'Payslip Updated'), ('employee_created', 'Employee Created'), ('employee_updated', 'Employee Updated')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_model',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_id',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -205,11 +205,45 @@ class PaySlip(models.Model):
         return self.pdf_file_path
 
 class AuditLog(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
-    action = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
-    details = models.TextField(blank=True, null=True)
+    """Audit trail of data changes and sensitive page access.
+
+    Rows are normally written in batches through accounts.audit.record_audit().
+    """
+    ACTION_TYPES = [
+        ('salary_created', 'Salary Created'),
+        ('salary_updated', 'Salary Updated'),
+        ('salary_approved', 'Salary Approved'),
+        ('salary_rejected', 'Salary Rejected'),
+        ('payroll_generated', 'Payroll Generated'),
+        ('payslip_created', 'Payslip Created'),
+        ('payslip_updated', 'Payslip Updated'),
+        ('employee_created', 'Employee Created'),
+        ('employee_updated', 'Employee Updated'),
+    ]
+
+    company = models.ForeignKey('core_hr.Company', on_delete=models.CASCADE, related_name='audit_logs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    # Also holds view access actions recorded by accounts.decorators.audit_action
+    action_type = models.CharField(max_length=50, choices=ACTION_TYPES)
+    target_model = models.CharField(max_length=50, blank=True, default='')
+    target_id = models.PositiveIntegerField(null=True, blank=True)
+    changes = models.JSONField(default=dict, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.TextField(blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['company', 'timestamp'], name='payroll_aud_company_77494c_idx'),
+            models.Index(fields=['user', 'timestamp'], name='payroll_aud_user_id_0d6ba4_idx'),
+            models.Index(fields=['action_type', 'timestamp'], name='payroll_aud_action__75b382_idx'),
+            models.Index(fields=['target_model', 'target_id'], name='payroll_aud_target__0e3ab3_idx'),
+            # Company-scoped browsing filtered by user or action (accounts.audit.query_audit_logs)
+            models.Index(fields=['company', 'user', 'timestamp'], name='payroll_aud_co_user_ts_idx'),
+            models.Index(fields=['company', 'action_type', 'timestamp'], name='payroll_aud_co_action_ts_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.user} - {self.action} at {self.timestamp}'
+        return f'{self.user} - {self.action_type} at {self.timestamp}'
 
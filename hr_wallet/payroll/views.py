@@ -21,7 +21,7 @@ def dashboard(request):
 def list_salaries(request):
     # Filter by company for security
     salaries = EmployeeSalary.objects.filter(
-        employee__company=request.user.company
+        employee__company=request.tenant
     ).select_related('employee__user', 'employee__department', 'created_by', 'updated_by').order_by('-effective_date')
 
     # Add search and filter functionality
@@ -54,7 +54,7 @@ def list_salaries(request):
 @require_roles('super_admin', 'hr_manager')
 @login_required
 def edit_salary(request, employee_id):
-    emp = get_object_or_404(Employee, id=employee_id, company=request.user.company)
+    emp = get_object_or_404(Employee, id=employee_id, company=request.tenant)
 
     # Get the current active salary or create a new one
     current_salary = EmployeeSalary.objects.filter(
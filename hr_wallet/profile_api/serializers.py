@@ -11,7 +11,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
     """Serializer for Department model"""
     class Meta:
         model = Department
-        fields = ['id', 'name', 'description']
+        fields = ['id', 'name', 'description', 'parent']
 
 
 class EmployeeCreateSerializer(serializers.Serializer):
@@ -233,6 +233,9 @@ class EmployeeUpdateSerializer(serializers.Serializer):
             raise serializers.ValidationError('Invalid department for your company.')
 
 class BiometricEventSerializer(serializers.ModelSerializer):
+    # Stored compressed in BiometricEvent.payload
+    raw_payload = serializers.JSONField(required=False)
+
     class Meta:
         model = BiometricEvent
         fields = [
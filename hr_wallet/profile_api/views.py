@@ -5,9 +5,16 @@ from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.utils import timezone
-from decimal import Decimal
 from accounts.decorators import require_role, require_roles
-from core_hr.models import Employee, Department, LeaveBalance, Attendance, BiometricDevice, BiometricEvent, BiometricUserMap
+from core_hr.live import publish_attendance, publish_punch
+from core_hr.attendance import ensure_attendance, write_atomic
+from core_hr.shifts import CompanyShiftRules, process_days, shift_day
+from notifications import realtime
+from core_hr.models import Employee, Department, LeaveBalance, Attendance, BiometricDevice, BiometricEvent, BiometricEventArchive, BiometricUserMap
+from core_hr.compact import dedupe_key
+from core_hr.org_tree import approval_chain, rollup, subtree
+from core_hr.listings import bump_listing_version, department_listing
+from core_hr.stats import bump_company_stats_version
 from .serializers import (
     EmployeeCreateSerializer, HRCreateSerializer,
     EmployeeListSerializer, HRListSerializer, DepartmentSerializer,
@@ -20,7 +27,8 @@ import logging
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q, Sum
 from django.http import HttpResponse
 import csv
 from datetime import datetime
@@ -35,13 +43,47 @@ import time
 
 
 
+def _set_department_parent(dept, parent_id):
+    """Place a department under parent_id (empty for top level); returns an error Response if it cannot go there"""
+    if parent_id in (None, ''):
+        dept.parent = None
+        return None
+    try:
+        dept.parent = Department.objects.get(pk=parent_id, company=dept.company)
+    except (Department.DoesNotExist, ValueError):
+        return Response({'success': False, 'message': 'Parent department not found'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        dept.clean()
+    except ValidationError as e:
+        return Response({'success': False, 'message': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @require_roles('hr_manager', 'super_admin')
 def list_departments(request):
-    """List departments for the current user's company."""
-    qs = Department.objects.filter(company=request.user.company).order_by('name')
-    data = DepartmentSerializer(qs, many=True).data
+    """List departments for the current user's company with active headcount, manager and salary total
+    (subtree_of: only a department and those under it)."""
+    if request.tenant is None:
+        return Response({'success': True, 'data': []}, status=status.HTTP_200_OK)
+    rows = department_listing(request.tenant.pk)
+    subtree_of = request.GET.get('subtree_of')
+    if subtree_of and subtree_of.isdigit():
+        ids = set(subtree(subtree_of).values_list('descendant_id', flat=True))
+        rows = [row for row in rows if row['id'] in ids]
+    data = [{
+        'id': row['id'],
+        'name': row['name'],
+        'description': row['description'],
+        'parent': row['parent'],
+        'is_active': row['is_active'],
+        'created_at': row['created_at'],
+        'manager': row['manager'],
+        'manager_full_name': row['manager_name'],
+        'employee_count': row['employee_count'],
+        'salary_total': str(row['salary_total']),
+    } for row in rows]
     return Response({'success': True, 'data': data}, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
@@ -56,6 +98,9 @@ def create_department(request):
     if Department.objects.filter(company=request.user.company, name__iexact=name).exists():
         return Response({'success': False, 'message': 'Department with this name already exists'}, status=status.HTTP_400_BAD_REQUEST)
     dept = Department(company=request.user.company, name=name, description=description)
+    parent_error = _set_department_parent(dept, request.data.get('parent_id'))
+    if parent_error:
+        return parent_error
     # Optional manager assignment
     if manager_id:
         try:
@@ -103,11 +148,44 @@ def update_department(request, pk):
     if is_active is not None:
         is_active_bool = is_active if isinstance(is_active, bool) else str(is_active).lower() in ['1', 'true', 'yes']
         dept.is_active = is_active_bool
+    if 'parent_id' in request.data:
+        parent_error = _set_department_parent(dept, request.data.get('parent_id'))
+        if parent_error:
+            return parent_error
 
     dept.save()
     return Response({'success': True, 'data': DepartmentSerializer(dept).data}, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@require_roles('hr_manager', 'super_admin')
+def department_rollup(request):
+    """Headcount and salary cost of each department including everything under it, with its direct figures."""
+    company = request.tenant
+    if company is None:
+        return Response({'success': False, 'message': 'No company selected'}, status=status.HTTP_400_BAD_REQUEST)
+    totals = rollup(company.pk)
+    direct = {
+        row['department_id']: row for row in Employee.objects.filter(company=company, is_active=True)
+        .values('department_id').annotate(headcount=Count('pk'), salary_cost=Sum('salary')).order_by()
+    }
+    data = []
+    for dept in Department.objects.filter(company=company).order_by('name'):
+        headcount, salary_cost = totals.get(dept.pk, (0, 0))
+        own = direct.get(dept.pk, {})
+        data.append({
+            'id': dept.pk,
+            'name': dept.name,
+            'parent': dept.parent_id,
+            'headcount': headcount,
+            'salary_cost': str(salary_cost),
+            'direct_headcount': own.get('headcount', 0),
+            'direct_salary_cost': str(own.get('salary_cost') or 0),
+        })
+    return Response({'success': True, 'data': data}, status=status.HTTP_200_OK)
+
+
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 @require_roles('hr_manager', 'super_admin')
@@ -414,6 +492,7 @@ def list_employees(request):
     Query params:
       - q: search by name/email/employee_id/department
       - department_id: filter by department
+      - subtree_of: filter by a department and every department under it
       - status: active|inactive|all (default active)
       - hire_date_from, hire_date_to: YYYY-MM-DD
       - page (1-based), page_size
@@ -443,6 +522,9 @@ def list_employees(request):
         dept_id = request.GET.get('department_id')
         if dept_id:
             qs = qs.filter(department_id=dept_id)
+        subtree_of = request.GET.get('subtree_of')
+        if subtree_of and subtree_of.isdigit():
+            qs = qs.filter(department_id__in=subtree(subtree_of))
 
         # Hire date range filters
         fmt = '%Y-%m-%d'
@@ -556,12 +638,21 @@ def employee_detail(request, pk: int):
             .values('date', 'status', 'total_hours')[:10]
         )
 
+        # Department managers from the employee's own department upwards, who approve their requests
+        chain = approval_chain(employee.department_id)
+        managers = User.objects.in_bulk(chain)
+        approvers = [
+            {'id': managers[pk].pk, 'name': managers[pk].get_full_name() or managers[pk].username}
+            for pk in chain if pk in managers and pk != employee.user_id
+        ]
+
         return Response({
             'success': True,
             'data': {
                 'employee': emp_data,
                 'leave_balance': leave,
                 'recent_attendance': recent_attendance,
+                'approvers': approvers,
             }
         }, status=status.HTTP_200_OK)
     except Employee.DoesNotExist:
@@ -675,6 +766,9 @@ def bulk_update_employees(request):
                 return Response({'success': False, 'message': 'department_id required'}, status=status.HTTP_400_BAD_REQUEST)
             dept = Department.objects.get(id=dept_id, company=request.user.company)
             updated = employees.update(department=dept)
+            # update() skips the model signals
+            bump_company_stats_version(request.user.company_id)
+            bump_listing_version(request.user.company_id)
         elif action == 'set_status':
             is_active = request.data.get('is_active')
             if is_active is None:
@@ -776,30 +870,36 @@ def _parse_event_timestamp(ts_value, fallback_tz='UTC'):
     return None
 
 
-def _recompute_attendance(att):
-    ci, co = att.clock_in, att.clock_out
-    if ci and co:
-        # both are time objects; compute delta assuming same date and handle overnight
-        in_dt = datetime.combine(att.date, ci)
-        out_dt = datetime.combine(att.date, co)
-        if out_dt < in_dt:
-            out_dt += timedelta(days=1)
-        delta = out_dt - in_dt
-        if att.break_duration:
-            delta -= att.break_duration
-        hours = Decimal(delta.total_seconds() / 3600).quantize(Decimal('0.01'))
-        att.total_hours = hours
-    return att
-
-
-def _process_event(company, device, device_user_id, event_type, ts, raw_payload=None):
-    # Idempotency key
-    base = f"{device.id if device else 'N'}|{company.id}|{device_user_id}|{int(ts.timestamp())}|{event_type}"
-    dedupe = hashlib.sha256(base.encode('utf-8')).hexdigest()
+def _touch_device(device, **extra):
+    """Record that a device was seen and push its status to the company's live devices topic"""
+    device.last_seen = timezone.now()
+    device.save(update_fields=['last_seen'])
+    realtime.publish(realtime.DEVICES, 'device_status', dict({
+        'id': device.pk,
+        'name': device.name,
+        'is_active': device.is_active,
+        'last_seen': device.last_seen.isoformat(),
+    }, **extra), company_id=device.company_id)
+
+
+@write_atomic()
+def _process_event(company, device, device_user_id, event_type, ts, raw_payload=None, reprocess=True):
+    """Store and apply a punch; returns (event, created), or (None, False) if it falls in an archived month.
+
+    One transaction, so a punch is never stored without being applied. With
+    reprocess=False the punch is only attached to its shift day's Attendance;
+    bulk importers then run core_hr.shifts.process_days once for the days they touched.
+    """
+    # Archived events are no longer in the table to dedupe against, so refuse anything that old
+    horizon = BiometricEventArchive.horizon_for(company.id)
+    if horizon is not None and ts < horizon:
+        logger.info("Ignoring punch for %s at %s: before archive horizon %s", device_user_id, ts, horizon)
+        return None, False
+
     ev, created = BiometricEvent.objects.get_or_create(
-        dedupe_hash=dedupe,
+        company=company,
+        dedupe_key=dedupe_key(device.id if device else None, company.id, device_user_id, ts, event_type),
         defaults={
-            'company': company,
             'device': device,
             'device_user_id': str(device_user_id),
             'event_type': event_type if event_type in ['checkin','checkout'] else 'unknown',
@@ -828,26 +928,21 @@ def _process_event(company, device, device_user_id, event_type, ts, raw_payload=
 
     if emp is None:
         # leave unprocessed to be resolved later
+        publish_punch(ev)
         return ev, True
 
-    # Upsert Attendance by local date of device/company
-    local_dt = ts.astimezone(timezone.get_current_timezone())
-    att_date = local_dt.date()
-    att, _ = Attendance.objects.get_or_create(employee=emp, date=att_date, defaults={'status': 'present'})
-    t = local_dt.time()
-    if event_type == 'checkin':
-        if not att.clock_in or t < att.clock_in:
-            att.clock_in = t
-    elif event_type == 'checkout':
-        if not att.clock_out or t > att.clock_out:
-            att.clock_out = t
-    att.status = att.status or 'present'
-    att = _recompute_attendance(att)
-    att.save()
-
+    # Attendance is kept per shift day, which an overnight check-out runs past
+    rules = CompanyShiftRules(company.id)
+    day = shift_day(rules.for_department(emp.department_id), ts, timezone.get_current_timezone())
+    # Inserted without signals: rollups are refreshed once the punch has been paired
+    att = ensure_attendance(emp, day)
     ev.processed = True
     ev.attendance = att
     ev.save(update_fields=['processed', 'attendance'])
+    if reprocess:
+        att = process_days(company.id, [day], employee_ids=[emp.id], rules=rules).get((emp.id, day), att)
+        publish_attendance(att, source='biometric')
+    publish_punch(ev)
     return ev, True
 
 
@@ -880,8 +975,9 @@ def ingest_biometric_event(request):
             return Response({'success': False, 'message': 'device_user_id, timestamp and valid event_type are required'}, status=400)
 
         ev, ok = _process_event(device.company, device, str(device_user_id), event_type, ts, raw_payload=data)
-        device.last_seen = timezone.now()
-        device.save(update_fields=['last_seen'])
+        _touch_device(device)
+        if ev is None:
+            return Response({'success': True, 'status': 'expired', 'event_id': None, 'processed': False}, status=200)
         status_text = 'accepted' if ok else 'duplicate'
         return Response({'success': True, 'status': status_text, 'event_id': ev.pk, 'processed': ev.processed}, status=200)
     except Exception as e:
@@ -1104,6 +1200,9 @@ def biometric_heartbeat(request):
     device = _get_device_by_key(api_key)
     if not device:
         return Response({'success': False, 'message': 'Invalid device'}, status=401)
+    _touch_device(device)
+    return Response({'success': True, 'last_seen': device.last_seen}, status=200)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -1348,17 +1447,14 @@ def biometric_attendance_bulk_edit(request):
     if serializer.is_valid():
         ids = serializer.validated_data['ids']
         updates = {k: v for k, v in serializer.validated_data.items() if k != 'ids'}
-        updated = []
-        for eid in ids:
-            try:
-                event = BiometricEvent.objects.get(pk=eid, company=request.user.company)
-                for attr, value in updates.items():
-                    setattr(event, attr, value)
-                event.save()
-                updated.append(event.id)
-            except BiometricEvent.DoesNotExist:
-                continue
-        return Response({'updated': updated})
+        # Unknown IDs and other companies' events are skipped
+        events = list(BiometricEvent.objects.filter(pk__in=ids, company=request.user.company))
+        for event in events:
+            for attr, value in updates.items():
+                setattr(event, attr, value)
+        if events and updates:
+            BiometricEvent.objects.bulk_update(events, list(updates), batch_size=500)
+        return Response({'updated': sorted(event.id for event in events)})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['PATCH'])
@@ -1444,9 +1540,7 @@ def ping_biometric_device(request, pk):
             except Exception:
                 pass
         latency = int((time.time() - start) * 1000)
-        # update last_seen
-        d.last_seen = timezone.now()
-        d.save(update_fields=['last_seen'])
+        _touch_device(d, latency_ms=latency)
         return Response({'success': True, 'connected': True, 'latency_ms': latency, 'last_seen': d.last_seen}, status=200)
     except Exception as e:
         msg = str(e)
@@ -1470,6 +1564,7 @@ def sync_biometric_device(request, pk):
         return Response({'success': False, 'message': 'python-zk not installed'}, status=500)
 
     ingested = duplicates = errors = 0
+    days = set()
     try:
         password = int(getattr(d, 'comm_key', 0) or 0)
         try:
@@ -1491,13 +1586,17 @@ def sync_biometric_device(request, pk):
                         continue
                     punch = getattr(r, 'punch', getattr(r, 'status', 0))
                     event_type = 'checkin' if punch in (0, 4) else 'checkout'
-                    ev, created = _process_event(d.company, d, str(getattr(r, 'user_id', '')), event_type, ts, raw_payload={'source': 'sync', 'raw': str(r)})
+                    ev, created = _process_event(d.company, d, str(getattr(r, 'user_id', '')), event_type, ts, raw_payload={'source': 'sync', 'raw': str(r)}, reprocess=False)
                     if created:
                         ingested += 1
+                        if ev.attendance_id:
+                            days.add(ev.attendance.date)
                     else:
                         duplicates += 1
                 except Exception:
                     errors += 1
+            # Pair the new punches once per shift day instead of once per punch
+            process_days(d.company_id, days)
             d.last_pull = timezone.now()
             d.save(update_fields=['last_pull'])
         finally:
@@ -0,0 +1,60 @@
+// Live WebSocket client for /ws/live/ (see notifications.consumers.LiveConsumer)
+//
+// The server multiplexes topics over one socket and sends batch frames:
+// {"type": "batch", "messages": [{"topic", "type", "message"}, ...]}.
+// Handlers are registered per topic and message type; onOpen runs after every
+// (re)connect so pages can reload their snapshot and not miss deltas.
+class LiveSocket {
+    constructor(topics, options = {}) {
+        this.topics = topics;
+        this.handlers = {};
+        this.onOpen = options.onOpen || (() => {});
+        this.onClose = options.onClose || (() => {});
+        this.retryDelay = 1000;
+        this.maxRetryDelay = 30000;
+        this.closed = false;
+        this.connect();
+    }
+
+    on(topic, type, handler) {
+        this.handlers[`${topic}:${type}`] = handler;
+        return this;
+    }
+
+    connect() {
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        this.ws = new WebSocket(`${scheme}://${window.location.host}/ws/live/`);
+        this.ws.onopen = () => {
+            this.retryDelay = 1000;
+            this.send({type: 'subscribe', topics: this.topics});
+            this.onOpen();
+        };
+        this.ws.onmessage = (e) => {
+            let frame;
+            try { frame = JSON.parse(e.data); } catch (_) { return; }
+            (frame.type === 'batch' ? frame.messages : [frame]).forEach(m => {
+                const handler = this.handlers[`${m.topic}:${m.type}`];
+                if (handler) handler(m.message);
+            });
+        };
+        this.ws.onclose = () => {
+            this.onClose();
+            if (this.closed) return;
+            setTimeout(() => this.connect(), this.retryDelay);
+            this.retryDelay = Math.min(this.retryDelay * 2, this.maxRetryDelay);
+        };
+    }
+
+    send(data) {
+        if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            this.ws.send(JSON.stringify(data));
+        }
+    }
+
+    close() {
+        this.closed = true;
+        if (this.ws) this.ws.close();
+    }
+}
+
+window.LiveSocket = LiveSocket;
@@ -23,4 +23,6 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Configure Django settings for testing
 if not settings.configured:
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_wallet.settings')
+    # Sockets under test live in this process, so no Redis server is needed
+    os.environ.setdefault('CHANNEL_LAYER_IN_MEMORY', '1')
     django.setup()
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Shared fixtures for tests that write to the database.
+
+The suite runs against the project database (see tests/__init__.py), so
+tests that create rows take the ``db`` fixture: everything they write is
+rolled back when they finish. on_commit() callbacks never run inside it;
+wrap the code in TestCase.captureOnCommitCallbacks(execute=True) to run them.
+"""
+import uuid
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core_hr.models import Company, Department, Employee
+
+
+@pytest.fixture
+def db():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@pytest.fixture
+def company(db):
+    return make_company()
+
+
+@pytest.fixture
+def employee(company):
+    return make_employee(company)
+
+
+def make_company(**fields):
+    token = uuid.uuid4().hex[:8]
+    fields.setdefault('slug', f'test-company-{token}')
+    name = fields.pop('name', f'Test Company {token}')
+    return Company.objects.create(name=name, address='1 Test Street', phone='555-0100', email='test@example.com', **fields)
+
+
+def make_department(company, name=None, **fields):
+    return Department.objects.create(company=company, name=name or f'Dept {uuid.uuid4().hex[:6]}', **fields)
+
+
+def make_user(company=None, role='employee'):
+    return get_user_model().objects.create(username=f'user_{uuid.uuid4().hex[:10]}', company=company, role=role)
+
+
+def make_employee(company, department=None, role='employee', **fields):
+    user = make_user(company, role)
+    return Employee.objects.create(
+        user=user, company=company, department=department, employee_id=user.username[-8:], job_title='Tester', **fields,
+    )
@@ -0,0 +1,37 @@
+"""
+Unit tests for the monthly archive helpers and audit log cursors
+"""
+from datetime import date, datetime, timezone
+
+import pytest
+
+from accounts.audit import encode_audit_cursor, decode_audit_cursor
+from core_hr.archive import months_before, next_month, parse_month, read_jsonl_gz, write_jsonl_gz
+
+
+def test_month_arithmetic():
+    assert parse_month('2024-02') == date(2024, 2, 1)
+    assert next_month(date(2024, 12, 1)) == date(2025, 1, 1)
+    assert months_before(date(2025, 3, 15), 3) == date(2024, 12, 1)
+    assert months_before(date(2025, 3, 15), 0) == date(2025, 3, 1)
+
+
+def test_jsonl_gz_round_trip(tmp_path):
+    path = str(tmp_path / 'nested' / '2024-01.jsonl.gz')
+    rows = [{'pk': 1, 'timestamp': datetime(2024, 1, 1, tzinfo=timezone.utc), 'changes': {'a': 1}}, {'pk': 2}]
+    assert write_jsonl_gz(path, iter(rows)) == 2
+    assert list(read_jsonl_gz(path)) == [
+        {'pk': 1, 'timestamp': '2024-01-01T00:00:00Z', 'changes': {'a': 1}},
+        {'pk': 2},
+    ]
+
+
+class _Entry:
+    pk = 42
+    timestamp = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def test_audit_cursor_round_trip():
+    assert decode_audit_cursor(encode_audit_cursor(_Entry())) == (_Entry.timestamp, 42)
+    with pytest.raises(ValueError):
+        decode_audit_cursor('not-a-cursor')
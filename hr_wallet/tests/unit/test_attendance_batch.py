@@ -0,0 +1,28 @@
+"""
+Unit tests for parsing rows of the batch attendance correction API
+"""
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+
+from hr_dashboard.views import _parse_correction
+
+EMPLOYEES = {'7': SimpleNamespace(pk=7)}
+
+
+def test_row_sets_only_the_fields_given():
+    key, fields = _parse_correction({'employee_pk': 7, 'date': '2025-03-04', 'clock_out': '18:30', 'clock_in': None}, EMPLOYEES)
+    assert key == (7, date(2025, 3, 4))
+    assert fields == {'clock_in': None, 'clock_out': time(18, 30)}
+
+
+@pytest.mark.parametrize('row, error', [
+    ({'employee_pk': 8, 'date': '2025-03-04'}, 'employee not found'),
+    ({'employee_pk': 7, 'date': '04/03/2025'}, 'date must be YYYY-MM-DD'),
+    ({'employee_pk': 7, 'date': '2025-03-04', 'clock_in': '9am'}, 'clock_in must be HH:MM'),
+    ({'employee_pk': 7, 'date': '2025-03-04', 'status': 'holiday'}, 'status must be one of'),
+])
+def test_invalid_rows_are_rejected(row, error):
+    with pytest.raises(ValueError, match=error):
+        _parse_correction(row, EMPLOYEES)
@@ -0,0 +1,54 @@
+"""
+Unit tests for timesheet parsing in the attendance importer
+"""
+import io
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import make_aware
+
+from core_hr.attendance import ensure_attendance
+from core_hr.compact import dedupe_key
+from core_hr.imports import AttendanceImporter, ImportFileError, _day_hours, _header_map, read_rows
+from core_hr.models import BiometricEvent
+from core_hr.shifts import process_days
+
+
+def test_csv_rows_stream_with_line_numbers_and_blank_rows_skipped():
+    data = io.BytesIO(b'\xef\xbb\xbfEmployee ID,Date,Time In,Time Out\nE1,2025-03-04,09:00,17:00\n,,,\nE2,2025-03-04,,\n')
+    header, rows = read_rows(data, 'march.CSV')
+    assert _header_map(header) == {'employee_id': 0, 'date': 1, 'clock_in': 2, 'clock_out': 3}
+    assert list(rows) == [(2, ['E1', '2025-03-04', '09:00', '17:00']), (4, ['E2', '2025-03-04', '', ''])]
+
+
+def test_missing_columns_and_unknown_formats_are_rejected():
+    with pytest.raises(ImportFileError, match='date'):
+        _header_map(['employee_id', 'clock_in'])
+    with pytest.raises(ImportFileError):
+        read_rows(io.BytesIO(b''), 'march.xls')
+
+
+def test_day_hours_split_regular_and_overtime():
+    break_duration, hours, regular, break_hours = _day_hours(time(8), time(19), '60', 480)
+    assert break_duration == timedelta(minutes=60)
+    assert (hours, regular, break_hours) == (Decimal('10.00'), Decimal('8.00'), Decimal('1.00'))
+    assert _day_hours(None, None, None, 480)[1:] == (Decimal('0.00'), Decimal('0.00'), Decimal('0.00'))
+    with pytest.raises(ValueError):
+        _day_hours(time(9), time(10), '90', 480)
+
+
+def test_imported_days_survive_punch_reprocessing(employee):
+    day = date(2025, 3, 4)
+    att = ensure_attendance(employee, day)
+    ts = make_aware(datetime(2025, 3, 4, 7))
+    BiometricEvent.objects.create(
+        company_id=employee.company_id, device_user_id=employee.employee_id, event_type='checkin', timestamp=ts,
+        processed=True, attendance=att, dedupe_key=dedupe_key(None, employee.company_id, employee.employee_id, ts, 'checkin'),
+    )
+    header, rows = read_rows(io.BytesIO(f'employee_id,date,clock_in,clock_out\n{employee.employee_id},2025-03-04,09:00,17:00\n'.encode()), 'day.csv')
+    assert AttendanceImporter(employee.company_id).run(header, rows).imported == 1
+
+    process_days(employee.company_id, [day])
+    att.refresh_from_db()
+    assert (att.clock_in, att.clock_out, att.total_hours, att.manually_corrected) == (time(9), time(17), Decimal('8.00'), True)
@@ -0,0 +1,117 @@
+"""
+Unit tests for attendance write helpers
+"""
+import sqlite3
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+from django.test import TestCase
+
+from core_hr import attendance as attendance_writes
+from core_hr.attendance import (
+    apply_corrections, ensure_attendance, recompute_total_hours, record_punch, total_hours_for, update_attendance,
+    write_atomic,
+)
+from core_hr.models import Attendance, AttendanceDailyRollup
+
+DAY = date(2025, 3, 4)
+
+
+def test_total_hours_needs_both_punches():
+    assert total_hours_for(DAY, time(9), None) is None
+    assert total_hours_for(DAY, None, time(17)) is None
+
+
+def test_total_hours_less_break_and_overnight():
+    assert total_hours_for(DAY, time(9), time(17, 20), timedelta(minutes=30)) == Decimal('7.83')
+    assert total_hours_for(DAY, time(22), time(6)) == Decimal('8.00')
+
+
+def test_record_punch_keeps_earliest_in_and_latest_out(employee):
+    record_punch(employee, DAY, clock_in=time(9, 5))
+    record_punch(employee, DAY, clock_in=time(8, 55))
+    record_punch(employee, DAY, clock_in=time(9, 30))
+    record_punch(employee, DAY, clock_out=time(17))
+    att = record_punch(employee, DAY, clock_out=time(16))
+
+    assert (att.clock_in, att.clock_out, att.total_hours) == (time(8, 55), time(17), Decimal('8.08'))
+    assert Attendance.objects.filter(employee=employee, date=DAY).count() == 1
+
+
+def test_update_attendance_only_touches_the_given_fields(employee):
+    record_punch(employee, DAY, clock_in=time(9), clock_out=time(17))
+    Attendance.objects.filter(employee=employee, date=DAY).update(notes='Badge left at home')
+
+    att = update_attendance(employee, DAY, status='late')
+    assert (att.clock_in, att.clock_out, att.status, att.notes) == (time(9), time(17), 'late', 'Badge left at home')
+    assert att.total_hours == Decimal('8.00')
+
+    att = update_attendance(employee, DAY, clock_out=time(18))
+    assert (att.status, att.total_hours) == ('late', Decimal('9.00'))
+
+
+def test_recompute_does_not_write_hours_from_times_changed_underneath(employee, monkeypatch):
+    att = ensure_attendance(employee, DAY)
+    Attendance.objects.filter(pk=att.pk).update(clock_in=time(9), clock_out=time(17))
+    calls = []
+
+    def total_hours_racing_a_punch(*args):
+        # Another writer moves the clock-out after this recompute read the row
+        if not calls:
+            Attendance.objects.filter(pk=att.pk).update(clock_out=time(19))
+        calls.append(args)
+        return total_hours_for(*args)
+
+    monkeypatch.setattr(attendance_writes, 'total_hours_for', total_hours_racing_a_punch)
+    att = recompute_total_hours(att.pk)
+    assert len(calls) == 2
+    assert (att.clock_out, att.total_hours) == (time(19), Decimal('10.00'))
+    assert Attendance.objects.get(pk=att.pk).total_hours == Decimal('10.00')
+
+
+def test_clearing_a_time_clears_total_hours(company, employee):
+    record_punch(employee, DAY, clock_in=time(9), clock_out=time(17))
+
+    [(att, created, changes)] = apply_corrections(company.pk, [((employee.pk, DAY), {'clock_out': None})])
+    assert not created
+    assert changes == {'clock_out': (time(17), None), 'total_hours': (Decimal('8.00'), None)}
+    assert Attendance.objects.get(pk=att.pk).total_hours is None
+
+    update_attendance(employee, DAY, clock_out=time(18))
+    assert update_attendance(employee, DAY, clock_in=None).total_hours is None
+
+
+def test_correcting_a_day_without_a_row_counts_as_a_change(company, employee):
+    with TestCase.captureOnCommitCallbacks() as callbacks:
+        [(att, created, changes)] = apply_corrections(company.pk, [((employee.pk, DAY), {'status': 'present'})])
+    assert created and changes == {}
+    assert Attendance.objects.get(pk=att.pk).manually_corrected
+    assert AttendanceDailyRollup.objects.get(company=company, date=DAY).present_count == 1
+    # The stats bump is queued for after commit
+    assert len(callbacks) == 1
+
+
+def _other_writer_can_begin():
+    other = sqlite3.connect(connection.settings_dict['NAME'], timeout=0)
+    try:
+        other.execute('BEGIN IMMEDIATE')
+        other.rollback()
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        other.close()
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='SQLite write lock')
+def test_only_write_atomic_takes_the_write_lock_up_front():
+    with transaction.atomic():
+        assert _other_writer_can_begin()
+    with write_atomic():
+        assert not _other_writer_can_begin()
+        # Nested blocks are savepoints of the outer transaction
+        with write_atomic():
+            pass
+    assert _other_writer_can_begin()
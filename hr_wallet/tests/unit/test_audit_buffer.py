@@ -0,0 +1,56 @@
+"""
+Unit tests for the batched audit log buffer
+"""
+import time
+
+from accounts.audit import AuditLogBuffer
+
+
+def _capturing_buffer(monkeypatch, **kwargs):
+    buffer = AuditLogBuffer(**kwargs)
+    batches = []
+    monkeypatch.setattr(buffer, '_write', lambda batch: batches.append(list(batch)) if batch else None)
+    return buffer, batches
+
+
+def test_flushes_full_batches_and_remainder_on_stop(monkeypatch):
+    buffer, batches = _capturing_buffer(monkeypatch, flush_interval_ms=10000, batch_size=3)
+    for i in range(7):
+        assert buffer.put(i)
+    deadline = time.monotonic() + 2
+    while sum(map(len, batches)) < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.stop()
+    assert sorted(x for batch in batches for x in batch) == list(range(7))
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_flushes_partial_batch_after_interval(monkeypatch):
+    buffer, batches = _capturing_buffer(monkeypatch, flush_interval_ms=20, batch_size=100)
+    buffer.put('a')
+    deadline = time.monotonic() + 2
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert batches == [['a']]
+    buffer.stop()
+
+
+def test_drop_policy_when_full(monkeypatch):
+    buffer, batches = _capturing_buffer(monkeypatch, max_queue_size=2, overflow='drop')
+    # Keep the writer thread from draining the queue
+    monkeypatch.setattr(buffer, 'start', lambda: None)
+    buffer._thread = object()
+    assert buffer.put(1) and buffer.put(2)
+    assert buffer.put(3) is False
+    assert buffer.dropped == 1
+
+
+def test_block_policy_waits_then_drops(monkeypatch):
+    buffer, batches = _capturing_buffer(monkeypatch, max_queue_size=1, overflow='block', block_timeout_ms=30)
+    monkeypatch.setattr(buffer, 'start', lambda: None)
+    buffer._thread = object()
+    assert buffer.put(1)
+    started = time.monotonic()
+    assert buffer.put(2) is False
+    assert time.monotonic() - started >= 0.025
+    assert buffer.dropped == 1
@@ -0,0 +1,34 @@
+"""
+Unit tests for the compact biometric event key and payload encoding
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from core_hr.compact import dedupe_key, dedupe_key_from_hash, decode_payload, encode_payload
+
+
+def test_dedupe_key_matches_legacy_hash_prefix():
+    ts = datetime(2025, 3, 4, 8, 30, tzinfo=timezone.utc)
+    legacy = hashlib.sha256(f'7|5|1001|{int(ts.timestamp())}|checkin'.encode('utf-8')).hexdigest()
+    key = dedupe_key(7, 5, '1001', ts, 'checkin')
+    assert key == dedupe_key_from_hash(legacy)
+    assert -2 ** 63 <= key < 2 ** 63
+    assert dedupe_key(None, 5, '1001', ts, 'checkin') != key
+
+
+@pytest.mark.parametrize('payload', [
+    {'raw': '<Attendance>: 1001 : 2025-03-04 08:30:00 (1, 0)', 'source': 'sync'},
+    {'device_user_id': '1001', 'event_type': 'checkout', 'timestamp': '2025-03-04T17:00:00Z', 'extra': [1, 2]},
+])
+def test_payload_round_trip_is_smaller(payload):
+    blob = encode_payload(payload)
+    assert decode_payload(blob) == payload
+    assert len(blob) < len(json.dumps(payload))
+
+
+def test_unknown_payload_version_rejected():
+    with pytest.raises(ValueError):
+        decode_payload(b'\x02' + encode_payload({'a': 1})[1:])
@@ -0,0 +1,46 @@
+"""
+Unit tests for the channel-layer circuit breaker
+"""
+from notifications.realtime import ChannelLayerBreaker
+
+
+def test_opens_after_threshold_and_skips_sends():
+    breaker = ChannelLayerBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure(0.001)
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert breaker.snapshot()['skipped'] == 1
+
+
+def test_half_open_allows_one_trial():
+    breaker = ChannelLayerBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.allow()
+    breaker.record_failure(0.001)
+    breaker.opened_at -= 31
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success(0.002)
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens():
+    breaker = ChannelLayerBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.allow()
+    breaker.record_failure(0.001)
+    breaker.opened_at -= 31
+    assert breaker.allow()
+    breaker.record_failure(0.001)
+    assert breaker.state == 'open'
+
+
+def test_latency_percentiles():
+    breaker = ChannelLayerBreaker()
+    for ms in range(1, 101):
+        breaker.record_success(ms / 1000.0)
+    latency = breaker.snapshot()['latency_ms']
+    assert latency['p50'] == 51.0
+    assert latency['max'] == 100.0
@@ -0,0 +1,104 @@
+"""
+Unit tests for the cached, versioned company dashboard statistics
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client
+from django.utils import timezone
+
+from core_hr import stats
+from core_hr.models import Attendance, LeaveBalance, LeaveRequest, WorkHours
+from tests.conftest import make_company, make_employee, make_user
+
+
+class _Company:
+    def __init__(self, pk):
+        self.pk = pk
+
+
+def test_bump_invalidates_cached_stats(monkeypatch):
+    cache.clear()
+    calls = []
+
+    def fake_compute(company_id, today):
+        calls.append(company_id)
+        return {'total_employees': len(calls)}
+
+    monkeypatch.setattr(stats, '_compute_company_stats', fake_compute)
+    company = _Company(9001)
+
+    assert stats.get_company_dashboard_stats(company) == {'total_employees': 1}
+    # Second read is served from cache
+    assert stats.get_company_dashboard_stats(company) == {'total_employees': 1}
+    assert calls == [9001]
+
+    stats.bump_company_stats_version(company.pk)
+    assert stats.get_company_dashboard_stats(company) == {'total_employees': 2}
+    assert calls == [9001, 9001]
+
+
+def test_versions_are_per_company():
+    cache.clear()
+    v1 = stats.get_company_stats_version(1)
+    v2 = stats.get_company_stats_version(2)
+    stats.bump_company_stats_version(1)
+    assert stats.get_company_stats_version(1) == v1 + 1
+    assert stats.get_company_stats_version(2) == v2
+
+
+def test_no_company_returns_zeroes():
+    assert stats.get_company_dashboard_stats(None) == stats.EMPTY_COMPANY_STATS
+
+
+def _employee_version(employee):
+    return stats._get_version(stats._employee_version_key(employee.pk))
+
+
+def test_employee_stats_are_cached_until_a_write_bumps_them(employee):
+    today = timezone.now().date()
+    LeaveBalance.objects.create(employee=employee, annual_leave_used=4)
+    WorkHours.objects.create(employee=employee, date=today, regular_hours=Decimal('6.00'))
+    LeaveRequest.objects.create(
+        employee=employee, leave_type='annual', start_date=today + timedelta(days=30), end_date=today + timedelta(days=31), reason='Trip',
+    )
+
+    cached = stats.get_employee_dashboard_stats(employee)
+    assert cached == stats._compute_employee_stats(employee, today, 30)
+    assert (cached['hours_worked'], cached['pending_requests'], cached['leave_balance']) == (Decimal('6.00'), 1, 17)
+
+    # Queryset updates skip the signals, so the cached figures stay until something bumps the version
+    LeaveBalance.objects.filter(employee=employee).update(annual_leave_used=10)
+    assert stats.get_employee_dashboard_stats(employee)['leave_balance'] == 17
+    stats.bump_employee_stats_version(employee.pk)
+    assert stats.get_employee_dashboard_stats(employee)['leave_balance'] == 11
+
+
+def test_attendance_leave_and_balance_writes_bump_the_employee_version(employee):
+    today = timezone.now().date()
+    writes = [
+        lambda: Attendance.objects.create(employee=employee, date=today, status='present'),
+        lambda: LeaveRequest.objects.create(
+            employee=employee, leave_type='sick', start_date=today + timedelta(days=40), end_date=today + timedelta(days=40), reason='Dentist',
+        ),
+        lambda: LeaveBalance.objects.create(employee=employee),
+        lambda: WorkHours.objects.create(employee=employee, date=today, regular_hours=Decimal('1.00')),
+    ]
+    for write in writes:
+        version = _employee_version(employee)
+        write()
+        assert _employee_version(employee) > version
+
+
+def test_super_admin_dashboard_counts_every_company(company):
+    make_employee(company, role='hr_manager')
+    make_employee(make_company(), role='hr_manager')
+    client = Client()
+    client.force_login(make_user(company, role='super_admin'))
+
+    response = client.get('/admin-panel/')
+    users = get_user_model().objects
+    assert f'>{users.count()}</h3>'.encode() in response.content
+    assert f'>{users.filter(role="hr_manager").count()}</h3>'.encode() in response.content
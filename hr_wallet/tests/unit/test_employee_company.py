@@ -0,0 +1,31 @@
+"""
+Unit tests for keeping denormalized company columns in step with the employee
+"""
+from datetime import date
+from decimal import Decimal
+
+from core_hr.models import Attendance, AttendanceDailyRollup, EmployeeMonthlyRollup, WorkHours
+from tests.conftest import make_company
+
+DAY = date(2025, 3, 3)
+
+
+def test_rows_take_the_company_of_a_loaded_employee(company, employee):
+    att = Attendance(employee=employee, date=DAY, status='present', company=make_company())
+    att.save()
+    assert att.company_id == company.pk
+
+
+def test_moving_an_employee_moves_their_rows_and_rollups(company, employee):
+    Attendance.objects.create(employee=employee, date=DAY, status='present', total_hours=Decimal('8.00'))
+    WorkHours.objects.create(employee=employee, date=DAY, regular_hours=Decimal('8.00'), overtime_hours=Decimal('1.00'))
+    other = make_company()
+
+    employee.company = other
+    employee.save()
+
+    assert set(Attendance.objects.filter(employee=employee).values_list('company_id', flat=True)) == {other.pk}
+    assert set(WorkHours.objects.filter(employee=employee).values_list('company_id', flat=True)) == {other.pk}
+    assert not AttendanceDailyRollup.objects.filter(company=company).exists()
+    assert AttendanceDailyRollup.objects.get(company=other, date=DAY).present_count == 1
+    assert EmployeeMonthlyRollup.objects.get(employee=employee).company_id == other.pk
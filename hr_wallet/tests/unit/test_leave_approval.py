@@ -0,0 +1,65 @@
+"""
+Unit tests for set-based bulk leave approval
+"""
+import json
+from datetime import date
+
+from django.test import Client, TestCase
+
+from core_hr.models import LeaveBalance, LeaveRequest
+from core_hr.stats import get_company_stats_version
+from tests.conftest import make_employee
+
+
+def _leave(employee, leave_type, start, end, status='pending'):
+    return LeaveRequest.objects.create(
+        employee=employee, leave_type=leave_type, start_date=start, end_date=end, reason='Test', status=status,
+    )
+
+
+def test_bulk_approval_draws_each_balance_down_by_the_total(company, employee):
+    LeaveBalance.objects.create(employee=employee, annual_leave_used=2)
+    pending = [
+        _leave(employee, 'annual', date(2025, 3, 3), date(2025, 3, 4)),
+        _leave(employee, 'annual', date(2025, 3, 10), date(2025, 3, 12)),
+        _leave(employee, 'annual', date(2025, 3, 17), date(2025, 3, 17)),
+        _leave(employee, 'sick', date(2025, 3, 24), date(2025, 3, 25)),
+    ]
+    decided = [
+        _leave(employee, 'annual', date(2025, 4, 7), date(2025, 4, 11), status='approved'),
+        _leave(employee, 'annual', date(2025, 4, 14), date(2025, 4, 15), status='rejected'),
+    ]
+    client = Client()
+    client.force_login(make_employee(company, role='hr_manager').user)
+
+    response = client.post(
+        '/hr-dashboard/api/leaves/bulk/', json.dumps({'ids': [leave.pk for leave in pending + decided], 'status': 'approved'}),
+        content_type='application/json',
+    )
+    assert response.json()['updated'] == 4
+
+    balance = LeaveBalance.objects.get(employee=employee)
+    assert (balance.annual_leave_used, balance.sick_leave_used) == (2 + 2 + 3 + 1, 2)
+    statuses = dict(LeaveRequest.objects.filter(employee=employee).values_list('pk', 'status'))
+    assert [statuses[leave.pk] for leave in pending + decided] == ['approved'] * 5 + ['rejected']
+
+    # Approving the same requests again changes nothing
+    client.post(
+        '/hr-dashboard/api/leaves/bulk/', json.dumps({'ids': [leave.pk for leave in pending], 'status': 'approved'}),
+        content_type='application/json',
+    )
+    assert LeaveBalance.objects.get(employee=employee).annual_leave_used == 8
+
+
+def test_bulk_approval_invalidates_the_tenant_stats(company, employee):
+    leave = _leave(employee, 'annual', date(2025, 3, 3), date(2025, 3, 4))
+    client = Client()
+    client.force_login(make_employee(company, role='hr_manager').user)
+    version = get_company_stats_version(company.pk)
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        client.post(
+            '/hr-dashboard/api/leaves/bulk/', json.dumps({'ids': [leave.pk], 'status': 'approved'}),
+            content_type='application/json',
+        )
+    assert get_company_stats_version(company.pk) != version
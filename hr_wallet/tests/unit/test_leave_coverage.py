@@ -0,0 +1,32 @@
+"""
+Unit tests for team leave coverage on pending leave requests
+"""
+from datetime import date
+from types import SimpleNamespace
+
+from core_hr import leave_coverage
+
+
+def _leave(pk, department_id, start, end):
+    return SimpleNamespace(pk=pk, company_id=1, start_date=start, end_date=end, employee=SimpleNamespace(department_id=department_id))
+
+
+def test_peak_team_off_counts_colleagues_in_the_same_department(monkeypatch):
+    off = {
+        (date(2026, 3, 2), 7): 1,
+        (date(2026, 3, 3), 7): 3,
+        (date(2026, 3, 4), 7): 2,
+        (date(2026, 3, 3), 8): 4,
+    }
+    monkeypatch.setattr(leave_coverage, 'coverage', lambda company_id, start, end, department_ids: off)
+    leaves = [
+        _leave(1, 7, date(2026, 3, 2), date(2026, 3, 3)),
+        _leave(2, 7, date(2026, 3, 4), date(2026, 3, 6)),
+        _leave(3, None, date(2026, 3, 3), date(2026, 3, 3)),
+    ]
+    assert leave_coverage.peak_team_off(leaves) == {1: 2, 2: 1, 3: 0}
+
+
+def test_peak_team_off_without_leave_makes_no_query(monkeypatch):
+    monkeypatch.setattr(leave_coverage, 'coverage', None)
+    assert leave_coverage.peak_team_off([]) == {}
@@ -0,0 +1,88 @@
+"""
+Unit tests for the leave ledger helpers and its posting rules
+"""
+from datetime import date
+from decimal import Decimal
+
+from core_hr.leave_ledger import (
+    ACCRUED_TYPES, ZERO, balance_as_of, month_end, post_cancellation, post_carry_over, post_monthly_accruals, post_usage,
+    take_snapshots,
+)
+from core_hr.models import LEAVE_TYPE_CHOICES, LeaveBalance, LeaveBalanceSnapshot, LeaveLedgerEntry, LeaveRequest
+from tests.conftest import make_employee
+
+
+def test_month_end_handles_short_and_leap_months():
+    assert month_end(date(2025, 2, 10)) == date(2025, 2, 28)
+    assert month_end(date(2024, 2, 1)) == date(2024, 2, 29)
+    assert month_end(date(2025, 12, 31)) == date(2025, 12, 31)
+
+
+def test_accrued_types_map_to_leave_balance_totals():
+    leave_types = {value for value, _ in LEAVE_TYPE_CHOICES}
+    for leave_type, field in ACCRUED_TYPES.items():
+        assert leave_type in leave_types
+        assert LeaveBalance._meta.get_field(field).default > 0
+
+
+def test_periodic_and_request_postings_are_unique():
+    constraints = {c.name: c for c in LeaveLedgerEntry._meta.constraints}
+    assert constraints['uniq_leave_periodic_posting'].fields == ('employee', 'leave_type', 'kind', 'date')
+    assert constraints['uniq_leave_request_posting'].fields == ('leave_request', 'kind')
+
+
+def _entry(employee, kind, day, days, leave_type='annual'):
+    return LeaveLedgerEntry.objects.create(
+        employee=employee, company_id=employee.company_id, leave_type=leave_type, kind=kind, date=day, days=Decimal(days),
+    )
+
+
+def test_balance_from_a_snapshot_plus_later_and_back_dated_entries(employee):
+    _entry(employee, 'accrual', date(2025, 1, 31), '2.00')
+    _entry(employee, 'adjustment', date(2025, 1, 10), '-0.50')
+    assert take_snapshots(date(2025, 1, 31), employee.company_id) == 1
+    _entry(employee, 'accrual', date(2025, 2, 28), '2.00')
+    # Posted after the snapshot but effective before it
+    _entry(employee, 'adjustment', date(2025, 1, 15), '-1.00')
+
+    assert balance_as_of(employee.pk, 'annual', date(2025, 1, 12)) == Decimal('-0.50')
+    assert balance_as_of(employee.pk, 'annual', date(2025, 1, 31)) == Decimal('0.50')
+    assert balance_as_of(employee.pk, 'annual', date(2025, 3, 1)) == Decimal('2.50')
+    # A corrupted snapshot shows that the balance really is read from it
+    LeaveBalanceSnapshot.objects.filter(employee=employee).update(balance=Decimal('10.00'))
+    assert balance_as_of(employee.pk, 'annual', date(2025, 3, 1)) == Decimal('11.00')
+
+
+def test_accrual_and_carry_over_reruns_add_nothing(company):
+    employee = make_employee(company, hire_date=date(2024, 1, 1))
+    LeaveBalance.objects.create(employee=employee, annual_leave_total=24, sick_leave_total=0, personal_leave_total=0)
+
+    for month in range(1, 13):
+        assert post_monthly_accruals(date(2025, month, 1), company.pk) == 1
+    assert post_monthly_accruals(date(2025, 12, 1), company.pk) == 0
+    assert balance_as_of(employee.pk, 'annual', date(2025, 12, 31)) == Decimal('24.00')
+
+    assert post_carry_over(2025, 5, company.pk) == 1
+    assert post_carry_over(2025, 5, company.pk) == 0
+    assert balance_as_of(employee.pk, 'annual', date(2026, 1, 1)) == Decimal('5.00')
+
+
+def test_cancellation_returns_what_was_drawn(employee):
+    leave = LeaveRequest.objects.create(
+        employee=employee, leave_type='annual', start_date=date(2025, 3, 3), end_date=date(2025, 3, 7), reason='Trip',
+    )
+    drawn = leave.days_requested
+    post_usage([leave])
+    LeaveRequest.objects.filter(pk=leave.pk).update(days_requested=drawn + 3)
+    leave.refresh_from_db()
+
+    post_cancellation(leave)
+    post_cancellation(leave)
+    assert balance_as_of(employee.pk, 'annual', date(2025, 12, 31)) == ZERO
+    assert LeaveLedgerEntry.objects.get(leave_request=leave, kind='cancellation').days == drawn
+
+    never_posted = LeaveRequest.objects.create(
+        employee=employee, leave_type='annual', start_date=date(2025, 4, 7), end_date=date(2025, 4, 8), reason='Trip',
+    )
+    post_cancellation(never_posted)
+    assert not LeaveLedgerEntry.objects.filter(leave_request=never_posted).exists()
@@ -0,0 +1,78 @@
+"""
+Unit tests for approving leave that overlaps leave booked before overlaps were rejected
+"""
+import json
+from datetime import date
+
+from django.test import Client
+
+from core_hr.models import LeaveDay, LeaveRequest
+from tests.conftest import make_employee
+
+
+def _legacy_leave(employee, start, end):
+    """A pending request without days, as left by the migration that introduced LeaveDay"""
+    [leave] = LeaveRequest.objects.bulk_create([LeaveRequest(
+        employee=employee, company_id=employee.company_id, leave_type='annual', start_date=start, end_date=end,
+        days_requested=(end - start).days + 1, reason='Legacy',
+    )])
+    return leave
+
+
+def _manager_client(company):
+    client = Client()
+    client.force_login(make_employee(company, role='hr_manager').user)
+    return client
+
+
+def test_clashes_against_held_days_and_within_the_batch(employee):
+    booked = LeaveRequest.objects.create(
+        employee=employee, leave_type='annual', start_date=date(2025, 3, 3), end_date=date(2025, 3, 5), reason='Booked',
+    )
+    overlapping = _legacy_leave(employee, date(2025, 3, 5), date(2025, 3, 6))
+    first = _legacy_leave(employee, date(2025, 4, 1), date(2025, 4, 3))
+    second = _legacy_leave(employee, date(2025, 4, 2), date(2025, 4, 4))
+
+    assert LeaveDay.clashes_for([booked.pk, overlapping.pk, first.pk, second.pk]) == {
+        overlapping.pk: date(2025, 3, 5),
+        second.pk: date(2025, 4, 2),
+    }
+
+
+def test_approving_a_clashing_request_names_the_day(company, employee):
+    LeaveRequest.objects.create(
+        employee=employee, leave_type='annual', start_date=date(2025, 3, 3), end_date=date(2025, 3, 5), reason='Booked',
+    )
+    legacy = _legacy_leave(employee, date(2025, 3, 4), date(2025, 3, 6))
+
+    response = _manager_client(company).patch(
+        f'/hr-dashboard/api/leaves/{legacy.pk}/status/', json.dumps({'status': 'approved'}), content_type='application/json',
+    )
+    assert response.status_code == 409
+    assert response.json()['date'] == '2025-03-04'
+    legacy.refresh_from_db()
+    assert legacy.status == 'pending'
+
+
+def test_bulk_approval_skips_clashing_requests(company, employee):
+    booked = LeaveRequest.objects.create(
+        employee=employee, leave_type='annual', start_date=date(2025, 3, 3), end_date=date(2025, 3, 5), reason='Booked',
+    )
+    legacy = _legacy_leave(employee, date(2025, 3, 5), date(2025, 3, 6))
+
+    response = _manager_client(company).post(
+        '/hr-dashboard/api/leaves/bulk/', json.dumps({'ids': [booked.pk, legacy.pk], 'status': 'approved'}),
+        content_type='application/json',
+    )
+    assert response.status_code == 200
+    assert response.json() == {'success': True, 'updated': 1, 'skipped': [{'id': legacy.pk, 'date': '2025-03-05'}]}
+    assert dict(LeaveRequest.objects.filter(pk__in=[booked.pk, legacy.pk]).values_list('pk', 'status')) == {
+        booked.pk: 'approved', legacy.pk: 'pending',
+    }
+    assert set(LeaveDay.objects.filter(leave_request=booked).values_list('status', flat=True)) == {'approved'}
+
+
+def test_coverage_rejects_a_non_numeric_department(company):
+    client = _manager_client(company)
+    assert client.get('/hr-dashboard/api/leaves/coverage/?department_id=abc').status_code == 400
+    assert client.get('/hr-dashboard/api/leaves/coverage/?date_from=2025-03-01').status_code == 200
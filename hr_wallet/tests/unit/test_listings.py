@@ -0,0 +1,69 @@
+"""
+Unit tests for the cached department and company listings
+"""
+import json
+
+from django.test import Client, TestCase
+
+from core_hr import listings
+from core_hr.listings import _manager_name, bump_listing_version, get_listing_version
+from core_hr.stats import get_company_stats_version
+from tests.conftest import make_department, make_employee, make_user
+
+
+def test_manager_name_prefers_full_name_then_username():
+    row = {'manager': 3, 'manager__first_name': 'Ada', 'manager__last_name': 'Lovelace', 'manager__username': 'ada'}
+    assert _manager_name(row) == 'Ada Lovelace'
+    assert 'manager__username' not in row
+    assert _manager_name({'manager': 3, 'manager__first_name': '', 'manager__last_name': '', 'manager__username': 'ada'}) == 'ada'
+    assert _manager_name({'manager': None, 'manager__first_name': None, 'manager__last_name': None, 'manager__username': None}) == ''
+
+
+def test_bumping_a_company_invalidates_its_listings_and_the_cross_company_ones():
+    company, other = get_listing_version(9101), get_listing_version(9102)
+    everything = get_listing_version()
+    bump_listing_version(9101)
+    assert get_listing_version(9101) == company + 1
+    assert get_listing_version() == everything + 1
+    assert get_listing_version(9102) == other
+
+
+def test_listing_is_computed_once_per_version():
+    calls = []
+    compute = lambda: calls.append(1) or [{'id': 1}]
+    assert listings._cached('test', 9103, compute) == [{'id': 1}]
+    assert listings._cached('test', 9103, compute) == [{'id': 1}]
+    bump_listing_version(9103)
+    listings._cached('test', 9103, compute)
+    assert len(calls) == 2
+
+
+def test_bulk_user_updates_invalidate_listings_after_commit(company):
+    department = make_department(company)
+    employee = make_employee(company)
+    client = Client()
+    client.force_login(make_employee(company, role='super_admin').user)
+
+    for body in ({'action': 'set_status', 'is_active': False}, {'action': 'transfer_department', 'department_id': department.pk}):
+        listing, stats = get_listing_version(company.pk), get_company_stats_version(company.pk)
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                '/accounts/api/users/bulk/', json.dumps({'ids': [employee.user_id], **body}), content_type='application/json',
+            )
+            assert response.json() == {'success': True, 'updated': 1}
+            assert get_listing_version(company.pk) == listing
+        assert get_listing_version(company.pk) > listing
+        assert get_company_stats_version(company.pk) != stats
+
+    employee.refresh_from_db()
+    assert (employee.is_active, employee.department_id) == (False, department.pk)
+
+
+def test_department_listing_needs_a_company(company):
+    make_department(company)
+    client = Client()
+    client.force_login(make_user(role='super_admin'))
+    assert client.get('/api/departments/').json() == {'success': True, 'data': []}
+
+    client.force_login(make_employee(company, role='hr_manager').user)
+    assert len(client.get('/api/departments/').json()['data']) == 1
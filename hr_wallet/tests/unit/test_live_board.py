@@ -0,0 +1,91 @@
+"""
+Unit tests for live attendance board deltas and snapshots
+"""
+import asyncio
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.test import TestCase
+
+from core_hr.compact import dedupe_key
+from core_hr.live import attendance_snapshot, publish_attendance
+from core_hr.models import Attendance, BiometricEvent
+from tests.conftest import make_department, make_employee
+
+DAY = date(2025, 3, 3)
+
+
+def _listen(company):
+    layer = get_channel_layer()
+    channel = async_to_sync(layer.new_channel)()
+    async_to_sync(layer.group_add)(f'attendance_{company.pk}', channel)
+    return layer, channel
+
+
+def _drain(layer, channel):
+    async def receive_all():
+        messages = []
+        while True:
+            try:
+                messages.append(await asyncio.wait_for(layer.receive(channel), 0.05))
+            except asyncio.TimeoutError:
+                return messages
+    return async_to_sync(receive_all)()
+
+
+def test_delta_is_published_after_commit(company, employee):
+    layer, channel = _listen(company)
+    att = Attendance.objects.create(employee=employee, date=DAY, clock_in=time(9), status='present')
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        publish_attendance(att)
+        assert _drain(layer, channel) == []
+
+    assert _drain(layer, channel) == [{
+        'type': 'live_message', 'topic': 'attendance', 'event': 'attendance',
+        'message': {'e': employee.pk, 'd': '2025-03-03', 'in': '09:00:00', 'out': None, 'h': None, 's': 'present', 'src': 'manual'},
+    }]
+
+
+def test_rolled_back_write_publishes_nothing(company, employee):
+    layer, channel = _listen(company)
+    with TestCase.captureOnCommitCallbacks(execute=True) as callbacks:
+        try:
+            with transaction.atomic():
+                publish_attendance(Attendance.objects.create(employee=employee, date=DAY, status='present'))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+    assert callbacks == []
+    assert _drain(layer, channel) == []
+
+
+def test_snapshot_lists_active_employees_and_sources(company):
+    department = make_department(company, name='Ops')
+    first = make_employee(company, department)
+    second = make_employee(company)
+    make_employee(company, is_active=False)
+    first.user.first_name, first.user.last_name = 'Ada', 'Lovelace'
+    first.user.save()
+
+    biometric = Attendance.objects.create(employee=first, date=DAY, status='late', total_hours=Decimal('7.50'))
+    Attendance.objects.create(employee=second, date=DAY, status='present')
+    Attendance.objects.create(employee=second, date=date(2025, 3, 4), status='absent')
+    punched_at = datetime(2025, 3, 3, 9, tzinfo=timezone.utc)
+    BiometricEvent.objects.create(
+        company=company, device_user_id='7', timestamp=punched_at, attendance=biometric,
+        dedupe_key=dedupe_key(None, company.pk, '7', punched_at, 'unknown'),
+    )
+
+    snapshot = attendance_snapshot(company.pk, DAY)
+    assert snapshot['date'] == '2025-03-03'
+    assert sorted(row['e'] for row in snapshot['employees']) == sorted([first.pk, second.pk])
+    assert {'e': first.pk, 'id': first.employee_id, 'name': 'Ada Lovelace', 'dept': 'Ops'} in snapshot['employees']
+    assert {row['e']: (row['s'], row['h'], row['src']) for row in snapshot['attendance']} == {
+        first.pk: ('late', '7.50', 'biometric'),
+        second.pk: ('present', None, 'manual'),
+    }
+    assert snapshot['summary'] == {'present': 1, 'late': 1, 'half_day': 0, 'absent': 0}
@@ -0,0 +1,132 @@
+"""
+Unit tests for the multiplexed LiveConsumer websocket
+"""
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import override_settings
+
+from notifications.models import Notification
+from notifications.routing import websocket_urlpatterns
+from tests.conftest import make_company, make_employee
+
+live_settings = override_settings(LIVE_FLUSH_INTERVAL_MS=50)
+
+
+def _communicator(user, path='/ws/live/'):
+    communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+    communicator.scope['user'] = user
+    return communicator
+
+
+async def _frame(communicator):
+    frame = json.loads(await communicator.receive_from(timeout=2))
+    assert frame['type'] == 'batch'
+    return frame['messages']
+
+
+@live_settings
+def test_topic_authorization(company):
+    employee = make_employee(company)
+    manager = make_employee(company, role='hr_manager')
+
+    async def subscribe(user):
+        communicator = _communicator(user)
+        connected, _ = await communicator.connect()
+        assert connected
+        await _frame(communicator)
+        await communicator.send_json_to({'type': 'subscribe', 'topics': ['attendance', 'devices']})
+        messages = await _frame(communicator)
+        await communicator.disconnect()
+        return messages[-1]['message']
+
+    assert async_to_sync(subscribe)(employee.user) == {'topics': ['notifications'], 'denied': ['attendance', 'devices']}
+    assert async_to_sync(subscribe)(manager.user) == {'topics': ['attendance', 'devices', 'notifications'], 'denied': []}
+
+
+@live_settings
+def test_connect_rejects_a_mismatched_legacy_route(employee):
+    async def connect():
+        communicator = _communicator(employee.user, f'/ws/notifications/{employee.user_id + 1}/')
+        connected, code = await communicator.connect()
+        return connected, code
+
+    assert async_to_sync(connect)() == (False, 4403)
+
+
+@live_settings
+def test_messages_in_one_interval_share_a_frame(company):
+    manager = make_employee(company, role='hr_manager')
+
+    async def run():
+        communicator = _communicator(manager.user)
+        await communicator.connect()
+        await communicator.send_json_to({'type': 'subscribe', 'topics': ['attendance']})
+        await _frame(communicator)
+
+        layer = get_channel_layer()
+        for i in range(3):
+            await layer.group_send(f'attendance_{company.pk}', {
+                'type': 'live_message', 'topic': 'attendance', 'event': 'punch', 'message': {'n': i},
+            })
+        await layer.group_send(f'notifications_{manager.user_id}', {'type': 'notification_message', 'message': {'id': 1}})
+        messages = await _frame(communicator)
+        await communicator.disconnect()
+        return messages
+
+    messages = async_to_sync(run)()
+    assert [(m['topic'], m['type']) for m in messages] == [('attendance', 'punch')] * 3 + [('notifications', 'notification')]
+    assert [m['message'] for m in messages[:3]] == [{'n': 0}, {'n': 1}, {'n': 2}]
+
+
+@pytest.fixture
+def committed_user():
+    """database_sync_to_async closes the connection, which the rollback fixture cannot survive"""
+    company = make_company()
+    user = make_employee(company).user
+    yield user
+    company.delete()
+    user.delete()
+
+
+@live_settings
+def test_mark_read_acks_are_applied_together(committed_user):
+    user = committed_user
+    notes = Notification.objects.bulk_create([Notification(user=user, title=f'N{i}', message='m') for i in range(3)])
+
+    async def run():
+        communicator = _communicator(user)
+        await communicator.connect()
+        await _frame(communicator)
+        await communicator.send_json_to({'type': 'mark_read', 'notification_id': notes[0].pk})
+        await communicator.send_json_to({'type': 'mark_read', 'notification_ids': [notes[1].pk]})
+        messages = await _frame(communicator)
+        await communicator.disconnect()
+        return messages
+
+    assert async_to_sync(run)() == [{'topic': 'notifications', 'type': 'read', 'message': {'ids': sorted([notes[0].pk, notes[1].pk])}}]
+    assert list(Notification.objects.filter(user=user, is_read=False).values_list('pk', flat=True)) == [notes[2].pk]
+
+
+@live_settings
+def test_malformed_mark_read_gets_an_error_frame(employee):
+    async def run():
+        communicator = _communicator(employee.user)
+        await communicator.connect()
+        await _frame(communicator)
+        for ids in (5, '12', [1, 'x'], [True]):
+            await communicator.send_json_to({'type': 'mark_read', 'notification_ids': ids})
+        await communicator.send_json_to({'type': 'mark_read', 'notification_id': '7'})
+        messages = await _frame(communicator)
+        # The socket stays open
+        await communicator.send_json_to({'type': 'subscribe', 'topics': []})
+        assert (await _frame(communicator))[0]['type'] == 'subscribed'
+        await communicator.disconnect()
+        return messages
+
+    messages = async_to_sync(run)()
+    assert messages == [{'topic': 'error', 'type': 'error', 'message': {'error': 'notification_ids must be a list of integers'}}] * 5
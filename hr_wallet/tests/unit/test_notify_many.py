@@ -0,0 +1,80 @@
+"""
+Unit tests for fan-out notification inserts and their after-commit push
+"""
+from django.db import transaction
+from django.test import TestCase
+
+from notifications import services
+from notifications.models import Notification, NotificationPreference
+from notifications.services import notify_many
+from tests.conftest import make_user
+
+
+def _capture_dispatch(monkeypatch):
+    sent = []
+    monkeypatch.setattr(services, 'dispatch_notifications', lambda payloads, batch_size: sent.extend(payloads))
+    return sent
+
+
+def test_inserts_in_chunks_and_reports_progress(db, monkeypatch):
+    _capture_dispatch(monkeypatch)
+    users = [make_user() for _ in range(5)]
+    progress = []
+    result = notify_many(users + [users[0].pk], 'Hello', 'World', batch_size=2, progress=lambda done, total: progress.append((done, total)))
+
+    assert (result.created, result.queued_for_push) == (5, 5)
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert Notification.objects.filter(user__in=users, title='Hello').count() == 5
+
+
+def test_users_with_in_app_disabled_are_stored_but_not_pushed(db, monkeypatch):
+    sent = _capture_dispatch(monkeypatch)
+    muted, default, enabled = make_user(), make_user(), make_user()
+    NotificationPreference.objects.create(user=muted, in_app_enabled=False)
+    NotificationPreference.objects.create(user=enabled, in_app_enabled=True)
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        result = notify_many([muted, default, enabled], 'Hello', 'World', wait=True)
+    assert (result.created, result.queued_for_push) == (3, 2)
+    assert sorted(user_id for user_id, _ in sent) == sorted([default.pk, enabled.pk])
+    assert Notification.objects.filter(user=muted).exists()
+
+
+def test_push_waits_for_commit_and_is_dropped_on_rollback(db, monkeypatch):
+    sent = _capture_dispatch(monkeypatch)
+    user = make_user()
+    with TestCase.captureOnCommitCallbacks() as callbacks:
+        notify_many([user], 'Hello', 'World')
+        assert sent == []
+    for callback in callbacks:
+        callback()
+    services._dispatch_executor.submit(lambda: None).result()
+    assert [payload['title'] for _, payload in sent] == ['Hello']
+
+    with TestCase.captureOnCommitCallbacks() as callbacks:
+        try:
+            with transaction.atomic():
+                notify_many([user], 'Rolled back', 'World')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+    assert callbacks == []
+
+
+def test_rows_are_read_back_when_the_backend_returns_no_ids(db, monkeypatch):
+    sent = _capture_dispatch(monkeypatch)
+    users = [make_user(), make_user()]
+    bulk_create = Notification.objects.bulk_create
+
+    def bulk_create_without_ids(rows, **kwargs):
+        rows = bulk_create(rows, **kwargs)
+        for row in rows:
+            row.pk = None
+        return rows
+
+    monkeypatch.setattr(Notification.objects, 'bulk_create', bulk_create_without_ids)
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        result = notify_many(users, 'Hello', 'World', wait=True)
+    assert result.queued_for_push == 2
+    ids = dict(Notification.objects.filter(user__in=users).values_list('user_id', 'pk'))
+    assert sorted((user_id, payload['id']) for user_id, payload in sent) == sorted(ids.items())
@@ -0,0 +1,40 @@
+"""
+Unit tests for the department hierarchy closure links
+"""
+from decimal import Decimal
+
+from django.test import Client
+
+from core_hr.org_tree import closure_links
+from tests.conftest import make_department, make_employee, make_user
+
+
+def test_every_department_links_to_itself_and_all_its_ancestors():
+    # 1 > 2 > 3, 1 > 4, 5 on its own
+    links = set(closure_links({1: None, 2: 1, 3: 2, 4: 1, 5: None}))
+    assert links == {
+        (1, 1, 0), (2, 2, 0), (3, 3, 0), (4, 4, 0), (5, 5, 0),
+        (1, 2, 1), (2, 3, 1), (1, 3, 2), (1, 4, 1),
+    }
+
+
+def test_subtree_of_a_department_is_every_link_from_it():
+    links = list(closure_links({1: None, 2: 1, 3: 2, 4: 1}))
+    assert sorted(descendant for ancestor, descendant, _ in links if ancestor == 2) == [2, 3]
+
+
+def test_a_cycle_in_the_parent_links_does_not_loop_forever():
+    assert set(closure_links({1: 2, 2: 1})) == {(1, 1, 0), (2, 1, 1), (2, 2, 0), (1, 2, 1)}
+
+
+def test_rollup_needs_a_company(company):
+    parent = make_department(company)
+    make_employee(company, make_department(company, parent=parent), salary=Decimal('100.00'))
+    client = Client()
+    client.force_login(make_user(role='super_admin'))
+    response = client.get('/api/departments/rollup/')
+    assert response.status_code == 400
+
+    client.force_login(make_employee(company, role='hr_manager').user)
+    rows = {row['id']: row for row in client.get('/api/departments/rollup/').json()['data']}
+    assert (rows[parent.pk]['headcount'], rows[parent.pk]['direct_headcount']) == (1, 0)
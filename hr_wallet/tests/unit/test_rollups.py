@@ -0,0 +1,92 @@
+"""
+Unit tests for the daily and monthly attendance rollups
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import IntegrityError, transaction
+from django.test import Client
+
+from core_hr.models import Attendance, AttendanceDailyRollup, EmployeeMonthlyRollup
+from core_hr.rollups import refresh_rollups_for, rebuild_rollups
+from tests.conftest import make_department, make_employee
+
+DAY = date(2025, 3, 3)
+
+
+def _daily(company):
+    return {
+        (r.department_id, r.date): (r.present_count, r.late_count, r.absent_count, r.total_hours)
+        for r in AttendanceDailyRollup.objects.filter(company=company)
+    }
+
+
+def _monthly(company):
+    return {
+        (r.employee_id, r.month): (r.total_days, r.present_days, r.late_days, r.total_hours)
+        for r in EmployeeMonthlyRollup.objects.filter(company=company)
+    }
+
+
+def test_saving_a_row_refreshes_its_buckets(company, employee):
+    Attendance.objects.create(employee=employee, date=DAY, status='late', total_hours=Decimal('7.50'))
+    assert _daily(company) == {(None, DAY): (0, 1, 0, Decimal('7.50'))}
+    assert _monthly(company) == {(employee.pk, DAY.replace(day=1)): (1, 0, 1, Decimal('7.50'))}
+
+
+def test_moving_a_row_to_another_day_empties_the_old_buckets(company, employee):
+    att = Attendance.objects.create(employee=employee, date=DAY, status='present', total_hours=Decimal('8.00'))
+    att.date = date(2025, 4, 1)
+    att.save()
+    assert _daily(company) == {(None, date(2025, 4, 1)): (1, 0, 0, Decimal('8.00'))}
+    assert _monthly(company) == {(employee.pk, date(2025, 4, 1)): (1, 1, 0, Decimal('8.00'))}
+
+
+def test_grouped_refresh_matches_a_full_rebuild(company):
+    department = make_department(company)
+    employees = [make_employee(company, department), make_employee(company)]
+    # bulk_create skips the signals, so nothing is rolled up yet
+    rows = [
+        Attendance(employee=emp, company=company, date=DAY + timedelta(days=i), status=('present', 'late', 'absent')[i % 3],
+                   total_hours=Decimal('8.00') if i % 3 != 2 else None)
+        for i in range(10) for emp in employees
+    ]
+    Attendance.objects.bulk_create(rows)
+    assert _daily(company) == {}
+
+    refresh_rollups_for({(row.employee_id, row.date) for row in rows})
+    refreshed = (_daily(company), _monthly(company))
+    assert len(refreshed[0]) == 20
+    assert refreshed[1][(employees[0].pk, date(2025, 3, 1))] == (10, 4, 3, Decimal('56.00'))
+
+    AttendanceDailyRollup.objects.filter(company=company).update(present_count=99)
+    EmployeeMonthlyRollup.objects.filter(company=company).delete()
+    assert rebuild_rollups(company.pk, DAY, DAY + timedelta(days=9)) == (20, 2)
+    assert (_daily(company), _monthly(company)) == refreshed
+
+
+def test_rebuild_only_touches_its_range(company, employee):
+    for offset in (0, 40):
+        Attendance.objects.create(employee=employee, date=DAY + timedelta(days=offset), status='present', total_hours=Decimal('8.00'))
+    AttendanceDailyRollup.objects.filter(company=company).update(present_count=5)
+    rebuild_rollups(company.pk, DAY, DAY)
+    assert _daily(company)[(None, DAY)][0] == 1
+    assert _daily(company)[(None, DAY + timedelta(days=40))][0] == 5
+
+
+def test_only_one_no_department_bucket_per_day(company):
+    AttendanceDailyRollup.objects.create(company=company, date=DAY)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        AttendanceDailyRollup.objects.create(company=company, date=DAY)
+    department = make_department(company)
+    AttendanceDailyRollup.objects.create(company=company, department=department, date=DAY)
+
+
+def test_attendance_overview_counts_the_tenant_day(company, employee):
+    Attendance.objects.create(employee=employee, date=DAY, status='late', total_hours=Decimal('7.50'))
+    client = Client()
+    client.force_login(make_employee(company, role='hr_manager').user)
+    response = client.get('/hr-dashboard/attendance/', {'date': DAY.isoformat()})
+    assert b'id="livePresent">1<' in response.content
+    assert b'id="liveLate">1<' in response.content
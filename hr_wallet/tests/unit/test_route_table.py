@@ -0,0 +1,52 @@
+"""
+Unit tests for the compiled URL prefix route table used by the access middlewares
+"""
+from accounts.routing import RouteTable, NO_MATCH
+
+
+def _table():
+    return RouteTable(
+        role_patterns={
+            'super_admin': ['/admin-panel/'],
+            'hr_manager': ['/hr-dashboard/'],
+            'employee': ['/employee-portal/'],
+        },
+        public_prefixes=['/accounts/login/', '/admin/', '/static/'],
+        audited_prefixes=['/admin-panel/', '/hr-dashboard/', '/employee-portal/'],
+    )
+
+
+def test_role_prefixes_require_role_and_are_audited():
+    table = _table()
+    decision = table.lookup('/hr-dashboard/attendance/')
+    assert decision.role == 'hr_manager'
+    assert decision.audit is True
+    assert decision.public is False
+    assert table.lookup('/admin-panel/').role == 'super_admin'
+
+
+def test_similar_prefixes_do_not_collide():
+    table = _table()
+    # '/admin/' is public, '/admin-panel/' is role restricted
+    assert table.lookup('/admin/login/').public is True
+    assert table.lookup('/admin/login/').role is None
+    assert table.lookup('/admin-panel/settings/').public is False
+
+
+def test_unmatched_paths():
+    table = _table()
+    assert table.lookup('/') is NO_MATCH
+    assert table.lookup('/hr-dashboard') is NO_MATCH
+    assert table.lookup('/api/profile/') is NO_MATCH
+
+
+def test_nested_prefixes_combine():
+    table = RouteTable(
+        role_patterns={'hr_manager': ['/hr/'], 'super_admin': ['/hr/admin/']},
+        public_prefixes=['/hr/public/'],
+        audited_prefixes=['/hr/'],
+    )
+    assert table.lookup('/hr/admin/x').role == 'super_admin'
+    assert table.lookup('/hr/admin/x').audit is True
+    public = table.lookup('/hr/public/page')
+    assert public.public is True and public.role == 'hr_manager' and public.audit is True
@@ -0,0 +1,79 @@
+"""
+Unit tests for the punch-pairing shift engine
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from django.utils.timezone import make_aware
+
+from core_hr.attendance import ensure_attendance, update_attendance
+from core_hr.compact import dedupe_key
+from core_hr.models import Attendance, BiometricEvent, ShiftRule, WorkSession
+from core_hr.shifts import Session, pair_punches, process_days, shift_day, summarize_day
+from tests.conftest import make_employee
+
+UTC = timezone.utc
+DAY = date(2025, 3, 4)
+
+
+def _at(hour, minute=0, days=0):
+    return datetime(2025, 3, 4, hour, minute, tzinfo=UTC) + timedelta(days=days)
+
+
+def test_overnight_punches_stay_on_the_start_day():
+    rule = ShiftRule(name='Night', start_time=time(22), end_time=time(6))
+    assert shift_day(rule, _at(21, 30), UTC) == DAY
+    assert shift_day(rule, _at(6, 15, days=1), UTC) == DAY
+    assert shift_day(rule, _at(19, 0), UTC) == DAY - timedelta(days=1)
+
+
+def test_split_shift_with_double_taps_and_unknown_punches():
+    rule = ShiftRule(name='Day', start_time=time(9), end_time=time(17), unpaid_break_minutes=60)
+    sessions = pair_punches([
+        (_at(8, 55), 'checkin'), (_at(8, 56), 'checkin'),
+        (_at(12, 0), 'checkout'), (_at(12, 1), 'checkout'),
+        (_at(13, 0), 'unknown'), (_at(18, 0), 'unknown'),
+    ], rule)
+    assert sessions == [Session(_at(8, 55), _at(12, 1)), Session(_at(13, 0), _at(18, 0))]
+
+    summary = summarize_day(rule, DAY, sessions, UTC)
+    # Split sessions already exclude the break, so nothing more is deducted
+    assert summary.worked_minutes == 186 + 300
+    assert summary.regular_minutes == 420
+    assert summary.overtime_minutes == 66
+    assert summary.break_minutes == 59
+    assert (summary.clock_in, summary.clock_out, summary.status) == (time(8, 55), time(18, 0), 'present')
+
+
+def test_unpaired_punches_are_kept_but_not_paid():
+    rule = ShiftRule(name='Day', start_time=time(9), end_time=time(17), max_session_hours=12)
+    sessions = pair_punches([(_at(9, 30), 'checkin'), (_at(23, 0), 'checkout')], rule)
+    assert sessions == [Session(_at(9, 30), None), Session(None, _at(23, 0))]
+
+    summary = summarize_day(rule, DAY, sessions, UTC)
+    assert summary.worked_minutes == 0
+    assert summary.status == 'late'
+
+
+def _punch(employee, attendance, hour, event_type):
+    ts = make_aware(datetime(2025, 3, 4, hour))
+    return BiometricEvent.objects.create(
+        company_id=employee.company_id, device_user_id=employee.employee_id, event_type=event_type, timestamp=ts,
+        processed=True, attendance=attendance, dedupe_key=dedupe_key(None, employee.company_id, employee.employee_id, ts, event_type),
+    )
+
+
+def test_reprocessing_keeps_hr_corrections(company):
+    punched, corrected = make_employee(company), make_employee(company)
+    for employee in (punched, corrected):
+        att = ensure_attendance(employee, DAY)
+        _punch(employee, att, 9, 'checkin')
+        _punch(employee, att, 18, 'checkout')
+    update_attendance(corrected, DAY, clock_in=time(9), clock_out=time(17), status='late')
+
+    result = process_days(company.pk, [DAY])
+    assert (result[(punched.pk, DAY)].clock_in, result[(punched.pk, DAY)].clock_out) == (time(9), time(18))
+    att = Attendance.objects.get(employee=corrected, date=DAY)
+    assert (att.clock_out, att.status, att.total_hours, att.manually_corrected) == (time(17), 'late', Decimal('8.00'), True)
+    # The punches are still paired into sessions
+    assert WorkSession.objects.filter(employee=corrected, date=DAY).count() == 1
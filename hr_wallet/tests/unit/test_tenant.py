@@ -0,0 +1,65 @@
+"""
+Unit tests for per-request tenant resolution and the process-level company cache
+"""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+
+from core_hr import middleware
+from core_hr.context_processors import company_context
+from core_hr.middleware import TenantMiddleware, get_company, resolve_tenant
+from core_hr.models import Company
+from tests.conftest import make_user
+
+
+def _request(user, session=None):
+    request = RequestFactory().get('/')
+    request.user = user
+    request.session = SessionStore()
+    request.session.update(session or {})
+    return request
+
+
+def test_tenant_comes_from_the_user_then_the_session(company):
+    user = make_user(company)
+    tenant = resolve_tenant(_request(user))
+    assert tenant.pk == company.pk
+    assert user.company is not None and user.company.pk == company.pk
+
+    assert resolve_tenant(_request(make_user())) is None
+    assert resolve_tenant(_request(AnonymousUser(), {'selected_company_id': company.pk})).pk == company.pk
+    assert resolve_tenant(_request(AnonymousUser())) is None
+
+
+def test_cached_company_is_reloaded_after_its_timeout(company):
+    middleware.invalidate_company(company.pk)
+    get_company(company.pk)
+    # Queryset updates skip the invalidation signal, so the cached row is served until it expires
+    Company.objects.filter(pk=company.pk).update(name='Renamed Ltd')
+    assert get_company(company.pk).name != 'Renamed Ltd'
+    _, cached = middleware._company_cache[company.pk]
+    middleware._company_cache[company.pk] = (0, cached)
+    assert get_company(company.pk).name == 'Renamed Ltd'
+
+
+def test_saving_a_company_invalidates_it(company):
+    get_company(company.pk)
+    company.name = 'Saved Ltd'
+    company.save()
+    assert company.pk not in middleware._company_cache
+    assert get_company(company.pk).name == 'Saved Ltd'
+
+
+def test_callers_get_their_own_copy(company):
+    first = get_company(company.pk)
+    first.name = 'Changed for one request'
+    assert get_company(company.pk).name == company.name
+    assert get_company(company.pk) is not get_company(company.pk)
+
+
+def test_middleware_exposes_the_tenant_to_templates(company):
+    assert 'core_hr.middleware.TenantMiddleware' in settings.MIDDLEWARE
+    assert 'core_hr.context_processors.company_context' in settings.TEMPLATES[0]['OPTIONS']['context_processors']
+    context = TenantMiddleware(company_context)(_request(make_user(company)))
+    assert context['company'].pk == company.pk
@@ -0,0 +1,57 @@
+"""
+Unit tests for the cached unread notification summary and its watermark
+"""
+from django.test import TestCase
+
+from notifications.models import Notification
+from notifications.services import get_unread_summary, get_unread_version, mark_all_read, notify_many
+
+
+def test_unchanged_watermark_returns_no_summary(employee):
+    user_id = employee.user_id
+    version, summary = get_unread_summary(user_id)
+    assert summary == {'count': 0, 'latest': []}
+    assert get_unread_summary(user_id, since=version) == (version, None)
+
+
+def test_summary_is_served_from_cache_until_bumped(employee):
+    user = employee.user
+    version, _ = get_unread_summary(user.pk)
+    # Queryset writes bypass the bump, so the cached summary is still returned
+    Notification.objects.bulk_create([Notification(user=user, title='Hidden', message='m')])
+    assert get_unread_summary(user.pk) == (version, {'count': 0, 'latest': []})
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        notify_many([user], 'Hello', 'World')
+    new_version, summary = get_unread_summary(user.pk, since=version)
+    assert new_version != version
+    assert summary['count'] == 2
+    assert summary['latest'][0]['title'] == 'Hello'
+
+
+def test_bumps_wait_for_commit(employee):
+    user = employee.user
+    version = get_unread_version(user.pk)
+    with TestCase.captureOnCommitCallbacks() as callbacks:
+        Notification.objects.create(user=user, title='Hello', message='World')
+        assert get_unread_version(user.pk) == version
+    for callback in callbacks:
+        callback()
+    assert get_unread_version(user.pk) != version
+
+
+def test_mark_all_read_respects_up_to(employee):
+    user = employee.user
+    first = Notification.objects.create(user=user, title='One', message='m')
+    Notification.objects.create(user=user, title='Two', message='m')
+    version = get_unread_version(user.pk)
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        assert mark_all_read(user.pk, up_to=first.pk) == 1
+    version_after, summary = get_unread_summary(user.pk, since=version)
+    assert version_after != version
+    assert [n['title'] for n in summary['latest']] == ['Two']
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        assert mark_all_read(user.pk, up_to=first.pk) == 0
+    assert get_unread_version(user.pk) == version_after
@@ -0,0 +1,29 @@
+"""
+Unit tests for the working-day calendar engine
+"""
+from datetime import date
+
+from core_hr import workdays
+from core_hr.workdays import WorkCalendar, compile_year
+
+
+def test_compiled_year_follows_weekmask_and_holidays():
+    mask = compile_year('1111100', [date(2025, 1, 1), date(2024, 12, 25)], 2025)
+    assert len(mask) == 365
+    # 2025-01-01 is a Wednesday holiday, the 4th and 5th a weekend
+    assert list(mask[:7]) == [0, 1, 1, 0, 0, 1, 1]
+    assert len(compile_year('1111110', [], 2024)) == 366
+
+
+def test_counts_across_years_and_for_many_ranges(monkeypatch):
+    holidays = {2025: [date(2025, 12, 25)], 2026: [date(2026, 1, 1)]}
+    monkeypatch.setattr(workdays, 'year_mask', lambda company_id, year: compile_year('1111100', holidays[year], year))
+    calendar = WorkCalendar(1, 2025, 2026)
+    assert calendar.count(date(2025, 12, 22), date(2026, 1, 4)) == 8
+    assert calendar.count(date(2025, 12, 28), date(2025, 12, 27)) == 0
+    assert not calendar.is_working_day(date(2026, 1, 1))
+    assert calendar.count_many(
+        [date(2025, 12, 22), date(2026, 1, 5), date(2026, 1, 9)],
+        [date(2025, 12, 26), date(2026, 1, 9), date(2026, 1, 5)],
+    ) == [4, 5, 0]
+    assert calendar.working_days(date(2025, 12, 24), date(2025, 12, 29)) == [date(2025, 12, 24), date(2025, 12, 26), date(2025, 12, 29)]